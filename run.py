@@ -2,6 +2,10 @@ from dotenv import load_dotenv
 load_dotenv() # Load environment variables from .env file
 
 from src import app
+from src.data_access import db_handler
+
+# Background services belong to the server process, not to everything that imports src
+db_handler.start_configured_result_queue()
 
 if __name__ == '__main__':
     # Consider moving host/port/debug to config if they vary by environment
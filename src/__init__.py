@@ -21,11 +21,24 @@ def create_app(test_config=None):
     except OSError:
         pass
 
+    # Keep session data on the server; the cookie carries only the session id
+    from .config import SESSION_BACKEND, SESSION_STORE_PATH, SESSION_MAX_ENTRIES, SESSION_TTL_SECONDS
+    from .session_store import make_session_interface
+    session_interface = make_session_interface(
+        app.config.get('SESSION_BACKEND', SESSION_BACKEND),
+        path=app.config.get('SESSION_STORE_PATH', SESSION_STORE_PATH),
+        max_entries=SESSION_MAX_ENTRIES,
+        ttl_seconds=SESSION_TTL_SECONDS,
+    )
+    if session_interface is not None:
+        app.session_interface = session_interface
+
     # Register blueprints
-    from .views import main_routes, exercise_routes, preference_routes
+    from .views import main_routes, exercise_routes, preference_routes, api_routes
     app.register_blueprint(main_routes.bp)
     app.register_blueprint(exercise_routes.bp)
     app.register_blueprint(preference_routes.bp)
+    app.register_blueprint(api_routes.bp)
 
     # Add Jinja globals
     app.jinja_env.globals['enumerate'] = enumerate
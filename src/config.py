@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
-from supabase import create_client, Client
+from supabase import Client
 
 load_dotenv() # Load environment variables from .env
 
@@ -21,9 +21,103 @@ else:
 SUPABASE_URL: str = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY: str = os.environ.get("SUPABASE_KEY")
 
+# HTTP connection pool shared by every Supabase call in the process (all worker threads):
+# connections kept open, how long an idle one lives, HTTP/2 (needs the h2 package) and timeouts
+SUPABASE_POOL_MAX_CONNECTIONS: int = int(os.environ.get("SUPABASE_POOL_MAX_CONNECTIONS", "20"))
+SUPABASE_POOL_MAX_KEEPALIVE: int = int(os.environ.get("SUPABASE_POOL_MAX_KEEPALIVE", "10"))
+SUPABASE_KEEPALIVE_EXPIRY_SECONDS: float = float(os.environ.get("SUPABASE_KEEPALIVE_EXPIRY_SECONDS", "30"))
+SUPABASE_HTTP2: bool = os.environ.get("SUPABASE_HTTP2", "1") == "1"
+SUPABASE_CONNECT_TIMEOUT_SECONDS: float = float(os.environ.get("SUPABASE_CONNECT_TIMEOUT_SECONDS", "5"))
+SUPABASE_READ_TIMEOUT_SECONDS: float = float(os.environ.get("SUPABASE_READ_TIMEOUT_SECONDS", "15"))
+
 supabase: Client = None
+supabase_pool = None # transport behind supabase's HTTP client; reports pool stats
 if SUPABASE_URL and SUPABASE_KEY:
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    from src.data_access.http_pool import create_pool, create_http_client, create_supabase_client
+    supabase_pool = create_pool(
+        max_connections=SUPABASE_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=SUPABASE_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+        http2=SUPABASE_HTTP2,
+    )
+    supabase_http = create_http_client(supabase_pool, connect_timeout=SUPABASE_CONNECT_TIMEOUT_SECONDS,
+                                       read_timeout=SUPABASE_READ_TIMEOUT_SECONDS)
+    supabase = create_supabase_client(SUPABASE_URL, SUPABASE_KEY, supabase_http)
     print("DEBUG: Supabase client initialized.")
 else:
     print("WARNING: Supabase URL or Key not found in environment variables. Database features may be disabled.")
+
+# Where db_handler keeps results, sentences and preferences: "supabase" (default) or
+# "sqlite", a local file with the same tables for single-node deployments and offline benchmarks
+STORAGE_BACKEND: str = os.environ.get("STORAGE_BACKEND", "supabase")
+SQLITE_DB_PATH: str = os.environ.get(
+    "SQLITE_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "app.sqlite3")
+)
+
+# Sentences per page on /sentences and /api/sentences (the API accepts up to SENTENCE_PAGE_MAX)
+SENTENCE_PAGE_SIZE: int = int(os.environ.get("SENTENCE_PAGE_SIZE", "20"))
+SENTENCE_PAGE_MAX: int = int(os.environ.get("SENTENCE_PAGE_MAX", "100"))
+
+# Per-user cache for results/preferences loaded from Supabase
+USER_CACHE_MAX_USERS: int = int(os.environ.get("USER_CACHE_MAX_USERS", "1024"))
+USER_CACHE_TTL_SECONDS: float = float(os.environ.get("USER_CACHE_TTL_SECONDS", "300"))
+
+# Compiled verb catalogue (built with `python -m src.verb_catalogue`); used instead of the
+# conjugation engine when present and up to date
+VERB_CATALOGUE_PATH: str = os.environ.get(
+    "VERB_CATALOGUE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "verb_catalogue.bin")
+)
+
+# Cache of Gemini sentence feedback: an in-process LRU in front of a local SQLite file.
+# Set FEEDBACK_CACHE_PATH to an empty string to keep the cache in memory only.
+FEEDBACK_CACHE_PATH: str = os.environ.get(
+    "FEEDBACK_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "feedback_cache.sqlite3")
+)
+FEEDBACK_CACHE_MAX_ENTRIES: int = int(os.environ.get("FEEDBACK_CACHE_MAX_ENTRIES", "4096"))
+
+# Gemini client: concurrent calls allowed per process, deadline per call (including
+# queueing and retries), and how many times a transient API error is retried
+GEMINI_MAX_CONCURRENCY: int = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_TIMEOUT_SECONDS: float = float(os.environ.get("GEMINI_TIMEOUT_SECONDS", "30"))
+GEMINI_MAX_RETRIES: int = int(os.environ.get("GEMINI_MAX_RETRIES", "2"))
+
+# Micro-batching of Gemini feedback: sentences from concurrent requests that arrive within
+# GEMINI_BATCH_MAX_WAIT_MS of each other share one model call of at most GEMINI_BATCH_MAX_TOKENS prompt tokens
+GEMINI_BATCH_MAX_TOKENS: int = int(os.environ.get("GEMINI_BATCH_MAX_TOKENS", "8000"))
+GEMINI_BATCH_MAX_WAIT_SECONDS: float = float(os.environ.get("GEMINI_BATCH_MAX_WAIT_MS", "50")) / 1000
+
+# Model backend for sentence feedback: "gemini", "fake" (in-process stand-in) or the URL of
+# `python -m src.fake_model_server`. The FAKE_MODEL_* settings configure the in-process fake.
+MODEL_BACKEND: str = os.environ.get("MODEL_BACKEND", "gemini")
+FAKE_MODEL_LATENCY_MS: float = float(os.environ.get("FAKE_MODEL_LATENCY_MS", "800"))
+FAKE_MODEL_LATENCY_SIGMA: float = float(os.environ.get("FAKE_MODEL_LATENCY_SIGMA", "0.5"))
+FAKE_MODEL_ERROR_RATE: float = float(os.environ.get("FAKE_MODEL_ERROR_RATE", "0"))
+FAKE_MODEL_MALFORMED_RATE: float = float(os.environ.get("FAKE_MODEL_MALFORMED_RATE", "0"))
+FAKE_MODEL_CHUNK_CHARS: int = int(os.environ.get("FAKE_MODEL_CHUNK_CHARS", "64"))
+
+# Server-side sessions: the session cookie holds only an id. SESSION_BACKEND is "memory"
+# (per-process LRU, single worker), "sqlite" (SESSION_STORE_PATH, shared by all workers on
+# the node) or "cookie" for Flask's default signed-cookie session
+SESSION_BACKEND: str = os.environ.get("SESSION_BACKEND", "memory")
+SESSION_STORE_PATH: str = os.environ.get(
+    "SESSION_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "sessions.sqlite3")
+)
+SESSION_MAX_ENTRIES: int = int(os.environ.get("SESSION_MAX_ENTRIES", "10000"))
+SESSION_TTL_SECONDS: float = float(os.environ.get("SESSION_TTL_SECONDS", "43200"))
+
+# Write-behind queue for exercise results: with RESULT_WRITE_BEHIND=1, run.py journals rows
+# under RESULT_JOURNAL_DIR and a background thread writes them to Supabase in batches. Off by
+# default: it needs migration 20250620120000 (results.idempotency_key) applied first.
+RESULT_WRITE_BEHIND: bool = os.environ.get("RESULT_WRITE_BEHIND", "0") == "1"
+RESULT_JOURNAL_DIR: str = os.environ.get(
+    "RESULT_JOURNAL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "result_journal")
+)
+RESULT_QUEUE_BATCH_SIZE: int = int(os.environ.get("RESULT_QUEUE_BATCH_SIZE", "200"))
+RESULT_QUEUE_FLUSH_SECONDS: float = float(os.environ.get("RESULT_QUEUE_FLUSH_MS", "500")) / 1000
+RESULT_QUEUE_MAX_PENDING: int = int(os.environ.get("RESULT_QUEUE_MAX_PENDING", "10000"))
+RESULT_QUEUE_DRAIN_SECONDS: float = float(os.environ.get("RESULT_QUEUE_DRAIN_SECONDS", "10"))
@@ -0,0 +1,361 @@
+"""
+Rule-based Portuguese conjugation engine.
+
+Regular -ar/-er/-ir forms are derived from the infinitive for every tense in
+core_data.TENSE_NAMES. Irregular verbs only list the forms the rules get wrong in
+IRREGULAR_FORMS; the subjunctives are then derived from the (possibly irregular)
+"eu" present and "eles" preterite forms, the same way a grammar book does it.
+Results are memoized per (verb, tense), so nothing is generated until it is asked for.
+"""
+import hashlib
+from collections.abc import Mapping
+from functools import lru_cache
+
+# Forms per tense are in core_data.PRONOUNS order: eu, ele, nós, eles
+REGULAR_ENDINGS = {
+    "ar": {
+        "presente": ["o", "a", "amos", "am"],
+        "preterito_perfeito": ["ei", "ou", "amos", "aram"],
+        "preterito_imperfeito": ["ava", "ava", "ávamos", "avam"],
+    },
+    "er": {
+        "presente": ["o", "e", "emos", "em"],
+        "preterito_perfeito": ["i", "eu", "emos", "eram"],
+        "preterito_imperfeito": ["ia", "ia", "íamos", "iam"],
+    },
+    "ir": {
+        "presente": ["o", "e", "imos", "em"],
+        "preterito_perfeito": ["i", "iu", "imos", "iram"],
+        "preterito_imperfeito": ["ia", "ia", "íamos", "iam"],
+    },
+}
+
+# Subjunctive present endings, added to the "eu" present form minus its final -o
+SUBJUNCTIVE_PRESENT_ENDINGS = {
+    "ar": ["e", "e", "emos", "em"],
+    "er": ["a", "a", "amos", "am"],
+    "ir": ["a", "a", "amos", "am"],
+}
+
+# Forms the rules get wrong. None means "use the rule" for that pronoun.
+IRREGULAR_FORMS = {
+    "ser": {
+        "presente": ["sou", "é", "somos", "são"],
+        "preterito_perfeito": ["fui", "foi", "fomos", "foram"],
+        "preterito_imperfeito": ["era", "era", "éramos", "eram"],
+        "subjuntivo_presente": ["seja", "seja", "sejamos", "sejam"],
+    },
+    "estar": {
+        "presente": ["estou", "está", "estamos", "estão"],
+        "preterito_perfeito": ["estive", "esteve", "estivemos", "estiveram"],
+        "subjuntivo_presente": ["esteja", "esteja", "estejamos", "estejam"],
+    },
+    "ir": {
+        "presente": ["vou", "vai", "vamos", "vão"],
+        "preterito_perfeito": ["fui", "foi", "fomos", "foram"],
+        "subjuntivo_presente": ["vá", "vá", "vamos", "vão"],
+    },
+    "ter": {
+        "presente": ["tenho", "tem", "temos", "têm"],
+        "preterito_perfeito": ["tive", "teve", "tivemos", "tiveram"],
+        "preterito_imperfeito": ["tinha", "tinha", "tínhamos", "tinham"],
+    },
+    "fazer": {
+        "presente": ["faço", "faz", None, None],
+        "preterito_perfeito": ["fiz", "fez", "fizemos", "fizeram"],
+    },
+    "dizer": {
+        "presente": ["digo", "diz", None, None],
+        "preterito_perfeito": ["disse", "disse", "dissemos", "disseram"],
+    },
+    "vir": {
+        "presente": ["venho", "vem", "vimos", "vêm"],
+        "preterito_perfeito": ["vim", "veio", "viemos", "vieram"],
+        "preterito_imperfeito": ["vinha", "vinha", "vínhamos", "vinham"],
+    },
+    "pôr": {
+        "presente": ["ponho", "põe", "pomos", "põem"],
+        "preterito_perfeito": ["pus", "pôs", "pusemos", "puseram"],
+        "preterito_imperfeito": ["punha", "punha", "púnhamos", "punham"],
+    },
+    "querer": {
+        "presente": [None, "quer", None, None],
+        "preterito_perfeito": ["quis", "quis", "quisemos", "quiseram"],
+        "subjuntivo_presente": ["queira", "queira", "queiramos", "queiram"],
+    },
+    "saber": {
+        "presente": ["sei", None, None, None],
+        "preterito_perfeito": ["soube", "soube", "soubemos", "souberam"],
+        "subjuntivo_presente": ["saiba", "saiba", "saibamos", "saibam"],
+    },
+    "poder": {
+        "presente": ["posso", None, None, None],
+        "preterito_perfeito": ["pude", "pôde", "pudemos", "puderam"],
+    },
+    "dar": {
+        "presente": ["dou", "dá", "damos", "dão"],
+        "preterito_perfeito": ["dei", "deu", "demos", "deram"],
+        "subjuntivo_presente": ["dê", "dê", "demos", "deem"],
+    },
+    "trazer": {
+        "presente": ["trago", "traz", None, None],
+        "preterito_perfeito": ["trouxe", "trouxe", "trouxemos", "trouxeram"],
+    },
+    "ler": {
+        "presente": ["leio", "lê", "lemos", "leem"],
+    },
+    "ouvir": {
+        "presente": ["ouço", None, None, None],
+    },
+    "dormir": {
+        "presente": ["durmo", None, None, None],
+    },
+    "sentir": {
+        "presente": ["sinto", None, None, None],
+    },
+    "pedir": {
+        "presente": ["peço", None, None, None],
+    },
+    "servir": {
+        "presente": ["sirvo", None, None, None],
+    },
+    "conseguir": {
+        "presente": ["consigo", None, None, None],
+    },
+    "preferir": {
+        "presente": ["prefiro", None, None, None],
+    },
+    "ver": {
+        "presente": ["vejo", "vê", "vemos", "veem"],
+        "preterito_perfeito": ["vi", "viu", "vimos", "viram"],
+    },
+    "haver": {
+        "presente": ["hei", "há", "havemos", "hão"],
+        "preterito_perfeito": ["houve", "houve", "houvemos", "houveram"],
+        "subjuntivo_presente": ["haja", "haja", "hajamos", "hajam"],
+    },
+    "caber": {
+        "presente": ["caibo", None, None, None],
+        "preterito_perfeito": ["coube", "coube", "coubemos", "couberam"],
+    },
+    "perder": {
+        "presente": ["perco", None, None, None],
+    },
+    "crer": {
+        "presente": ["creio", "crê", "cremos", "creem"],
+    },
+    "rir": {
+        "presente": ["rio", "ri", None, "riem"],
+    },
+    "construir": {
+        "presente": [None, "constrói", None, "constroem"],
+    },
+}
+
+SUPPORTED_TENSES = (
+    "presente",
+    "preterito_perfeito",
+    "preterito_imperfeito",
+    "subjuntivo_presente",
+    "subjuntivo_preterito",
+    "subjuntivo_futuro",
+)
+
+_ACCENTED = {"a": "á", "e": "é", "i": "í", "o": "ô", "u": "ú"}
+_UNACCENTED = {"á": "a", "é": "e", "ê": "e", "í": "i", "ó": "o", "ô": "o", "ú": "u"}
+_VOWELS = "aeiouáéíóúâêôãõ"
+
+
+def verb_group(verb: str) -> str:
+    """Return 'ar', 'er' or 'ir'. pôr and its compounds conjugate with the -er endings."""
+    if verb.endswith("ôr") or verb.endswith("por"):
+        return "er"
+    group = verb[-2:]
+    if group not in REGULAR_ENDINGS:
+        raise ValueError(f"Not a Portuguese infinitive: {verb}")
+    return group
+
+
+def _has_hiatus(stem: str, group: str) -> bool:
+    """-ir verbs with a vowel-final stem (sair, construir) stress the ending's i: saímos, construíram."""
+    if group != "ir" or not stem or stem[-1] not in _VOWELS:
+        return False
+    # 'gu'/'qu' are digraphs, not a vowel followed by i (conseguir -> conseguimos)
+    return not (stem.endswith("gu") or stem.endswith("qu"))
+
+
+def _apply_spelling(stem: str, ending: str, group: str) -> str:
+    """Keep the stem's consonant sound when the ending's vowel changes (ficar -> fiquei, agir -> ajo)."""
+    first = ending[:1]
+    if group == "ar" and first in ("e", "é", "ê"):
+        # Hard c/g and ç before a: ficar -> fique, pagar -> pague, começar -> comece
+        if stem.endswith("c"):
+            return stem[:-1] + "qu" + ending
+        if stem.endswith("g"):
+            return stem[:-1] + "gu" + ending
+        if stem.endswith("ç"):
+            return stem[:-1] + "c" + ending
+    elif group != "ar" and first in ("a", "o"):
+        # Soft c/g before e/i: conhecer -> conheço, agir -> ajo, seguir -> sigo
+        if stem.endswith("gu"):
+            return stem[:-2] + "g" + ending
+        if stem.endswith("c"):
+            return stem[:-1] + "ç" + ending
+        if stem.endswith("g"):
+            return stem[:-1] + "j" + ending
+    return stem + ending
+
+
+def _stem_tense(verb: str, tense: str) -> list:
+    group = verb_group(verb)
+    stem = verb[:-2]
+    endings = REGULAR_ENDINGS[group][tense]
+    hiatus = _has_hiatus(stem, group)
+
+    forms = []
+    for pronoun_idx, ending in enumerate(endings):
+        if hiatus and ending.startswith("i") and not (tense == "preterito_perfeito" and pronoun_idx == 1):
+            ending = "í" + ending[1:]
+        form = _apply_spelling(stem, ending, group)
+        if tense == "presente":
+            # -uzir verbs drop the final e in the ele form: produzir -> produz
+            if pronoun_idx == 1 and verb.endswith("uzir"):
+                form = form[:-1]
+            # -air verbs take an i in the eu and ele forms: sair -> saio, sai
+            elif pronoun_idx in (0, 1) and verb.endswith("air"):
+                form = stem + "i" + ("o" if pronoun_idx == 0 else "")
+        forms.append(form)
+    return forms
+
+
+def _preterite_base(verb: str) -> tuple:
+    """Return (base, strong) from the 'eles' preterite: falaram -> 'fala'; strong is True for irregular stems."""
+    eles = _conjugate("preterito_perfeito", verb)[3]
+    if not eles.endswith("ram"):
+        raise ValueError(f"Unexpected preterite form for {verb}: {eles}")
+    regular_eles = _stem_tense(verb, "preterito_perfeito")[3]
+    return eles[:-3], eles != regular_eles
+
+
+def _accent_last(base: str, strong: bool) -> str:
+    last = base[-1]
+    if last not in _ACCENTED:
+        return base
+    if last == "e":
+        # Regular -er verbs close the vowel (comêssemos); strong preterites open it (fizéssemos)
+        return base[:-1] + ("é" if strong else "ê")
+    return base[:-1] + _ACCENTED[last]
+
+
+def _unaccent_last(base: str) -> str:
+    return base[:-1] + _UNACCENTED.get(base[-1], base[-1])
+
+
+def _derive(verb: str, tense: str) -> list:
+    if tense in ("presente", "preterito_perfeito", "preterito_imperfeito"):
+        return _stem_tense(verb, tense)
+
+    if tense == "subjuntivo_presente":
+        eu = _conjugate("presente", verb)[0]
+        base = eu[:-1] if eu.endswith("o") else eu
+        group = verb_group(verb)
+        if group == "ar":
+            # -e endings need the spelling change (fico -> fique); -a endings keep the eu stem as is
+            return [_apply_spelling(base, ending, group) for ending in SUBJUNCTIVE_PRESENT_ENDINGS[group]]
+        return [base + ending for ending in SUBJUNCTIVE_PRESENT_ENDINGS[group]]
+
+    base, strong = _preterite_base(verb)
+    if tense == "subjuntivo_preterito":
+        return [base + "sse", base + "sse", _accent_last(base, strong) + "ssemos", base + "ssem"]
+    if tense == "subjuntivo_futuro":
+        plain = _unaccent_last(base)
+        return [plain + "r", plain + "r", plain + "rmos", base + "rem"]
+
+    raise KeyError(tense)
+
+
+@lru_cache(maxsize=None)
+def _conjugate(tense: str, verb: str) -> tuple:
+    if tense not in SUPPORTED_TENSES:
+        raise KeyError(tense)
+    overrides = IRREGULAR_FORMS.get(verb, {}).get(tense)
+    if overrides is not None and all(form is not None for form in overrides):
+        return tuple(overrides)
+
+    forms = _derive(verb, tense)
+    if overrides is not None:
+        forms = [override if override is not None else form for form, override in zip(forms, overrides)]
+    return tuple(forms)
+
+
+def conjugate(verb: str, tense: str) -> list:
+    """Return the forms of verb in tense, in core_data.PRONOUNS order."""
+    return list(_conjugate(tense, verb))
+
+
+def conjugate_all(verb: str, tenses=SUPPORTED_TENSES) -> dict:
+    """Return {tense: forms} for one verb."""
+    return {tense: conjugate(verb, tense) for tense in tenses}
+
+
+def cache_info():
+    """Expose the memoization counters of the per-(verb, tense) cache."""
+    return _conjugate.cache_info()
+
+
+def rules_digest() -> bytes:
+    """
+    Digest of the engine itself: this module's code (endings, spelling rules, derivations)
+    and IRREGULAR_FORMS. Any change to the forms the engine produces changes it, without
+    generating a single form.
+    """
+    digest = hashlib.sha256()
+    with open(__file__, "rb") as source:
+        digest.update(source.read())
+    digest.update(repr(sorted(IRREGULAR_FORMS.items())).encode("utf-8"))
+    return digest.digest()
+
+
+class GeneratedVerbsView(Mapping):
+    """Read-only {verb: {tense: [forms]}} mapping whose forms are generated on first access."""
+
+    def __init__(self, infinitives, tenses=SUPPORTED_TENSES):
+        self.infinitives = list(infinitives)
+        self.tenses = tuple(tenses)
+        self._known = set(self.infinitives)
+
+    def __getitem__(self, verb):
+        if verb not in self._known:
+            raise KeyError(verb)
+        return GeneratedTensesView(verb, self.tenses)
+
+    def __iter__(self):
+        return iter(self.infinitives)
+
+    def __len__(self):
+        return len(self.infinitives)
+
+    def __contains__(self, verb):
+        return verb in self._known
+
+
+class GeneratedTensesView(Mapping):
+    """Read-only {tense: [forms]} mapping for one verb."""
+
+    def __init__(self, verb: str, tenses: tuple):
+        self.verb = verb
+        self.tenses = tenses
+
+    def __getitem__(self, tense):
+        if tense not in self.tenses:
+            raise KeyError(tense)
+        return conjugate(self.verb, tense)
+
+    def __iter__(self):
+        return iter(self.tenses)
+
+    def __len__(self):
+        return len(self.tenses)
+
+    def __contains__(self, tense):
+        return tense in self.tenses
@@ -0,0 +1,170 @@
+"""
+Compact, indexed storage for verb conjugations.
+
+Verbs and tenses are interned to integer ids and every form lives in one flat string,
+sliced by an offsets array, so a catalogue costs a few bytes per form instead of a
+dict-of-lists of str objects. Forward lookups are O(1) by id; reverse lookups go
+through a lazily built sorted index.
+"""
+from array import array
+from collections.abc import Mapping
+
+
+class ConjugationTable:
+    """Verb x tense x pronoun table of surface forms."""
+
+    def __init__(self, verbs: list, tenses: list, pronouns: list, forms_blob: str, offsets: array, present: bytearray):
+        self.verbs = list(verbs)
+        self.tenses = list(tenses)
+        self.pronouns = list(pronouns)
+        self._verb_ids = {verb: i for i, verb in enumerate(self.verbs)}
+        self._tense_ids = {tense: i for i, tense in enumerate(self.tenses)}
+        self._forms_blob = forms_blob
+        self._offsets = offsets # len == slots + 1; form i is blob[offsets[i]:offsets[i + 1]]
+        self._present = present # one byte per (verb_id, tense_id): 1 if the verb has that tense
+        self._sorted_slots = None # built on first reverse lookup
+
+    @classmethod
+    def from_nested(cls, nested: dict, pronouns: list, tenses: list = None):
+        """Build a table from a {verb: {tense: [form per pronoun]}} dict."""
+        if tenses is None:
+            tenses = []
+            for verb_tenses in nested.values():
+                for tense in verb_tenses:
+                    if tense not in tenses:
+                        tenses.append(tense)
+        pronoun_count = len(pronouns)
+
+        parts = []
+        offsets = array('I', [0])
+        present = bytearray(len(nested) * len(tenses))
+        position = 0
+        for verb_id, verb in enumerate(nested):
+            for tense_id, tense in enumerate(tenses):
+                forms = nested[verb].get(tense)
+                if forms is not None:
+                    if len(forms) != pronoun_count:
+                        raise ValueError(f"{verb} {tense}: expected {pronoun_count} forms, got {len(forms)}")
+                    present[verb_id * len(tenses) + tense_id] = 1
+                else:
+                    forms = [""] * pronoun_count
+                for form in forms:
+                    parts.append(form)
+                    position += len(form)
+                    offsets.append(position)
+        return cls(list(nested), tenses, pronouns, "".join(parts), offsets, present)
+
+    def __len__(self):
+        return len(self.verbs)
+
+    def verb_id(self, verb: str):
+        return self._verb_ids.get(verb)
+
+    def tense_id(self, tense: str):
+        return self._tense_ids.get(tense)
+
+    def has(self, verb_id: int, tense_id: int) -> bool:
+        return bool(self._present[verb_id * len(self.tenses) + tense_id])
+
+    def _slot(self, verb_id: int, tense_id: int, pronoun_idx: int) -> int:
+        return (verb_id * len(self.tenses) + tense_id) * len(self.pronouns) + pronoun_idx
+
+    def form(self, verb_id: int, tense_id: int, pronoun_idx: int) -> str:
+        """Return one surface form by ids in O(1)."""
+        slot = self._slot(verb_id, tense_id, pronoun_idx)
+        return self._forms_blob[self._offsets[slot]:self._offsets[slot + 1]]
+
+    def forms(self, verb_id: int, tense_id: int) -> list:
+        """Return the forms for every pronoun of one verb-tense, in PRONOUNS order."""
+        first = self._slot(verb_id, tense_id, 0)
+        offsets = self._offsets
+        blob = self._forms_blob
+        return [blob[offsets[slot]:offsets[slot + 1]] for slot in range(first, first + len(self.pronouns))]
+
+    def lookup(self, verb: str, tense: str) -> list:
+        """Return the forms for a verb-tense by name; raises KeyError if the table doesn't have it."""
+        verb_id = self._verb_ids.get(verb)
+        tense_id = self._tense_ids.get(tense)
+        if verb_id is None or tense_id is None or not self.has(verb_id, tense_id):
+            raise KeyError((verb, tense))
+        return self.forms(verb_id, tense_id)
+
+    def _slot_key(self, slot: int) -> str:
+        return self._forms_blob[self._offsets[slot]:self._offsets[slot + 1]]
+
+    def reverse_lookup(self, form: str) -> list:
+        """Return every (verb, tense, pronoun) whose surface form equals form."""
+        if self._sorted_slots is None:
+            slots = [slot for slot in range(len(self._offsets) - 1) if self._offsets[slot] != self._offsets[slot + 1]]
+            slots.sort(key=self._slot_key)
+            self._sorted_slots = array('I', slots)
+
+        sorted_slots = self._sorted_slots
+        low, high = 0, len(sorted_slots)
+        while low < high:
+            middle = (low + high) // 2
+            if self._slot_key(sorted_slots[middle]) < form:
+                low = middle + 1
+            else:
+                high = middle
+
+        matches = []
+        pronoun_count = len(self.pronouns)
+        tense_count = len(self.tenses)
+        while low < len(sorted_slots) and self._slot_key(sorted_slots[low]) == form:
+            cell, pronoun_idx = divmod(sorted_slots[low], pronoun_count)
+            verb_id, tense_id = divmod(cell, tense_count)
+            matches.append((self.verbs[verb_id], self.tenses[tense_id], self.pronouns[pronoun_idx]))
+            low += 1
+        return matches
+
+    def as_mapping(self):
+        """Return a read-only {verb: {tense: [forms]}} view over the table."""
+        return VerbsView(self)
+
+
+class VerbsView(Mapping):
+    """Read-only mapping of verb -> TensesView, compatible with the old nested VERBS dict."""
+
+    def __init__(self, table: ConjugationTable):
+        self.table = table
+
+    def __getitem__(self, verb):
+        verb_id = self.table.verb_id(verb)
+        if verb_id is None:
+            raise KeyError(verb)
+        return TensesView(self.table, verb_id)
+
+    def __iter__(self):
+        return iter(self.table.verbs)
+
+    def __len__(self):
+        return len(self.table.verbs)
+
+    def __contains__(self, verb):
+        return self.table.verb_id(verb) is not None
+
+
+class TensesView(Mapping):
+    """Read-only mapping of tense -> list of forms for one verb."""
+
+    def __init__(self, table: ConjugationTable, verb_id: int):
+        self.table = table
+        self.verb_id = verb_id
+
+    def __getitem__(self, tense):
+        tense_id = self.table.tense_id(tense)
+        if tense_id is None or not self.table.has(self.verb_id, tense_id):
+            raise KeyError(tense)
+        return self.table.forms(self.verb_id, tense_id)
+
+    def __iter__(self):
+        table = self.table
+        return (tense for tense_id, tense in enumerate(table.tenses) if table.has(self.verb_id, tense_id))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, tense):
+        tense_id = self.table.tense_id(tense)
+        return tense_id is not None and self.table.has(self.verb_id, tense_id)
@@ -1,329 +1,21 @@
 """
 Static data for Portuguese verb conjugations.
 """
+import os
+from functools import lru_cache
+from .config import VERB_CATALOGUE_PATH
+from .conjugation_engine import GeneratedVerbsView, rules_digest
+from .conjugation_table import ConjugationTable
+from .verb_catalogue import MappedCatalogue, catalogue_fingerprint
 
-VERBS = {
-    "falar": {
-        "presente": ["falo", "fala", "falamos", "falam"],
-        "preterito_perfeito": ["falei", "falou", "falamos", "falaram"],
-        "preterito_imperfeito": ["falava", "falava", "falávamos", "falavam"],
-        "subjuntivo_presente": ["fale", "fale", "falemos", "falem"],
-        "subjuntivo_preterito": ["falasse", "falasse", "falássemos", "falassem"],
-        "subjuntivo_futuro": ["falar", "falar", "falarmos", "falarem"]
-    },
-    "cantar": {
-        "presente": ["canto", "canta", "cantamos", "cantam"],
-        "preterito_perfeito": ["cantei", "cantou", "cantamos", "cantaram"],
-        "preterito_imperfeito": ["cantava", "cantava", "cantávamos", "cantavam"],
-        "subjuntivo_presente": ["cante", "cante", "cantemos", "cantem"],
-        "subjuntivo_preterito": ["cantasse", "cantasse", "cantássemos", "cantassem"],
-        "subjuntivo_futuro": ["cantar", "cantar", "cantarmos", "cantarem"]
-    },
-    "comprar": {
-        "presente": ["compro", "compra", "compramos", "compram"],
-        "preterito_perfeito": ["comprei", "comprou", "compramos", "compraram"],
-        "preterito_imperfeito": ["comprava", "comprava", "comprávamos", "compravam"],
-        "subjuntivo_presente": ["compre", "compre", "compremos", "comprem"],
-        "subjuntivo_preterito": ["comprasse", "comprasse", "comprássemos", "comprassem"],
-        "subjuntivo_futuro": ["comprar", "comprar", "comprarmos", "comprarem"]
-    },
-    "andar": {
-        "presente": ["ando", "anda", "andamos", "andam"],
-        "preterito_perfeito": ["andei", "andou", "andamos", "andaram"],
-        "preterito_imperfeito": ["andava", "andava", "andávamos", "andavam"],
-        "subjuntivo_presente": ["ande", "ande", "andemos", "andem"],
-        "subjuntivo_preterito": ["andasse", "andasse", "andássemos", "andassem"],
-        "subjuntivo_futuro": ["andar", "andar", "andarmos", "andarem"]
-    },
-    "comer": {
-        "presente": ["como", "come", "comemos", "comem"],
-        "preterito_perfeito": ["comi", "comeu", "comemos", "comeram"],
-        "preterito_imperfeito": ["comia", "comia", "comíamos", "comiam"],
-        "subjuntivo_presente": ["coma", "coma", "comamos", "comam"],
-        "subjuntivo_preterito": ["comesse", "comesse", "comêssemos", "comessem"],
-        "subjuntivo_futuro": ["comer", "comer", "comermos", "comerem"]
-    },
-    "beber": {
-        "presente": ["bebo", "bebe", "bebemos", "bebem"],
-        "preterito_perfeito": ["bebi", "bebeu", "bebemos", "beberam"],
-        "preterito_imperfeito": ["bebia", "bebia", "bebíamos", "bebiam"],
-        "subjuntivo_presente": ["beba", "beba", "bebamos", "bebam"],
-        "subjuntivo_preterito": ["bebesse", "bebesse", "bebêssemos", "bebessem"],
-        "subjuntivo_futuro": ["beber", "beber", "bebermos", "beberem"]
-    },
-    "vender": {
-        "presente": ["vendo", "vende", "vendemos", "vendem"],
-        "preterito_perfeito": ["vendi", "vendeu", "vendemos", "venderam"],
-        "preterito_imperfeito": ["vendia", "vendia", "vendíamos", "vendiam"],
-        "subjuntivo_presente": ["venda", "venda", "vendamos", "vendam"],
-        "subjuntivo_preterito": ["vendesse", "vendesse", "vendêssemos", "vendessem"],
-        "subjuntivo_futuro": ["vender", "vender", "vendermos", "venderem"]
-    },
-    "correr": {
-        "presente": ["corro", "corre", "corremos", "correm"],
-        "preterito_perfeito": ["corri", "correu", "corremos", "correram"],
-        "preterito_imperfeito": ["corria", "corria", "corríamos", "corriam"],
-        "subjuntivo_presente": ["corra", "corra", "corramos", "corram"],
-        "subjuntivo_preterito": ["corresse", "corresse", "corrêssemos", "corressem"],
-        "subjuntivo_futuro": ["correr", "correr", "corrermos", "correrem"]
-    },
-    "partir": {
-        "presente": ["parto", "parte", "partimos", "partem"],
-        "preterito_perfeito": ["parti", "partiu", "partimos", "partiram"],
-        "preterito_imperfeito": ["partia", "partia", "partíamos", "partiam"],
-        "subjuntivo_presente": ["parta", "parta", "partamos", "partam"],
-        "subjuntivo_preterito": ["partisse", "partisse", "partíssemos", "partissem"],
-        "subjuntivo_futuro": ["partir", "partir", "partirmos", "partirem"]
-    },
-    "abrir": {
-        "presente": ["abro", "abre", "abrimos", "abrem"],
-        "preterito_perfeito": ["abri", "abriu", "abrimos", "abriram"],
-        "preterito_imperfeito": ["abria", "abria", "abríamos", "abriam"],
-        "subjuntivo_presente": ["abra", "abra", "abramos", "abram"],
-        "subjuntivo_preterito": ["abrisse", "abrisse", "abríssemos", "abrissem"],
-        "subjuntivo_futuro": ["abrir", "abrir", "abrirmos", "abrirem"]
-    },
-    "ser": {
-        "presente": ["sou", "é", "somos", "são"],
-        "preterito_perfeito": ["fui", "foi", "fomos", "foram"],
-        "preterito_imperfeito": ["era", "era", "éramos", "eram"],
-        "subjuntivo_presente": ["seja", "seja", "sejamos", "sejam"],
-        "subjuntivo_preterito": ["fosse", "fosse", "fôssemos", "fossem"],
-        "subjuntivo_futuro": ["for", "for", "formos", "forem"]
-    },
-    "estar": {
-        "presente": ["estou", "está", "estamos", "estão"],
-        "preterito_perfeito": ["estive", "esteve", "estivemos", "estiveram"],
-        "preterito_imperfeito": ["estava", "estava", "estávamos", "estavam"],
-        "subjuntivo_presente": ["esteja", "esteja", "estejamos", "estejam"],
-        "subjuntivo_preterito": ["estivesse", "estivesse", "estivéssemos", "estivessem"],
-        "subjuntivo_futuro": ["estiver", "estiver", "estivermos", "estiverem"]
-    },
-    "ir": {
-        "presente": ["vou", "vai", "vamos", "vão"],
-        "preterito_perfeito": ["fui", "foi", "fomos", "foram"],
-        "preterito_imperfeito": ["ia", "ia", "íamos", "iam"],
-        "subjuntivo_presente": ["vá", "vá", "vamos", "vão"],
-        "subjuntivo_preterito": ["fosse", "fosse", "fôssemos", "fossem"],
-        "subjuntivo_futuro": ["for", "for", "formos", "forem"]
-    },
-    "ter": {
-        "presente": ["tenho", "tem", "temos", "têm"],
-        "preterito_perfeito": ["tive", "teve", "tivemos", "tiveram"],
-        "preterito_imperfeito": ["tinha", "tinha", "tínhamos", "tinham"],
-        "subjuntivo_presente": ["tenha", "tenha", "tenhamos", "tenham"],
-        "subjuntivo_preterito": ["tivesse", "tivesse", "tivéssemos", "tivessem"],
-        "subjuntivo_futuro": ["tiver", "tiver", "tivermos", "tiverem"]
-    },
-    "fazer": {
-        "presente": ["faço", "faz", "fazemos", "fazem"],
-        "preterito_perfeito": ["fiz", "fez", "fizemos", "fizeram"],
-        "preterito_imperfeito": ["fazia", "fazia", "fazíamos", "faziam"],
-        "subjuntivo_presente": ["faça", "faça", "façamos", "façam"],
-        "subjuntivo_preterito": ["fizesse", "fizesse", "fizéssemos", "fizessem"],
-        "subjuntivo_futuro": ["fizer", "fizer", "fizermos", "fizerem"]
-    },
-    "dizer": {
-        "presente": ["digo", "diz", "dizemos", "dizem"],
-        "preterito_perfeito": ["disse", "disse", "dissemos", "disseram"],
-        "preterito_imperfeito": ["dizia", "dizia", "dizíamos", "diziam"],
-        "subjuntivo_presente": ["diga", "diga", "digamos", "digam"],
-        "subjuntivo_preterito": ["dissesse", "dissesse", "disséssemos", "dissessem"],
-        "subjuntivo_futuro": ["disser", "disser", "dissermos", "disserem"]
-    },
-    "vir": {
-        "presente": ["venho", "vem", "vimos", "vêm"],
-        "preterito_perfeito": ["vim", "veio", "viemos", "vieram"],
-        "preterito_imperfeito": ["vinha", "vinha", "vínhamos", "vinham"],
-        "subjuntivo_presente": ["venha", "venha", "venhamos", "venham"],
-        "subjuntivo_preterito": ["viesse", "viesse", "viéssemos", "viessem"],
-        "subjuntivo_futuro": ["vier", "vier", "viermos", "vierem"]
-    },
-    "pôr": {
-        "presente": ["ponho", "põe", "pomos", "põem"],
-        "preterito_perfeito": ["pus", "pôs", "pusemos", "puseram"],
-        "preterito_imperfeito": ["punha", "punha", "púnhamos", "punham"],
-        "subjuntivo_presente": ["ponha", "ponha", "ponhamos", "ponham"],
-        "subjuntivo_preterito": ["pusesse", "pusesse", "puséssemos", "pusessem"],
-        "subjuntivo_futuro": ["puser", "puser", "pusermos", "puserem"]
-    },
-    "querer": {
-        "presente": ["quero", "quer", "queremos", "querem"],
-        "preterito_perfeito": ["quis", "quis", "quisemos", "quiseram"],
-        "preterito_imperfeito": ["queria", "queria", "queríamos", "queriam"],
-        "subjuntivo_presente": ["queira", "queira", "queiramos", "queiram"],
-        "subjuntivo_preterito": ["quisesse", "quisesse", "quiséssemos", "quisessem"],
-        "subjuntivo_futuro": ["quiser", "quiser", "quisermos", "quiserem"]
-    },
-    "saber": {
-        "presente": ["sei", "sabe", "sabemos", "sabem"],
-        "preterito_perfeito": ["soube", "soube", "soubemos", "souberam"],
-        "preterito_imperfeito": ["sabia", "sabia", "sabíamos", "sabiam"],
-        "subjuntivo_presente": ["saiba", "saiba", "saibamos", "saibam"],
-        "subjuntivo_preterito": ["soubesse", "soubesse", "soubéssemos", "soubessem"],
-        "subjuntivo_futuro": ["souber", "souber", "soubermos", "souberem"]
-    },
-    "poder": {
-        "presente": ["posso", "pode", "podemos", "podem"],
-        "preterito_perfeito": ["pude", "pôde", "pudemos", "puderam"],
-        "preterito_imperfeito": ["podia", "podia", "podíamos", "podiam"],
-        "subjuntivo_presente": ["possa", "possa", "possamos", "possam"],
-        "subjuntivo_preterito": ["pudesse", "pudesse", "pudéssemos", "pudessem"],
-        "subjuntivo_futuro": ["puder", "puder", "pudermos", "puderem"]
-    },
-    "dar": {
-        "presente": ["dou", "dá", "damos", "dão"],
-        "preterito_perfeito": ["dei", "deu", "demos", "deram"],
-        "preterito_imperfeito": ["dava", "dava", "dávamos", "davam"],
-        "subjuntivo_presente": ["dê", "dê", "demos", "deem"],
-        "subjuntivo_preterito": ["desse", "desse", "déssemos", "dessem"],
-        "subjuntivo_futuro": ["der", "der", "dermos", "derem"]
-    },
-    "sair": {
-        "presente": ["saio", "sai", "saímos", "saem"],
-        "preterito_perfeito": ["saí", "saiu", "saímos", "saíram"],
-        "preterito_imperfeito": ["saía", "saía", "saíamos", "saíam"],
-        "subjuntivo_presente": ["saia", "saia", "saiamos", "saiam"],
-        "subjuntivo_preterito": ["saísse", "saísse", "saíssemos", "saíssem"],
-        "subjuntivo_futuro": ["sair", "sair", "sairmos", "saírem"]
-    },
-    "trazer": {
-        "presente": ["trago", "traz", "trazemos", "trazem"],
-        "preterito_perfeito": ["trouxe", "trouxe", "trouxemos", "trouxeram"],
-        "preterito_imperfeito": ["trazia", "trazia", "trazíamos", "traziam"],
-        "subjuntivo_presente": ["traga", "traga", "tragamos", "tragam"],
-        "subjuntivo_preterito": ["trouxesse", "trouxesse", "trouxéssemos", "trouxessem"],
-        "subjuntivo_futuro": ["trouxer", "trouxer", "trouxermos", "trouxerem"]
-    },
-    "ler": {
-        "presente": ["leio", "lê", "lemos", "leem"],
-        "preterito_perfeito": ["li", "leu", "lemos", "leram"],
-        "preterito_imperfeito": ["lia", "lia", "líamos", "liam"],
-        "subjuntivo_presente": ["leia", "leia", "leiamos", "leiam"],
-        "subjuntivo_preterito": ["lesse", "lesse", "lêssemos", "lessem"],
-        "subjuntivo_futuro": ["ler", "ler", "lermos", "lerem"]
-    },
-    "ouvir": {
-        "presente": ["ouço", "ouve", "ouvimos", "ouvem"],
-        "preterito_perfeito": ["ouvi", "ouviu", "ouvimos", "ouviram"],
-        "preterito_imperfeito": ["ouvia", "ouvia", "ouvíamos", "ouviam"],
-        "subjuntivo_presente": ["ouça", "ouça", "ouçamos", "ouçam"],
-        "subjuntivo_preterito": ["ouvisse", "ouvisse", "ouvíssemos", "ouvissem"],
-        "subjuntivo_futuro": ["ouvir", "ouvir", "ouvirmos", "ouvirem"]
-    },
-    "dormir": {
-        "presente": ["durmo", "dorme", "dormimos", "dormem"],
-        "preterito_perfeito": ["dormi", "dormiu", "dormimos", "dormiram"],
-        "preterito_imperfeito": ["dormia", "dormia", "dormíamos", "dormiam"],
-        "subjuntivo_presente": ["durma", "durma", "durmamos", "durmam"],
-        "subjuntivo_preterito": ["dormisse", "dormisse", "dormíssemos", "dormissem"],
-        "subjuntivo_futuro": ["dormir", "dormir", "dormirmos", "dormirem"]
-    },
-    "sentir": {
-        "presente": ["sinto", "sente", "sentimos", "sentem"],
-        "preterito_perfeito": ["senti", "sentiu", "sentimos", "sentiram"],
-        "preterito_imperfeito": ["sentia", "sentia", "sentíamos", "sentiam"],
-        "subjuntivo_presente": ["sinta", "sinta", "sintamos", "sintam"],
-        "subjuntivo_preterito": ["sentisse", "sentisse", "sentíssemos", "sentissem"],
-        "subjuntivo_futuro": ["sentir", "sentir", "sentirmos", "sentirem"]
-    },
-    "pedir": {
-        "presente": ["peço", "pede", "pedimos", "pedem"],
-        "preterito_perfeito": ["pedi", "pediu", "pedimos", "pediram"],
-        "preterito_imperfeito": ["pedia", "pedia", "pedíamos", "pediam"],
-        "subjuntivo_presente": ["peça", "peça", "peçamos", "peçam"],
-        "subjuntivo_preterito": ["pedisse", "pedisse", "pedíssemos", "pedissem"],
-        "subjuntivo_futuro": ["pedir", "pedir", "pedirmos", "pedirem"]
-    },
-    "servir": {
-        "presente": ["sirvo", "serve", "servimos", "servem"],
-        "preterito_perfeito": ["servi", "serviu", "servimos", "serviram"],
-        "preterito_imperfeito": ["servia", "servia", "servíamos", "serviam"],
-        "subjuntivo_presente": ["sirva", "sirva", "sirvamos", "sirvam"],
-        "subjuntivo_preterito": ["servisse", "servisse", "servíssemos", "servissem"],
-        "subjuntivo_futuro": ["servir", "servir", "servirmos", "servirem"]
-    },
-    "conseguir": {
-        "presente": ["consigo", "consegue", "conseguimos", "conseguem"],
-        "preterito_perfeito": ["consegui", "conseguiu", "conseguimos", "conseguiram"],
-        "preterito_imperfeito": ["conseguia", "conseguia", "conseguíamos", "conseguiam"],
-        "subjuntivo_presente": ["consiga", "consiga", "consigamos", "consigam"],
-        "subjuntivo_preterito": ["conseguisse", "conseguisse", "conseguíssemos", "conseguissem"],
-        "subjuntivo_futuro": ["conseguir", "conseguir", "conseguirmos", "conseguirem"]
-    },
-    "preferir": {
-        "presente": ["prefiro", "prefere", "preferimos", "preferem"],
-        "preterito_perfeito": ["preferi", "preferiu", "preferimos", "preferiram"],
-        "preterito_imperfeito": ["preferia", "preferia", "preferíamos", "preferiam"],
-        "subjuntivo_presente": ["prefira", "prefira", "prefiramos", "prefiram"],
-        "subjuntivo_preterito": ["preferisse", "preferisse", "preferíssemos", "preferissem"],
-        "subjuntivo_futuro": ["preferir", "preferir", "preferirmos", "preferirem"]
-    },
-    "ver": {
-        "presente": ["vejo", "vê", "vemos", "veem"],
-        "preterito_perfeito": ["vi", "viu", "vimos", "viram"],
-        "preterito_imperfeito": ["via", "via", "víamos", "viam"],
-        "subjuntivo_presente": ["veja", "veja", "vejamos", "vejam"],
-        "subjuntivo_preterito": ["visse", "visse", "víssemos", "vissem"],
-        "subjuntivo_futuro": ["vir", "vir", "virmos", "virem"]
-    },
-    "haver": {
-        "presente": ["hei", "há", "havemos", "hão"],
-        "preterito_perfeito": ["houve", "houve", "houvemos", "houveram"],
-        "preterito_imperfeito": ["havia", "havia", "havíamos", "haviam"],
-        "subjuntivo_presente": ["haja", "haja", "hajamos", "hajam"],
-        "subjuntivo_preterito": ["houvesse", "houvesse", "houvéssemos", "houvessem"],
-        "subjuntivo_futuro": ["houver", "houver", "houvermos", "houverem"]
-    },
-    "caber": {
-        "presente": ["caibo", "cabe", "cabemos", "cabem"],
-        "preterito_perfeito": ["coube", "coube", "coubemos", "couberam"],
-        "preterito_imperfeito": ["cabia", "cabia", "cabíamos", "cabiam"],
-        "subjuntivo_presente": ["caiba", "caiba", "caibamos", "caibam"],
-        "subjuntivo_preterito": ["coubesse", "coubesse", "coubéssemos", "coubessem"],
-        "subjuntivo_futuro": ["couber", "couber", "coubermos", "couberem"]
-    },
-    "perder": {
-        "presente": ["perco", "perde", "perdemos", "perdem"],
-        "preterito_perfeito": ["perdi", "perdeu", "perdemos", "perderam"],
-        "preterito_imperfeito": ["perdia", "perdia", "perdíamos", "perdiam"],
-        "subjuntivo_presente": ["perca", "perca", "percamos", "percam"],
-        "subjuntivo_preterito": ["perdesse", "perdesse", "perdêssemos", "perdessem"],
-        "subjuntivo_futuro": ["perder", "perder", "perdermos", "perderem"]
-    },
-    "crer": {
-        "presente": ["creio", "crê", "cremos", "creem"],
-        "preterito_perfeito": ["cri", "creu", "cremos", "creram"],
-        "preterito_imperfeito": ["cria", "cria", "críamos", "criam"],
-        "subjuntivo_presente": ["creia", "creia", "creiamos", "creiam"],
-        "subjuntivo_preterito": ["cresse", "cresse", "crêssemos", "cressem"],
-        "subjuntivo_futuro": ["crer", "crer", "crermos", "crerem"]
-    },
-    "rir": {
-        "presente": ["rio", "ri", "rimos", "riem"],
-        "preterito_perfeito": ["ri", "riu", "rimos", "riram"],
-        "preterito_imperfeito": ["ria", "ria", "ríamos", "riam"],
-        "subjuntivo_presente": ["ria", "ria", "riamos", "riam"],
-        "subjuntivo_preterito": ["risse", "risse", "ríssemos", "rissem"],
-        "subjuntivo_futuro": ["rir", "rir", "rirmos", "rirem"]
-    },
-    "produzir": {
-        "presente": ["produzo", "produz", "produzimos", "produzem"],
-        "preterito_perfeito": ["produzi", "produziu", "produzimos", "produziram"],
-        "preterito_imperfeito": ["produzia", "produzia", "produzíamos", "produziam"],
-        "subjuntivo_presente": ["produza", "produza", "produzamos", "produzam"],
-        "subjuntivo_preterito": ["produzisse", "produzisse", "produzíssemos", "produzissem"],
-        "subjuntivo_futuro": ["produzir", "produzir", "produzirmos", "produzirem"]
-    },
-    "construir": {
-        "presente": ["construo", "constrói", "construímos", "constroem"],
-        "preterito_perfeito": ["construí", "construiu", "construímos", "construíram"],
-        "preterito_imperfeito": ["construía", "construía", "construíamos", "construíam"],
-        "subjuntivo_presente": ["construa", "construa", "construamos", "construam"],
-        "subjuntivo_preterito": ["construísse", "construísse", "construíssemos", "construíssem"],
-        "subjuntivo_futuro": ["construir", "construir", "construirmos", "construírem"]
-    }
-}
+# Verbs offered for practice. Forms come from conjugation_engine; irregular forms are
+# listed in conjugation_engine.IRREGULAR_FORMS.
+VERB_INFINITIVES = [
+    "falar", "cantar", "comprar", "andar", "comer", "beber", "vender", "correr", "partir", "abrir",
+    "ser", "estar", "ir", "ter", "fazer", "dizer", "vir", "pôr", "querer", "saber", "poder", "dar",
+    "sair", "trazer", "ler", "ouvir", "dormir", "sentir", "pedir", "servir", "conseguir",
+    "preferir", "ver", "haver", "caber", "perder", "crer", "rir", "produzir", "construir"
+]
 
 # Dictionary mapping tense keys to display names
 TENSE_NAMES = {
@@ -337,3 +29,46 @@ TENSE_NAMES = {
 
 # List of pronouns in order
 PRONOUNS = ["eu", "ele", "nós", "eles"]
+
+# Digest of the lists above and the conjugation engine's rules. A compiled catalogue and
+# packed session state are only valid for the forms they were built from; hashing the
+# inputs rather than the forms keeps import from generating the whole engine output.
+CATALOGUE_FINGERPRINT = catalogue_fingerprint(VERB_INFINITIVES, TENSE_NAMES, PRONOUNS, rules_digest())
+
+def _load_compiled_catalogue():
+    """Map the compiled catalogue if it exists and matches the lists above, else return None."""
+    if not os.path.exists(VERB_CATALOGUE_PATH):
+        return None
+    try:
+        catalogue = MappedCatalogue.open(VERB_CATALOGUE_PATH)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not load verb catalogue {VERB_CATALOGUE_PATH}: {e}. Using the conjugation engine.")
+        return None
+    if catalogue.fingerprint != CATALOGUE_FINGERPRINT:
+        print(f"WARNING: Verb catalogue {VERB_CATALOGUE_PATH} is out of date; rebuild it with `python -m src.verb_catalogue`. Using the conjugation engine.")
+        catalogue.close()
+        return None
+    return catalogue
+
+_CATALOGUE = _load_compiled_catalogue()
+
+# Read-only {verb: {tense: [forms]}} view. Backed by the memory-mapped catalogue when one has
+# been compiled (shared across worker processes), otherwise each verb-tense is generated by the
+# conjugation engine on first access. Either way import cost doesn't grow with the catalogue.
+if _CATALOGUE is not None:
+    VERBS = _CATALOGUE.as_mapping()
+else:
+    VERBS = GeneratedVerbsView(VERB_INFINITIVES, list(TENSE_NAMES))
+
+@lru_cache(maxsize=1)
+def get_conjugation_table():
+    """Return the compact, id-indexed store of every form, building it on first use if needed."""
+    if _CATALOGUE is not None:
+        return _CATALOGUE
+    return ConjugationTable.from_nested(VERBS, PRONOUNS, tenses=list(TENSE_NAMES))
+
+def __getattr__(name):
+    # CONJUGATIONS is built lazily so importing core_data stays cheap
+    if name == "CONJUGATIONS":
+        return get_conjugation_table()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,93 @@
+"""
+Bounded per-user cache for the nested dicts built by db_handler.load_results/load_preferences.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from src.config import USER_CACHE_MAX_USERS, USER_CACHE_TTL_SECONDS
+
+
+class UserDataCache:
+    """LRU cache with a TTL, keyed by (user_id, kind), e.g. (user_id, 'results')."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()  # (user_id, kind) -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: str, kind: str):
+        """Return a copy of the cached value, or None on a miss or expired entry."""
+        key = (user_id, kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Hand out a copy so callers can't mutate the cached structure
+            return copy.deepcopy(entry[1])
+
+    def set(self, user_id: str, kind: str, value):
+        """Store a copy of value, evicting the least recently used entries past max_entries."""
+        if self.max_entries <= 0:
+            return
+        key = (user_id, kind)
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def update(self, user_id: str, kind: str, apply):
+        """Write through: apply(value) mutates the cached value in place if it is present and fresh."""
+        key = (user_id, kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return
+            apply(entry[1])
+
+    def invalidate(self, user_id: str = None, kind: str = None):
+        """Drop cached entries for a user (optionally just one kind), or everything if user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if key[0] == user_id and (kind is None or key[1] == kind):
+                    del self._entries[key]
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+user_cache = UserDataCache(USER_CACHE_MAX_USERS, USER_CACHE_TTL_SECONDS)
@@ -1,118 +1,285 @@
-from src.config import supabase
-from src.core_data import VERBS # For initializing preferences
+import atexit
 
-from src.config import supabase
+from src.config import supabase, supabase_pool, STORAGE_BACKEND, SQLITE_DB_PATH
 from src.core_data import VERBS # For initializing preferences
+from src.data_access.cache import user_cache
+from src.data_access.storage import (SupabaseStorage, make_storage, encode_cursor, decode_cursor,
+                                     encode_offset_cursor, decode_offset_cursor)
+from src.data_access.write_queue import WriteBehindQueue, WriteQueueFull
 
 DEFAULT_USER_ID = "single_user" # Placeholder for single-user mode
 
-def load_results(user_id: str = DEFAULT_USER_ID):
-    """Load results from the Supabase 'results' table for a given user."""
+# Backend chosen by STORAGE_BACKEND. For "supabase" this stays None and get_storage() wraps
+# the module's supabase client, so swapping that client (as the tests do) takes effect.
+storage = make_storage(STORAGE_BACKEND, sqlite_path=SQLITE_DB_PATH) if STORAGE_BACKEND != "supabase" else None
+_supabase_storage = None
+
+# Write-behind queue for results, started by start_result_queue(); None writes synchronously
+result_queue = None
+
+def get_storage():
+    """Return the storage backend in use, or None if no database is configured."""
+    global _supabase_storage
+    if storage is not None:
+        return storage
     if supabase is None:
-        print("Supabase client not initialized. Cannot load results.")
+        return None
+    if _supabase_storage is None or _supabase_storage.client is not supabase:
+        _supabase_storage = SupabaseStorage(supabase)
+    return _supabase_storage
+
+def use_storage(backend):
+    """Switch to another storage backend (None falls back to Supabase) and drop cached user data."""
+    global storage
+    storage = backend
+    user_cache.invalidate()
+
+def load_results(user_id: str = DEFAULT_USER_ID):
+    """Load the latest result per verb/tense/pronoun from the 'latest_results' table."""
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot load results.")
         return {}
 
+    cached = user_cache.get(user_id, 'results')
+    if cached is not None:
+        return cached
+
     try:
-        response = supabase.table('results').select('*').eq('user_id', user_id).execute()
-        data = response.data
-        
-        # Transform flat list of results into nested dictionary structure,
-        # keeping only the latest result for each verb-tense-pronoun combination.
+        data = backend.latest_results(user_id)
+
+        # Transform flat list of results into nested dictionary structure
         # {verb_tense_key: {pronoun: {result_data}}}
-        
-        # Sort data by timestamp to easily pick the latest
-        data.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        
         results_dict = {}
-        processed_combinations = set() # To keep track of (verb_tense_key, pronoun) already processed
-
         for item in data:
             verb = item.get('verb')
             tense = item.get('tense')
             pronoun = item.get('pronoun')
-            
+
             if verb and tense and pronoun:
                 verb_tense_key = f"{verb}_{tense}"
-                combination_key = (verb_tense_key, pronoun)
-
-                # Only process if this combination hasn't been processed yet (meaning we found the latest)
-                if combination_key not in processed_combinations:
-                    if verb_tense_key not in results_dict:
-                        results_dict[verb_tense_key] = {}
-                    
-                    # Store relevant fields for the latest result
-                    results_dict[verb_tense_key][pronoun] = {
-                        "user_answer": item.get("user_answer"),
-                        "timestamp": item.get("timestamp"),
-                        "correct": item.get("is_correct")
-                    }
-                    processed_combinations.add(combination_key)
+                if verb_tense_key not in results_dict:
+                    results_dict[verb_tense_key] = {}
+
+                results_dict[verb_tense_key][pronoun] = {
+                    "user_answer": item.get("user_answer"),
+                    "timestamp": item.get("timestamp"),
+                    "correct": item.get("is_correct")
+                }
+        user_cache.set(user_id, 'results', results_dict)
         return results_dict
     except Exception as e:
-        print(f"Error loading results from Supabase: {e}")
+        print(f"Error loading results: {e}")
         return {}
 
 def save_result(result_data: dict, user_id: str = DEFAULT_USER_ID):
-    """Save a single exercise result to the Supabase 'results' table."""
-    if supabase is None:
-        print("Supabase client not initialized. Cannot save result.")
+    """Save a single exercise result to the 'results' table."""
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot save result.")
         return
 
     try:
         # Ensure user_id is set in the data being saved
         result_data['user_id'] = user_id
             
-        response = supabase.table('results').insert([result_data]).execute()
-        if response.data:
-            print(f"Result saved: {response.data}")
+        data = backend.insert_results([result_data])
+        if data:
+            print(f"Result saved: {data}")
+            _write_through_results([result_data], user_id)
         else:
-            print(f"Failed to save result: {response.error}")
+            print("Failed to save result: no rows returned")
+            user_cache.invalidate(user_id, 'results')
     except Exception as e:
-        print(f"Error saving result to Supabase: {e}")
+        print(f"Error saving result: {e}")
+        user_cache.invalidate(user_id, 'results')
+
+def save_results(rows: list, user_id: str = DEFAULT_USER_ID):
+    """Save several exercise results to the 'results' table in a single insert."""
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot save results.")
+        return
+
+    if not rows:
+        return
+
+    try:
+        # Ensure user_id is set on every row being saved
+        for row in rows:
+            row['user_id'] = user_id
+
+        if result_queue is not None:
+            try:
+                result_queue.enqueue(rows)
+                # Readers see the rows straight away; the queue gets them into the table
+                _write_through_results(rows, user_id)
+                return
+            except WriteQueueFull as e:
+                print(f"{e}; saving results synchronously.")
+
+        data = backend.insert_results(rows)
+        if data:
+            print(f"Results saved: {len(data)} rows")
+            _write_through_results(rows, user_id)
+        else:
+            print("Failed to save results: no rows returned")
+            user_cache.invalidate(user_id, 'results')
+    except Exception as e:
+        print(f"Error saving results: {e}")
+        user_cache.invalidate(user_id, 'results')
+
+def _insert_queued_results(rows: list):
+    """Write a batch from the result queue; raises on failure so the queue retries it."""
+    get_storage().insert_results_once(rows)
+
+def start_result_queue(journal_dir: str, **options):
+    """
+    Make save_results journal rows locally and return immediately, with a background thread
+    writing them to the database. Rows left by a previous run are replayed; pending rows are
+    drained at exit. Does nothing without a storage backend.
+    """
+    global result_queue
+    if get_storage() is None or result_queue is not None:
+        return result_queue
+    drain_timeout_seconds = options.pop('drain_timeout_seconds', 10.0)
+    result_queue = WriteBehindQueue(journal_dir, _insert_queued_results, **options)
+    result_queue.start()
+    atexit.register(drain_result_queue, drain_timeout_seconds)
+    return result_queue
+
+def start_configured_result_queue():
+    """Start the result queue if RESULT_WRITE_BEHIND is on and results go to Supabase; called by run.py."""
+    from src.config import (RESULT_WRITE_BEHIND, RESULT_JOURNAL_DIR, RESULT_QUEUE_BATCH_SIZE,
+                            RESULT_QUEUE_FLUSH_SECONDS, RESULT_QUEUE_MAX_PENDING, RESULT_QUEUE_DRAIN_SECONDS)
+    # A local SQLite write is already cheaper than journaling it
+    if not RESULT_WRITE_BEHIND or STORAGE_BACKEND != "supabase":
+        return None
+    return start_result_queue(RESULT_JOURNAL_DIR,
+                              batch_size=RESULT_QUEUE_BATCH_SIZE,
+                              flush_interval_seconds=RESULT_QUEUE_FLUSH_SECONDS,
+                              max_pending=RESULT_QUEUE_MAX_PENDING,
+                              drain_timeout_seconds=RESULT_QUEUE_DRAIN_SECONDS)
+
+def stop_result_queue(timeout_seconds: float = 10.0) -> int:
+    """Drain the result queue and go back to writing results synchronously; returns rows still unwritten."""
+    global result_queue
+    remaining = drain_result_queue(timeout_seconds)
+    result_queue = None
+    return remaining
+
+def drain_result_queue(timeout_seconds: float = 10.0) -> int:
+    """Write every queued result now; returns how many rows are still unwritten."""
+    if result_queue is None:
+        return 0
+    remaining = result_queue.drain(timeout_seconds)
+    if remaining:
+        print(f"{remaining} queued results not yet written; they stay journaled for the next start.")
+    return remaining
+
+def _write_through_results(rows: list, user_id: str):
+    """Apply freshly saved result rows to the user's cached results, if any."""
+    def apply(results_dict):
+        for row in rows:
+            verb_tense_key = f"{row.get('verb')}_{row.get('tense')}"
+            results_dict.setdefault(verb_tense_key, {})[row.get('pronoun')] = {
+                "user_answer": row.get("user_answer"),
+                "timestamp": row.get("timestamp"),
+                "correct": row.get("is_correct")
+            }
+    user_cache.update(user_id, 'results', apply)
 
 def load_sentences(user_id: str = DEFAULT_USER_ID):
-    """Load recorded sentences from the Supabase 'sentences' table for a given user."""
-    if supabase is None:
-        print("Supabase client not initialized. Cannot load sentences.")
+    """Load recorded sentences from the 'sentences' table for a given user."""
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot load sentences.")
         return []
 
     try:
-        response = supabase.table('sentences').select('*').eq('user_id', user_id).execute()
-        return response.data
+        return backend.sentences(user_id)
     except Exception as e:
-        print(f"Error loading sentences from Supabase: {e}")
+        print(f"Error loading sentences: {e}")
         return []
 
+def load_sentence_page(user_id: str = DEFAULT_USER_ID, limit: int = 20, cursor: str = None, verb: str = None,
+                       tense: str = None, is_correct: bool = None):
+    """
+    One page of a user's sentences, newest first, as (sentences, next_cursor). next_cursor
+    is None on the last page. Raises ValueError for a cursor that load_sentence_page didn't hand out.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot load sentences.")
+        return [], None
+
+    try:
+        # One extra row tells whether another page follows
+        rows = backend.sentence_page(user_id, limit + 1, after=after, verb=verb, tense=tense, is_correct=is_correct)
+    except Exception as e:
+        print(f"Error loading sentences: {e}")
+        return [], None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+def search_sentences(query: str, user_id: str = DEFAULT_USER_ID, limit: int = 20, cursor: str = None):
+    """
+    One page of a user's sentences matching query, best match first, as (sentences, next_cursor).
+    Each row carries its 'rank'. Raises ValueError for a cursor that search_sentences didn't hand out.
+    """
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot search sentences.")
+        return [], None
+
+    try:
+        rows = backend.search_sentences(user_id, query, limit + 1, offset)
+    except Exception as e:
+        print(f"Error searching sentences: {e}")
+        return [], None
+    if len(rows) > limit:
+        return rows[:limit], encode_offset_cursor(offset + limit)
+    return rows, None
+
 def save_sentence(sentence_data: dict, user_id: str = DEFAULT_USER_ID):
-    """Save a single recorded sentence to the Supabase 'sentences' table."""
-    if supabase is None:
-        print("Supabase client not initialized. Cannot save sentence.")
+    """Save a single recorded sentence to the 'sentences' table."""
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot save sentence.")
         return
 
     try:
         # Ensure user_id is set in the data being saved
         sentence_data['user_id'] = user_id
             
-        response = supabase.table('sentences').insert([sentence_data]).execute()
-        if response.data:
-            print(f"Sentence saved: {response.data}")
+        data = backend.insert_sentence(sentence_data)
+        if data:
+            print(f"Sentence saved: {data}")
         else:
-            print(f"Failed to save sentence: {response.error}")
+            print("Failed to save sentence: no rows returned")
     except Exception as e:
-        print(f"Error saving sentence to Supabase: {e}")
+        print(f"Error saving sentence: {e}")
 
 def load_preferences(user_id: str = DEFAULT_USER_ID):
-    """Load preferences from the Supabase 'preferences' table for a given user."""
-    if supabase is None:
-        print("Supabase client not initialized. Cannot load preferences.")
-        # If Supabase is not initialized, return default preferences
+    """Load preferences from the 'preferences' table for a given user."""
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot load preferences.")
+        # Without a database, return default preferences
         return {verb: {tense: {"never_show": False, "always_show": False, "show_primarily": False}
                              for tense in VERBS[verb]}
                       for verb in VERBS}
 
+    cached = user_cache.get(user_id, 'preferences')
+    if cached is not None:
+        return cached
+
     try:
-        response = supabase.table('preferences').select('*').eq('user_id', user_id).execute()
-        data = response.data
+        data = backend.preferences(user_id)
         
         # Transform flat list of preferences into nested dictionary structure
         # {verb: {tense: {never_show: bool, always_show: bool, show_primarily: bool}}}
@@ -148,9 +315,10 @@ def load_preferences(user_id: str = DEFAULT_USER_ID):
                         if key not in preferences_dict[verb][tense]:
                             preferences_dict[verb][tense][key] = value
 
+        user_cache.set(user_id, 'preferences', preferences_dict)
         return preferences_dict
     except Exception as e:
-        print(f"Error loading preferences from Supabase: {e}")
+        print(f"Error loading preferences: {e}")
         # Fallback to default preferences if there's an error
         preferences = {verb: {tense: {"never_show": False, "always_show": False, "show_primarily": False}
                              for tense in VERBS[verb]}
@@ -158,19 +326,43 @@ def load_preferences(user_id: str = DEFAULT_USER_ID):
         return preferences
 
 def save_preference(preference_data: dict, user_id: str = DEFAULT_USER_ID):
-    """Save a single preference entry to the Supabase 'preferences' table using upsert."""
-    if supabase is None:
-        print("Supabase client not initialized. Cannot save preference.")
+    """Save a single preference entry to the 'preferences' table using upsert."""
+    backend = get_storage()
+    if backend is None:
+        print("No database configured. Cannot save preference.")
         return
 
     try:
         # Ensure user_id is set in the data being saved
         preference_data['user_id'] = user_id
             
-        response = supabase.table('preferences').upsert(preference_data, on_conflict='user_id,verb,tense').execute()
-        if response.data:
-            print(f"Preference saved/updated: {response.data}")
+        data = backend.upsert_preference(preference_data)
+        if data:
+            print(f"Preference saved/updated: {data}")
+            _write_through_preference(preference_data, user_id)
         else:
-            print(f"Failed to save/update preference: {response.error}")
+            print("Failed to save/update preference: no rows returned")
+            user_cache.invalidate(user_id, 'preferences')
     except Exception as e:
-        print(f"Error saving preference to Supabase: {e}")
+        print(f"Error saving preference: {e}")
+        user_cache.invalidate(user_id, 'preferences')
+
+def _write_through_preference(preference_data: dict, user_id: str):
+    """Apply a freshly saved preference to the user's cached preferences, if any."""
+    def apply(preferences_dict):
+        prefs = preferences_dict.setdefault(preference_data.get('verb'), {}).setdefault(preference_data.get('tense'), {})
+        for key in ("never_show", "always_show", "show_primarily"):
+            prefs[key] = preference_data.get(key, False)
+    user_cache.update(user_id, 'preferences', apply)
+
+def get_cache_stats():
+    """Return hit/miss counters for the per-user results/preferences cache."""
+    return user_cache.stats()
+
+def get_result_queue_stats():
+    """Return pending/flushed/failure counters of the result write queue, or None if it isn't running."""
+    return result_queue.stats() if result_queue is not None else None
+
+def get_pool_stats():
+    """Return connection-pool counters (in flight, peak, saturated requests) of the Supabase HTTP client, or None."""
+    return supabase_pool.stats() if supabase_pool is not None else None
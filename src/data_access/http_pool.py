@@ -0,0 +1,115 @@
+"""
+Shared, pooled HTTP client for the Supabase client.
+
+supabase-py otherwise builds httpx clients with default limits, and under concurrent load
+connection setup (TCP + TLS) dominates short PostgREST queries. create_supabase_client()
+gives every part of the client one thread-safe httpx.Client with an explicit connection
+pool, keep-alive, HTTP/2 when the h2 package is installed, and separate connect/read
+timeouts. Its transport counts requests in flight so pool saturation can be watched:
+requests that started while every pooled connection was busy had to queue for one.
+"""
+import importlib.util
+import threading
+import time
+
+import httpx
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class PoolMetricsTransport(httpx.HTTPTransport):
+    """httpx transport that records in-flight requests against the pool's max_connections."""
+
+    def __init__(self, max_connections: int, max_keepalive_connections: int, keepalive_expiry: float,
+                 http2: bool = False, clock=time.perf_counter, **kwargs):
+        super().__init__(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections,
+                                keepalive_expiry=keepalive_expiry),
+            http2=http2,
+            **kwargs,
+        )
+        self.max_connections = max_connections
+        self.http2 = http2
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.saturated_requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+            if self.in_flight >= self.max_connections:
+                self.saturated_requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = self._clock()
+        try:
+            return super().handle_request(request)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.total_seconds += self._clock() - started
+
+    def open_connections(self) -> int:
+        # httpcore's pool isn't part of httpx's public API; report 0 if its shape changes
+        connections = getattr(getattr(self, "_pool", None), "connections", None)
+        return len(connections) if connections is not None else 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_connections": self.max_connections,
+                "http2": self.http2,
+                "open_connections": self.open_connections(),
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "requests": self.requests,
+                "saturated_requests": self.saturated_requests,
+                "saturation_rate": self.saturated_requests / self.requests if self.requests else 0.0,
+                "errors": self.errors,
+                "mean_request_seconds": self.total_seconds / self.requests if self.requests else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.peak_in_flight = self.in_flight
+            self.requests = 0
+            self.saturated_requests = 0
+            self.errors = 0
+            self.total_seconds = 0.0
+
+
+def create_pool(max_connections: int = 20, max_keepalive_connections: int = 10, keepalive_expiry: float = 30.0,
+                http2: bool = True) -> PoolMetricsTransport:
+    """Pooled transport; HTTP/2 is used only if it was asked for and h2 is installed."""
+    return PoolMetricsTransport(max_connections, max_keepalive_connections, keepalive_expiry,
+                                http2=http2 and http2_available())
+
+
+def create_http_client(pool: PoolMetricsTransport, connect_timeout: float = 5.0, read_timeout: float = 15.0) -> httpx.Client:
+    # Waiting for a free pooled connection is bounded like a read
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout, pool=read_timeout)
+    return httpx.Client(transport=pool, timeout=timeout)
+
+
+def create_supabase_client(url: str, key: str, http_client: httpx.Client):
+    """Supabase client whose PostgREST, auth, storage and functions calls all share http_client."""
+    from supabase import create_client
+    from supabase.lib.client_options import SyncClientOptions
+
+    client = create_client(url, key, options=SyncClientOptions(httpx_client=http_client))
+    # supabase-py builds its PostgREST client lazily without a lock; build it now, before
+    # request threads race to create (and pool) one each
+    client.postgrest
+    return client
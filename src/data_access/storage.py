@@ -0,0 +1,373 @@
+"""
+Storage backends behind db_handler.
+
+db_handler owns caching, defaults and error reporting; a backend only moves rows in and
+out and raises when it can't. STORAGE_BACKEND picks one:
+
+    supabase    the hosted Postgres tables in supabase/migrations (default)
+    sqlite      a local SQLite file with the same tables, indexes and latest_results
+                trigger, for single-node deployments and offline benchmarks of the data path
+
+Backends return rows as plain dicts with the columns of the Supabase tables.
+"""
+import base64
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+
+RESULT_COLUMNS = ("id", "user_id", "verb", "tense", "pronoun", "user_answer", "is_correct", "timestamp", "idempotency_key")
+SENTENCE_COLUMNS = ("id", "user_id", "verb", "tense", "pronoun", "correct_form", "sentence", "is_correct", "timestamp")
+PREFERENCE_COLUMNS = ("id", "user_id", "verb", "tense", "never_show", "always_show", "show_primarily")
+
+
+def _pack(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _unpack(cursor: str):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Invalid page cursor {cursor!r}") from error
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque page cursor for the page that continues after row (ordered by timestamp desc, id desc)."""
+    return _pack([row["timestamp"], row["id"]])
+
+
+# ISO-8601 as Postgres and the SQLite schema write it; nothing else may reach a query filter
+_CURSOR_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,9})?(Z|[+-]\d{2}(:?\d{2})?)?")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(timestamp, id) from encode_cursor(); raises ValueError unless they are an ISO-8601 timestamp and a UUID."""
+    value = _unpack(cursor)
+    if not (isinstance(value, list) and len(value) == 2 and all(isinstance(part, str) for part in value)):
+        raise ValueError(f"Invalid page cursor {cursor!r}")
+    timestamp, row_id = value
+    if not _CURSOR_TIMESTAMP.fullmatch(timestamp):
+        raise ValueError(f"Invalid page cursor {cursor!r}")
+    try:
+        row_id = str(uuid.UUID(row_id))
+    except ValueError as error:
+        raise ValueError(f"Invalid page cursor {cursor!r}") from error
+    return timestamp, row_id
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Opaque cursor for ranked search results, which are paged by position rather than by key."""
+    return _pack({"offset": offset})
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    value = _unpack(cursor)
+    offset = value.get("offset") if isinstance(value, dict) else None
+    if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+        raise ValueError(f"Invalid page cursor {cursor!r}")
+    return offset
+
+
+def fts5_query(text: str) -> str:
+    """
+    FTS5 MATCH expression for free text: every word must appear. Words are quoted, so
+    operators and punctuation the user typed can't make the query invalid.
+    """
+    return " ".join('"' + word + '"' for word in re.findall(r"\w+", text))
+
+
+class SupabaseStorage:
+    """Tables on Supabase through the supabase-py client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def latest_results(self, user_id: str) -> list:
+        # 'latest_results' is kept current by a trigger on 'results', so it already
+        # holds exactly one row per (verb, tense, pronoun) no matter how long the history is.
+        return self.client.table('latest_results').select('*').eq('user_id', user_id).execute().data
+
+    def insert_results(self, rows: list) -> list:
+        return self.client.table('results').insert(rows).execute().data
+
+    def insert_results_once(self, rows: list):
+        # Rows that already made it in (a retry after a lost response) conflict on their key and are skipped
+        self.client.table('results').upsert(rows, on_conflict='idempotency_key', ignore_duplicates=True).execute()
+
+    def sentences(self, user_id: str) -> list:
+        return self.client.table('sentences').select('*').eq('user_id', user_id).execute().data
+
+    def sentence_page(self, user_id: str, limit: int, after: tuple = None, verb: str = None, tense: str = None,
+                      is_correct: bool = None) -> list:
+        # Keyset pagination on the (user_id, timestamp desc, id desc) index: the page starts
+        # right after the cursor row instead of skipping an OFFSET's worth of rows
+        query = self.client.table('sentences').select('*').eq('user_id', user_id)
+        if verb:
+            query = query.eq('verb', verb)
+        if tense:
+            query = query.eq('tense', tense)
+        if is_correct is not None:
+            query = query.eq('is_correct', 'true' if is_correct else 'false')
+        if after is not None:
+            timestamp, row_id = after
+            query = query.or_(f'timestamp.lt."{timestamp}",and(timestamp.eq."{timestamp}",id.lt."{row_id}")')
+        return query.order('timestamp', desc=True).order('id', desc=True).limit(limit).execute().data
+
+    def search_sentences(self, user_id: str, query: str, limit: int, offset: int = 0) -> list:
+        # Ranked by ts_rank in the search_sentences function, over the GIN-indexed 'search' column
+        return self.client.rpc('search_sentences', {'p_user_id': user_id, 'p_query': query,
+                                                    'p_limit': limit, 'p_offset': offset}).execute().data
+
+    def insert_sentence(self, row: dict) -> list:
+        return self.client.table('sentences').insert([row]).execute().data
+
+    def preferences(self, user_id: str) -> list:
+        return self.client.table('preferences').select('*').eq('user_id', user_id).execute().data
+
+    def upsert_preference(self, row: dict) -> list:
+        return self.client.table('preferences').upsert(row, on_conflict='user_id,verb,tense').execute().data
+
+
+# Mirrors supabase/migrations for the tables db_handler uses (the unused verbs and
+# verb_preferences tables are left out). Booleans are 0/1 and timestamps ISO-8601 text.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    verb TEXT NOT NULL,
+    tense TEXT NOT NULL,
+    pronoun TEXT NOT NULL,
+    user_answer TEXT,
+    is_correct INTEGER,
+    timestamp TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    idempotency_key TEXT
+);
+CREATE INDEX IF NOT EXISTS results_user_verb_tense_pronoun_timestamp_idx
+    ON results (user_id, verb, tense, pronoun, timestamp DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS results_idempotency_key_idx ON results (idempotency_key);
+
+CREATE TABLE IF NOT EXISTS latest_results (
+    user_id TEXT NOT NULL,
+    verb TEXT NOT NULL,
+    tense TEXT NOT NULL,
+    pronoun TEXT NOT NULL,
+    result_id TEXT REFERENCES results(id) ON DELETE SET NULL,
+    user_answer TEXT,
+    is_correct INTEGER,
+    timestamp TEXT,
+    PRIMARY KEY (user_id, verb, tense, pronoun)
+);
+
+CREATE TRIGGER IF NOT EXISTS results_upsert_latest_result
+AFTER INSERT ON results
+FOR EACH ROW
+BEGIN
+    INSERT INTO latest_results (user_id, verb, tense, pronoun, result_id, user_answer, is_correct, timestamp)
+    VALUES (NEW.user_id, NEW.verb, NEW.tense, NEW.pronoun, NEW.id, NEW.user_answer, NEW.is_correct, NEW.timestamp)
+    ON CONFLICT (user_id, verb, tense, pronoun) DO UPDATE
+    SET result_id = excluded.result_id,
+        user_answer = excluded.user_answer,
+        is_correct = excluded.is_correct,
+        timestamp = excluded.timestamp
+    WHERE latest_results.timestamp IS NULL
+       OR excluded.timestamp >= latest_results.timestamp;
+END;
+
+CREATE TABLE IF NOT EXISTS sentences (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    verb TEXT NOT NULL,
+    tense TEXT NOT NULL,
+    pronoun TEXT NOT NULL,
+    correct_form TEXT NOT NULL,
+    sentence TEXT NOT NULL,
+    is_correct INTEGER,
+    timestamp TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+DROP INDEX IF EXISTS sentences_user_id_idx;
+CREATE INDEX IF NOT EXISTS sentences_user_timestamp_id_idx ON sentences (user_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS sentences_user_verb_tense_timestamp_id_idx
+    ON sentences (user_id, verb, tense, timestamp DESC, id DESC);
+
+-- Full-text index over sentences, kept in step by triggers. SQLite has no Portuguese
+-- stemmer, so unlike Postgres' 'portuguese' config this matches whole words, but it
+-- ignores accents ("voce" finds "você").
+CREATE VIRTUAL TABLE IF NOT EXISTS sentences_fts USING fts5(
+    sentence, verb, correct_form,
+    content='sentences', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS sentences_fts_insert AFTER INSERT ON sentences BEGIN
+    INSERT INTO sentences_fts (rowid, sentence, verb, correct_form)
+    VALUES (NEW.rowid, NEW.sentence, NEW.verb, NEW.correct_form);
+END;
+CREATE TRIGGER IF NOT EXISTS sentences_fts_delete AFTER DELETE ON sentences BEGIN
+    INSERT INTO sentences_fts (sentences_fts, rowid, sentence, verb, correct_form)
+    VALUES ('delete', OLD.rowid, OLD.sentence, OLD.verb, OLD.correct_form);
+END;
+CREATE TRIGGER IF NOT EXISTS sentences_fts_update AFTER UPDATE ON sentences BEGIN
+    INSERT INTO sentences_fts (sentences_fts, rowid, sentence, verb, correct_form)
+    VALUES ('delete', OLD.rowid, OLD.sentence, OLD.verb, OLD.correct_form);
+    INSERT INTO sentences_fts (rowid, sentence, verb, correct_form)
+    VALUES (NEW.rowid, NEW.sentence, NEW.verb, NEW.correct_form);
+END;
+
+CREATE TABLE IF NOT EXISTS preferences (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    verb TEXT NOT NULL,
+    tense TEXT NOT NULL,
+    never_show INTEGER NOT NULL DEFAULT 0,
+    always_show INTEGER NOT NULL DEFAULT 0,
+    show_primarily INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (user_id, verb, tense)
+);
+"""
+
+_BOOLEAN_COLUMNS = ("is_correct", "never_show", "always_show", "show_primarily")
+
+# Statements are constant strings so each connection's statement cache keeps them compiled
+_SELECT_LATEST_RESULTS = ("SELECT user_id, verb, tense, pronoun, result_id, user_answer, is_correct, timestamp "
+                          "FROM latest_results WHERE user_id = ?")
+_INSERT_RESULT = ("INSERT INTO results (id, user_id, verb, tense, pronoun, user_answer, is_correct, timestamp, idempotency_key) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now')), ?)")
+_INSERT_RESULT_ONCE = _INSERT_RESULT.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+_SELECT_SENTENCES = f"SELECT {', '.join(SENTENCE_COLUMNS)} FROM sentences WHERE user_id = ?"
+_SENTENCE_PAGE_FILTERS = {"verb": " AND verb = ?", "tense": " AND tense = ?", "is_correct": " AND is_correct = ?"}
+_SENTENCE_PAGE_AFTER = " AND (timestamp, id) < (?, ?)"
+_SENTENCE_PAGE_ORDER = " ORDER BY timestamp DESC, id DESC LIMIT ?"
+# bm25 is lower for better matches; weights follow the Postgres setweight A/B split
+_SEARCH_SENTENCES = ("SELECT " + ", ".join("s." + column for column in SENTENCE_COLUMNS) + ", "
+                     "-bm25(sentences_fts, 4.0, 1.0, 1.0) AS rank "
+                     "FROM sentences_fts JOIN sentences s ON s.rowid = sentences_fts.rowid "
+                     "WHERE sentences_fts MATCH ? AND s.user_id = ? "
+                     "ORDER BY rank DESC, s.timestamp DESC, s.id DESC LIMIT ? OFFSET ?")
+_INSERT_SENTENCE = ("INSERT INTO sentences (id, user_id, verb, tense, pronoun, correct_form, sentence, is_correct, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now')))")
+_SELECT_PREFERENCES = f"SELECT {', '.join(PREFERENCE_COLUMNS)} FROM preferences WHERE user_id = ?"
+_UPSERT_PREFERENCE = ("INSERT INTO preferences (id, user_id, verb, tense, never_show, always_show, show_primarily) "
+                      "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                      "ON CONFLICT (user_id, verb, tense) DO UPDATE SET never_show = excluded.never_show, "
+                      "always_show = excluded.always_show, show_primarily = excluded.show_primarily")
+_SELECT_PREFERENCE = f"SELECT {', '.join(PREFERENCE_COLUMNS)} FROM preferences WHERE user_id = ? AND verb = ? AND tense = ?"
+
+
+def _row_dict(cursor, row) -> dict:
+    record = {description[0]: value for description, value in zip(cursor.description, row)}
+    for column in _BOOLEAN_COLUMNS:
+        if record.get(column) is not None:
+            record[column] = bool(record[column])
+    return record
+
+
+class SqliteStorage:
+    """The same tables in a local SQLite file (WAL mode, one connection per thread)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local() # sqlite3 connections can't be shared across threads
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _db(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, cached_statements=64)
+            connection.row_factory = _row_dict
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    had_fts = connection.execute(
+                        "SELECT 1 FROM sqlite_master WHERE name = 'sentences_fts'").fetchone() is not None
+                    connection.executescript(SQLITE_SCHEMA)
+                    if not had_fts:
+                        # Index sentences stored before the search index existed
+                        connection.execute("INSERT INTO sentences_fts (sentences_fts) VALUES ('rebuild')")
+                    self._schema_ready = True
+            self._local.connection = connection
+        return connection
+
+    def latest_results(self, user_id: str) -> list:
+        return self._db().execute(_SELECT_LATEST_RESULTS, (user_id,)).fetchall()
+
+    @staticmethod
+    def _result_params(rows: list) -> list:
+        return [(row.get("id") or str(uuid.uuid4()), row.get("user_id"), row.get("verb"), row.get("tense"),
+                 row.get("pronoun"), row.get("user_answer"), row.get("is_correct"), row.get("timestamp"),
+                 row.get("idempotency_key")) for row in rows]
+
+    def _insert_many(self, statement: str, params: list):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(statement, params)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def insert_results(self, rows: list) -> list:
+        params = self._result_params(rows)
+        self._insert_many(_INSERT_RESULT, params)
+        return [dict(zip(RESULT_COLUMNS, values)) for values in params]
+
+    def insert_results_once(self, rows: list):
+        self._insert_many(_INSERT_RESULT_ONCE, self._result_params(rows))
+
+    def sentences(self, user_id: str) -> list:
+        return self._db().execute(_SELECT_SENTENCES, (user_id,)).fetchall()
+
+    def sentence_page(self, user_id: str, limit: int, after: tuple = None, verb: str = None, tense: str = None,
+                      is_correct: bool = None) -> list:
+        # Built from constant fragments, so there are only a few distinct statements to cache
+        statement = _SELECT_SENTENCES
+        params = [user_id]
+        for column, value in (("verb", verb), ("tense", tense), ("is_correct", is_correct)):
+            if value is not None and value != "":
+                statement += _SENTENCE_PAGE_FILTERS[column]
+                params.append(value)
+        if after is not None:
+            statement += _SENTENCE_PAGE_AFTER
+            params.extend(after)
+        statement += _SENTENCE_PAGE_ORDER
+        params.append(limit)
+        return self._db().execute(statement, params).fetchall()
+
+    def search_sentences(self, user_id: str, query: str, limit: int, offset: int = 0) -> list:
+        match = fts5_query(query)
+        if not match:
+            return []
+        return self._db().execute(_SEARCH_SENTENCES, (match, user_id, limit, offset)).fetchall()
+
+    def insert_sentence(self, row: dict) -> list:
+        params = (row.get("id") or str(uuid.uuid4()), row.get("user_id"), row.get("verb"), row.get("tense"),
+                  row.get("pronoun"), row.get("correct_form"), row.get("sentence"), row.get("is_correct"),
+                  row.get("timestamp"))
+        self._db().execute(_INSERT_SENTENCE, params)
+        return [dict(zip(SENTENCE_COLUMNS, params))]
+
+    def preferences(self, user_id: str) -> list:
+        return self._db().execute(_SELECT_PREFERENCES, (user_id,)).fetchall()
+
+    def upsert_preference(self, row: dict) -> list:
+        db = self._db()
+        db.execute(_UPSERT_PREFERENCE, (str(uuid.uuid4()), row.get("user_id"), row.get("verb"), row.get("tense"),
+                                        bool(row.get("never_show")), bool(row.get("always_show")),
+                                        bool(row.get("show_primarily"))))
+        return db.execute(_SELECT_PREFERENCE, (row.get("user_id"), row.get("verb"), row.get("tense"))).fetchall()
+
+
+def make_storage(backend: str, supabase_client=None, sqlite_path: str = None):
+    """Storage for STORAGE_BACKEND ("supabase" or "sqlite"); None when Supabase isn't configured."""
+    if backend == "sqlite":
+        return SqliteStorage(sqlite_path)
+    if backend == "supabase":
+        return SupabaseStorage(supabase_client) if supabase_client is not None else None
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; expected 'supabase' or 'sqlite'")
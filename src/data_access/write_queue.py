@@ -0,0 +1,265 @@
+"""
+Durable write-behind queue for result rows.
+
+enqueue() appends the rows to a local append-only journal (one JSON object per line,
+fsynced) and returns; a background thread writes them to the database in batches,
+retrying with backoff until they succeed, then appends an ack line. Every row carries an
+idempotency key, so a batch that is written twice (a crash between the write and its
+ack, or a retry after a write that actually succeeded) lands once.
+
+Each process journals to its own file in journal_dir (results-<pid>.journal). On start,
+journals left behind by processes that are no longer running are adopted and replayed,
+so rows survive crashes and restarts. enqueue() blocks when max_pending rows are waiting
+and raises WriteQueueFull after backpressure_timeout; drain() flushes what is left on
+shutdown.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+_JOURNAL_NAME = re.compile(r"^results-(\d+)\.journal$")
+
+
+class WriteQueueFull(RuntimeError):
+    """Too many rows are waiting to be written; the caller should write synchronously or fail."""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_journal(path: str) -> dict:
+    """Entries of a journal that were never acked, as {key: row} in journal order."""
+    pending = {}
+    try:
+        with open(path, "r", encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue # a torn last line from a crash mid-append
+                if "ack" in entry:
+                    for key in entry["ack"]:
+                        pending.pop(key, None)
+                else:
+                    pending[entry["k"]] = entry["r"]
+    except FileNotFoundError:
+        pass
+    return pending
+
+
+class WriteBehindQueue:
+    """Journal rows locally, write them to the database in the background with write_batch(rows)."""
+
+    def __init__(self, journal_dir: str, write_batch, batch_size: int = 200, flush_interval_seconds: float = 0.5,
+                 max_pending: int = 10000, backpressure_timeout_seconds: float = 5.0, fsync: bool = True,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0, compact_bytes: int = 1 << 20,
+                 key_field: str = "idempotency_key", clock=time.monotonic):
+        self.journal_dir = journal_dir
+        self._write_batch = write_batch # must raise if the rows weren't written
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self.backpressure_timeout_seconds = backpressure_timeout_seconds
+        self.fsync = fsync
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.compact_bytes = compact_bytes
+        self.key_field = key_field
+        self._clock = clock
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock) # rows added, rows written, or stopping
+        self._pending = {} # key -> row, in enqueue order
+        self._enqueued_at = {} # key -> clock() when journaled
+        self._journal = None
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self.flushed = 0
+        self.failed_attempts = 0
+        self.last_error = None
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.journal_dir, f"results-{os.getpid()}.journal")
+
+    def _append(self, entries: list):
+        self._journal.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _ensure_started(self):
+        """Open this process's journal and start the flusher (again in a forked worker). Call with the lock held."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        # A forked child inherits the parent's pending rows, but they are the parent's to write
+        self._pending, self._enqueued_at = {}, {}
+        self._stopping = False
+        os.makedirs(self.journal_dir, exist_ok=True)
+        own_path = self.journal_path
+        recovered = read_journal(own_path) # left by an earlier process that had our pid
+        adopted = []
+        for name in sorted(os.listdir(self.journal_dir)):
+            match = _JOURNAL_NAME.match(name)
+            path = os.path.join(self.journal_dir, name)
+            if match and path != own_path and not _pid_alive(int(match.group(1))):
+                claimed = f"{path}.adopted-{os.getpid()}"
+                try:
+                    os.rename(path, claimed) # atomic, so only one live process adopts a journal
+                except OSError:
+                    continue
+                recovered.update(read_journal(claimed))
+                adopted.append(claimed)
+
+        # Start a fresh journal holding just the recovered rows, then drop the old files
+        temporary = own_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as journal:
+            journal.write("".join(json.dumps({"k": key, "r": row}, ensure_ascii=False) + "\n"
+                                  for key, row in recovered.items()))
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temporary, own_path)
+        for path in adopted:
+            os.remove(path)
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(own_path, "a", encoding="utf-8")
+
+        now = self._clock()
+        for key, row in recovered.items():
+            self._pending[key] = row
+            self._enqueued_at[key] = now
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="result-write-queue", daemon=True)
+        self._thread.start()
+
+    def start(self):
+        with self._lock:
+            self._ensure_started()
+
+    def enqueue(self, rows: list) -> list:
+        """
+        Journal rows for writing and return their idempotency keys (set on each row if missing).
+        Blocks while the queue is full; raises WriteQueueFull after backpressure_timeout_seconds.
+        """
+        if not rows:
+            return []
+        with self._lock:
+            self._ensure_started()
+            deadline = self._clock() + self.backpressure_timeout_seconds
+            while len(self._pending) + len(rows) > self.max_pending and self._pending:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    raise WriteQueueFull(f"{len(self._pending)} result rows are waiting to be written")
+                self._changed.wait(remaining)
+            keys = []
+            entries = []
+            for row in rows:
+                key = row.setdefault(self.key_field, str(uuid.uuid4()))
+                keys.append(key)
+                entries.append({"k": key, "r": row})
+            self._append(entries)
+            now = self._clock()
+            for key, row in zip(keys, rows):
+                self._pending[key] = row
+                self._enqueued_at[key] = now
+            self._changed.notify_all()
+        return keys
+
+    def _backoff(self, attempt: int) -> float:
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _next_batch(self):
+        """Wait for a batch worth writing; None once stopping with nothing left. Call with the lock held."""
+        while not self._pending:
+            if self._stopping:
+                return None
+            self._changed.wait()
+        # Let a batch build up unless it is already full or we're draining
+        first_at = min(self._enqueued_at.values())
+        while (len(self._pending) < self.batch_size and not self._stopping
+               and self._clock() - first_at < self.flush_interval_seconds):
+            self._changed.wait(self.flush_interval_seconds - (self._clock() - first_at))
+        return list(self._pending.items())[:self.batch_size]
+
+    def _run(self):
+        attempt = 0
+        while True:
+            with self._lock:
+                if self._pid != os.getpid():
+                    return
+                batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._write_batch([row for _, row in batch])
+            except Exception as error:
+                self.failed_attempts += 1
+                self.last_error = repr(error)
+                print(f"Error writing queued results (attempt {attempt + 1}): {error}")
+                with self._lock:
+                    self._changed.wait(self._backoff(attempt))
+                attempt += 1
+                continue
+            attempt = 0
+            with self._lock:
+                keys = [key for key, _ in batch]
+                self._append([{"ack": keys}])
+                for key in keys:
+                    self._pending.pop(key, None)
+                    self._enqueued_at.pop(key, None)
+                self.flushed += len(keys)
+                self._compact()
+                self._changed.notify_all()
+
+    def _compact(self):
+        """Rewrite the journal down to its pending rows once it has grown large. Call with the lock held."""
+        if self._journal.tell() < self.compact_bytes:
+            return
+        path = self.journal_path
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as journal:
+            journal.write("".join(json.dumps({"k": key, "r": row}, ensure_ascii=False) + "\n"
+                                  for key, row in self._pending.items()))
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temporary, path)
+        self._journal.close()
+        self._journal = open(path, "a", encoding="utf-8")
+
+    def drain(self, timeout_seconds: float = 10.0) -> int:
+        """Write everything pending without waiting for batches to fill; return how many rows are still unwritten."""
+        with self._lock:
+            thread = self._thread
+            if thread is None or self._pid != os.getpid():
+                return len(self._pending)
+            self._stopping = True
+            self._changed.notify_all()
+        thread.join(timeout_seconds)
+        with self._lock:
+            if not thread.is_alive():
+                self._thread = None
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            oldest = min(self._enqueued_at.values(), default=None)
+            return {
+                "pending": len(self._pending),
+                "flushed": self.flushed,
+                "failed_attempts": self.failed_attempts,
+                "last_error": self.last_error,
+                "oldest_pending_seconds": self._clock() - oldest if oldest is not None else 0.0,
+            }
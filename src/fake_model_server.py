@@ -0,0 +1,109 @@
+"""
+Local HTTP stand-in for the Gemini API, for benchmarks and load tests.
+
+    python -m src.fake_model_server --port 8765 --latency-ms 800 --error-rate 0.02
+
+then run the app with MODEL_BACKEND=http://127.0.0.1:8765. POST /generate answers with
+the whole feedback array; POST /stream sends it in chunks (chunked transfer encoding).
+Both take {"prompt": "..."} and answer 503 for injected errors, which the client retries.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .services.model_backends import FakeModelBackend
+
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # needed for chunked streaming
+    backend: FakeModelBackend = None # set on the server class by make_server
+    lock = threading.Lock() # the backend's RNG isn't thread-safe
+
+    def log_message(self, format, *args):
+        pass # one line per request would drown the load test's output
+
+    def do_POST(self):
+        if self.path not in ("/generate", "/stream"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            prompt = json.loads(self.rfile.read(length) or b"{}").get("prompt", "")
+        except ValueError:
+            self.send_error(400, "Body must be JSON with a prompt")
+            return
+        with self.lock:
+            reply = self.backend.plan(prompt)
+            chunks = self.backend.chunks(reply.text or "")
+
+        if self.path == "/generate":
+            time.sleep(reply.latency_seconds)
+            if reply.error is not None:
+                self.send_error(503, str(reply.error))
+                return
+            body = reply.text.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        time.sleep(reply.latency_seconds / 3)
+        if reply.error is not None:
+            self.send_error(503, str(reply.error))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            time.sleep(reply.latency_seconds * 2 / 3 / len(chunks))
+            data = chunk.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def make_server(host: str, port: int, backend: FakeModelBackend) -> ThreadingHTTPServer:
+    handler = type("BoundFakeModelHandler", (FakeModelHandler,), {"backend": backend, "lock": threading.Lock()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    from .config import (FAKE_MODEL_LATENCY_MS, FAKE_MODEL_LATENCY_SIGMA, FAKE_MODEL_ERROR_RATE,
+                         FAKE_MODEL_MALFORMED_RATE, FAKE_MODEL_CHUNK_CHARS)
+
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Gemini feedback model.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=FAKE_MODEL_LATENCY_MS, help="Median response latency.")
+    parser.add_argument("--latency-sigma", type=float, default=FAKE_MODEL_LATENCY_SIGMA,
+                        help="Log-normal spread of the latency; 0 makes it constant.")
+    parser.add_argument("--error-rate", type=float, default=FAKE_MODEL_ERROR_RATE, help="Fraction of calls that fail with 503.")
+    parser.add_argument("--malformed-rate", type=float, default=FAKE_MODEL_MALFORMED_RATE,
+                        help="Fraction of feedback elements returned as invalid JSON.")
+    parser.add_argument("--chunk-chars", type=int, default=FAKE_MODEL_CHUNK_CHARS, help="Characters per streamed chunk.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed the fake's RNG for repeatable runs.")
+    args = parser.parse_args(argv)
+
+    backend = FakeModelBackend(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+                               error_rate=args.error_rate, malformed_rate=args.malformed_rate,
+                               chunk_chars=args.chunk_chars, rng=random.Random(args.seed))
+    server = make_server(args.host, args.port, backend)
+    print(f"Fake model server listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
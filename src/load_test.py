@@ -0,0 +1,227 @@
+"""
+Load test for the full practice -> remediation -> feedback flow.
+
+    python -m src.load_test --users 20 --iterations 5
+    python -m src.load_test --users 50 --base-url http://127.0.0.1:5000 --feedback stream
+    python -m src.load_test --users 20 --exercise-mode set
+
+Each simulated user starts a set of exercises, answers every one wrongly, writes the
+remediation sentences and then asks for their feedback the way the results page does.
+Without --base-url the app runs in-process with the fake model backend (unless MODEL_BACKEND
+is set), an empty in-memory feedback cache and a throwaway SQLite database, so runs are
+repeatable, need neither an API key nor a network, and leave no trace in real data. Reports
+p50/p95/p99 latency per step and for the whole flow, plus throughput.
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+_HIDDEN_FIELD = re.compile(r'name="error_(sentence|word)_(\d+)_(verb|tense|pronoun|correct)" value="([^"]*)"')
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class HttpUser:
+    """One user talking to a running server, with its own cookie jar (and so its own session)."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method: str, path: str, form: dict = None, json_body=None) -> tuple:
+        data = None
+        headers = {}
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode("utf-8")
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif json_body is not None:
+            data = json.dumps(json_body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        with self._opener.open(request, timeout=300) as response:
+            return response.status, response.read().decode("utf-8")
+
+
+class InProcessUser:
+    """One user driving the Flask app through its test client."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, form: dict = None, json_body=None) -> tuple:
+        response = self._client.open(path, method=method, data=form, json=json_body, follow_redirects=True)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list) # {step: [seconds]}
+        self.errors = defaultdict(int)
+
+    def record(self, step: str, seconds: float):
+        with self._lock:
+            self.timings[step].append(seconds)
+
+    def error(self, step: str):
+        with self._lock:
+            self.errors[step] += 1
+
+
+def _timed(recorder: Recorder, step: str, user, method: str, path: str, **kwargs) -> str:
+    started = time.perf_counter()
+    try:
+        status, body = user.request(method, path, **kwargs)
+    except Exception:
+        recorder.error(step)
+        raise
+    recorder.record(step, time.perf_counter() - started)
+    if status >= 400:
+        recorder.error(step)
+        raise RuntimeError(f"{step}: HTTP {status}")
+    return body
+
+
+_SET_ANSWER_FIELD = re.compile(r'name="(answer_\d+_\d+)"')
+
+
+def run_flow(user, recorder: Recorder, feedback_mode: str, exercise_mode: str = "step"):
+    """One pass through exercises, remediation and feedback."""
+    flow_started = time.perf_counter()
+    # Answer every exercise wrongly so the remediation flow has errors to practise
+    if exercise_mode == "set":
+        body = _timed(recorder, "start_exercises", user, "GET", "/start_exercises?mode=set")
+        _timed(recorder, "submit_exercise_set", user, "POST", "/exercise_set",
+               form={name: "x" for name in _SET_ANSWER_FIELD.findall(body)})
+    else:
+        body = _timed(recorder, "start_exercises", user, "GET", "/start_exercises")
+        while 'name="answer_0"' in body:
+            body = _timed(recorder, "submit_exercise", user, "POST", "/exercise",
+                          form={f"answer_{i}": "x" for i in range(4)})
+            body = _timed(recorder, "next_exercise", user, "GET", "/exercise")
+
+    body = _timed(recorder, "remediation_practice", user, "GET", "/remediation_flow")
+    fields = defaultdict(dict)
+    for kind, index, name, value in _HIDDEN_FIELD.findall(body):
+        fields[(kind, int(index))][name] = value
+    form = {}
+    sentences = []
+    for (kind, index), error in sorted(fields.items()):
+        if kind == "word":
+            form[f"remediation_word_{index}"] = error.get("correct", "")
+        else:
+            sentence = f"{error.get('pronoun', '').capitalize()} {error.get('correct', '')} todos os dias."
+            form[f"remediation_sentence_{index}"] = sentence
+            sentences.append({"user_sentence": sentence, "verb": error.get("verb"), "tense": error.get("tense"),
+                              "pronoun": error.get("pronoun"), "correct_form": error.get("correct")})
+    _timed(recorder, "submit_remediation", user, "POST", "/remediation_flow", form=form)
+
+    if sentences and feedback_mode == "batch":
+        _timed(recorder, "feedback", user, "POST", "/get_sentences_feedback", json_body={"sentences": sentences})
+    elif sentences and feedback_mode == "stream":
+        _timed(recorder, "feedback", user, "POST", "/stream_sentences_feedback", json_body={"sentences": sentences})
+    elif sentences and feedback_mode == "single":
+        for sentence in sentences:
+            _timed(recorder, "feedback", user, "POST", "/get_sentence_feedback", json_body=sentence)
+    recorder.record("flow", time.perf_counter() - flow_started)
+
+
+def report(recorder: Recorder, wall_seconds: float) -> str:
+    lines = [f"{'step':<22}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"]
+    steps = [step for step in recorder.timings if step != "flow"] + ["flow"]
+    for step in steps:
+        values = sorted(recorder.timings.get(step, []))
+        lines.append(f"{step:<22}{len(values):>7}"
+                     f"{percentile(values, 0.50) * 1000:>10.1f}{percentile(values, 0.95) * 1000:>10.1f}"
+                     f"{percentile(values, 0.99) * 1000:>10.1f}{recorder.errors.get(step, 0):>8}")
+    flows = len(recorder.timings.get("flow", []))
+    requests = sum(len(values) for step, values in recorder.timings.items() if step != "flow")
+    lines.append(f"\n{flows} flows, {requests} requests in {wall_seconds:.1f}s: "
+                 f"{flows / wall_seconds:.2f} flows/s, {requests / wall_seconds:.1f} requests/s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive the app with concurrent users through the remediation flow.")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users.")
+    parser.add_argument("--iterations", type=int, default=3, help="Flows per user.")
+    parser.add_argument("--base-url", default=None, help="Server to test; omit to run the app in-process.")
+    parser.add_argument("--feedback", choices=("batch", "stream", "single", "none"), default="batch",
+                        help="How the results page asks for sentence feedback.")
+    parser.add_argument("--exercise-mode", choices=("step", "set"), default="step",
+                        help="One exercise per page, or the whole set on one page with a single submit.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="load-test-") as scratch_dir:
+        if args.base_url:
+            make_user = lambda: HttpUser(args.base_url)
+        else:
+            app = isolate_in_process_app(scratch_dir)
+            make_user = lambda: InProcessUser(app)
+        run(args, make_user)
+
+
+def isolate_in_process_app(scratch_dir: str):
+    """
+    The app for an in-process run, cut off from everything a real deployment keeps: the fake
+    model backend (unless MODEL_BACKEND is set), an empty in-memory feedback cache, so every
+    run measures the model path, and a throwaway SQLite database under scratch_dir for the
+    wrong answers and sentences the simulated users write.
+    """
+    from . import app
+    from .config import (FAKE_MODEL_LATENCY_MS, FAKE_MODEL_LATENCY_SIGMA, FAKE_MODEL_ERROR_RATE,
+                         FAKE_MODEL_MALFORMED_RATE, FAKE_MODEL_CHUNK_CHARS, FEEDBACK_CACHE_MAX_ENTRIES)
+    from .data_access import db_handler
+    from .data_access.storage import SqliteStorage
+    from .services import exercise_service, gemini_service
+    from .services.feedback_cache import FeedbackCache
+    from .services.model_backends import FakeModelBackend
+    if "MODEL_BACKEND" not in os.environ:
+        gemini_service.use_model_backend(FakeModelBackend(
+            latency_ms=FAKE_MODEL_LATENCY_MS, latency_sigma=FAKE_MODEL_LATENCY_SIGMA,
+            error_rate=FAKE_MODEL_ERROR_RATE, malformed_rate=FAKE_MODEL_MALFORMED_RATE,
+            chunk_chars=FAKE_MODEL_CHUNK_CHARS))
+    exercise_service.feedback_cache = FeedbackCache(None, FEEDBACK_CACHE_MAX_ENTRIES)
+    db_handler.use_storage(SqliteStorage(os.path.join(scratch_dir, "load_test.sqlite3")))
+    exercise_service.invalidate_eligibility_index()
+    print(f"Running in-process against model backend {type(gemini_service.model_backend).__name__}, "
+          f"storage in {scratch_dir}")
+    return app
+
+
+def run(args, make_user):
+    recorder = Recorder()
+
+    def user_loop():
+        user = make_user()
+        for _ in range(args.iterations):
+            try:
+                run_flow(user, recorder, args.feedback, args.exercise_mode)
+            except Exception as error:
+                print(f"Flow failed: {error}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        for future in [pool.submit(user_loop) for _ in range(args.users)]:
+            future.result()
+    print(report(recorder, time.perf_counter() - started))
+
+
+if __name__ == "__main__":
+    main()
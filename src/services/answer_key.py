@@ -0,0 +1,88 @@
+"""
+Precomputed normalized answers for bulk grading, used by exercise_service.grade_batch.
+
+Every form in the conjugation table is normalized once (NFC, whitespace-trimmed,
+casefolded) along with an accent-stripped variant, in flat lists indexed by the table's
+slot order. Grading a submission is then one normalization per distinct answer and a
+list comparison per cell, and each graded exercise comes back as a bytes object with one
+code per pronoun instead of a list of dicts.
+"""
+import threading
+import unicodedata
+
+from .sentence_checker import strip_accents
+
+WRONG = 0
+CORRECT = 1
+ACCENT_ONLY = 2 # right apart from accents; correct only when grading accent-insensitively
+UNANSWERED = 3 # no answer given for the cell (None), e.g. a historical row for another pronoun
+
+
+def normalize_answer(answer: str) -> str:
+    return unicodedata.normalize("NFC", answer.strip()).casefold()
+
+
+class AnswerKey:
+    """Normalized forms of a conjugation table (ConjugationTable or MappedCatalogue)."""
+
+    def __init__(self, table):
+        self.table = table
+        self._pronoun_count = len(table.pronouns)
+        self._tense_count = len(table.tenses)
+        self._exact = None
+        self._loose = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        with self._lock:
+            if self._exact is not None:
+                return
+            exact = []
+            for verb_id in range(len(self.table.verbs)):
+                for tense_id in range(self._tense_count):
+                    exact.extend(normalize_answer(form) for form in self.table.forms(verb_id, tense_id))
+            self._loose = [strip_accents(form) for form in exact]
+            self._exact = exact
+
+    def exercise_id(self, verb: str, tense: str):
+        """Integer id of verb/tense, or None if the table doesn't have it."""
+        verb_id, tense_id = self.table.verb_id(verb), self.table.tense_id(tense)
+        if verb_id is None or tense_id is None or not self.table.has(verb_id, tense_id):
+            return None
+        return verb_id * self._tense_count + tense_id
+
+    def grade_batch(self, submissions, accent_insensitive: bool = False) -> list:
+        """
+        Grade (verb, tense, answers) submissions, answers in PRONOUNS order (None for an unanswered
+        cell). Returns one bytes of per-pronoun codes per submission, or None for an unknown verb/tense.
+        With accent_insensitive, answers that only differ in accents grade CORRECT instead of ACCENT_ONLY.
+        """
+        if self._exact is None:
+            self._build()
+        exact, loose = self._exact, self._loose
+        accent_code = CORRECT if accent_insensitive else ACCENT_ONLY
+        normalized = {} # answers repeat a lot across a batch ("", common mistakes); normalize each once
+        graded = []
+        for verb, tense, answers in submissions:
+            exercise_id = self.exercise_id(verb, tense)
+            if exercise_id is None:
+                graded.append(None)
+                continue
+            first = exercise_id * self._pronoun_count
+            codes = bytearray(self._pronoun_count)
+            for i, answer in enumerate(answers[:self._pronoun_count]):
+                if answer is None:
+                    codes[i] = UNANSWERED
+                    continue
+                answer_forms = normalized.get(answer)
+                if answer_forms is None:
+                    exact_answer = normalize_answer(answer)
+                    answer_forms = normalized[answer] = (exact_answer, strip_accents(exact_answer))
+                if answer_forms[0] == exact[first + i]:
+                    codes[i] = CORRECT
+                elif answer_forms[1] == loose[first + i]:
+                    codes[i] = accent_code
+            for i in range(len(answers), self._pronoun_count):
+                codes[i] = UNANSWERED
+            graded.append(bytes(codes))
+        return graded
@@ -0,0 +1,185 @@
+"""
+Precomputed per-user exercise eligibility index used by exercise_service.select_exercises.
+
+Each (verb, tense) pair gets an integer id once. Per-id state (preference flags and a
+bitmask of pronouns last answered correctly) lives in flat bytearrays, and the primary
+and secondary pools are id sets with O(1) add/remove, so a result or preference change
+only touches one id and sampling k exercises never walks or shuffles the whole catalogue.
+"""
+import random
+import threading
+
+NEVER_SHOW = 1
+ALWAYS_SHOW = 2
+SHOW_PRIMARILY = 4
+
+NO_POOL = 0
+PRIMARY = 1
+SECONDARY = 2
+
+
+class IdPool:
+    """Set of integer ids backed by a dense list, supporting O(1) add/remove and O(k) sampling."""
+
+    def __init__(self, capacity: int):
+        self.ids = []
+        self._positions = [-1] * capacity
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, item_id: int):
+        return self._positions[item_id] != -1
+
+    def add(self, item_id: int):
+        if self._positions[item_id] == -1:
+            self._positions[item_id] = len(self.ids)
+            self.ids.append(item_id)
+
+    def remove(self, item_id: int):
+        position = self._positions[item_id]
+        if position == -1:
+            return
+        # Swap the last id into the hole so removal stays O(1)
+        last_id = self.ids.pop()
+        if last_id != item_id:
+            self.ids[position] = last_id
+            self._positions[last_id] = position
+        self._positions[item_id] = -1
+
+    def sample(self, k: int, rng=random):
+        """Return k distinct ids chosen uniformly at random (k is clamped to the pool size)."""
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return []
+        return rng.sample(self.ids, k)
+
+
+class EligibilityIndex:
+    """Primary/secondary exercise pools for one user, kept current incrementally."""
+
+    def __init__(self, verbs: dict, pronouns: list):
+        self.verbs = verbs
+        self.pronouns = list(pronouns)
+        self.exercises = [(verb, tense) for verb in verbs for tense in verbs[verb]]
+        self._ids = {exercise: i for i, exercise in enumerate(self.exercises)}
+        self._pronoun_bits = {pronoun: 1 << i for i, pronoun in enumerate(self.pronouns)}
+        self._all_correct_mask = (1 << len(self.pronouns)) - 1
+
+        count = len(self.exercises)
+        self._flags = bytearray(count)
+        self._correct = bytearray(count) if len(self.pronouns) <= 8 else [0] * count
+        self._pool_of = bytearray(count)
+        self.primary = IdPool(count)
+        self.secondary = IdPool(count)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, verbs: dict, pronouns: list, results: dict, preferences: dict):
+        """Build an index from the nested dicts returned by db_handler.load_results/load_preferences."""
+        index = cls(verbs, pronouns)
+        for exercise_id, (verb, tense) in enumerate(index.exercises):
+            prefs = preferences.get(verb, {}).get(tense, {}) if isinstance(preferences, dict) else {}
+            index._flags[exercise_id] = _pack_flags(prefs)
+
+            tense_results = results.get(f"{verb}_{tense}") if results else None
+            if tense_results:
+                mask = 0
+                for pronoun, bit in index._pronoun_bits.items():
+                    if tense_results.get(pronoun, {}).get("correct", False):
+                        mask |= bit
+                index._correct[exercise_id] = mask
+
+            index._place(exercise_id)
+        return index
+
+    def exercise_id(self, verb: str, tense: str):
+        return self._ids.get((verb, tense))
+
+    def _classify(self, exercise_id: int):
+        flags = self._flags[exercise_id]
+        if flags & NEVER_SHOW:
+            return NO_POOL
+        wanted = self._correct[exercise_id] != self._all_correct_mask or bool(flags & ALWAYS_SHOW)
+        if flags & SHOW_PRIMARILY:
+            return PRIMARY if wanted else SECONDARY
+        return SECONDARY if wanted else NO_POOL
+
+    def _place(self, exercise_id: int):
+        pool = self._classify(exercise_id)
+        current = self._pool_of[exercise_id]
+        if pool == current:
+            return
+        if current == PRIMARY:
+            self.primary.remove(exercise_id)
+        elif current == SECONDARY:
+            self.secondary.remove(exercise_id)
+        if pool == PRIMARY:
+            self.primary.add(exercise_id)
+        elif pool == SECONDARY:
+            self.secondary.add(exercise_id)
+        self._pool_of[exercise_id] = pool
+
+    def apply_result(self, verb: str, tense: str, pronoun: str, is_correct: bool):
+        """Record the latest answer for one pronoun and move the exercise between pools if needed."""
+        exercise_id = self._ids.get((verb, tense))
+        bit = self._pronoun_bits.get(pronoun)
+        if exercise_id is None or bit is None:
+            return
+        with self._lock:
+            if is_correct:
+                self._correct[exercise_id] |= bit
+            else:
+                self._correct[exercise_id] &= ~bit & self._all_correct_mask
+            self._place(exercise_id)
+
+    def apply_preference(self, verb: str, tense: str, prefs: dict):
+        """Replace the preference flags for one exercise and move it between pools if needed."""
+        exercise_id = self._ids.get((verb, tense))
+        if exercise_id is None:
+            return
+        with self._lock:
+            self._flags[exercise_id] = _pack_flags(prefs)
+            self._place(exercise_id)
+
+    def pools(self):
+        """Return (primary, secondary) lists of (verb, tense) tuples in no particular order."""
+        with self._lock:
+            return ([self.exercises[i] for i in self.primary.ids],
+                    [self.exercises[i] for i in self.secondary.ids])
+
+    def select(self, count: int, primary_target: int = 3, rng=random):
+        """
+        Pick up to count exercises: primary_target from the primary pool, the rest from the
+        secondary pool, topping up from whichever pool still has items if one runs short.
+        """
+        with self._lock:
+            primary_size = len(self.primary)
+            secondary_size = len(self.secondary)
+
+            primary_target = min(primary_target, count)
+            from_primary = min(primary_target, primary_size)
+            from_secondary = min(count - primary_target, secondary_size)
+
+            needed_more = count - from_primary - from_secondary
+            extra_primary = min(needed_more, primary_size - from_primary)
+            needed_more -= extra_primary
+            extra_secondary = min(needed_more, secondary_size - from_secondary)
+
+            primary_ids = self.primary.sample(from_primary + extra_primary, rng)
+            secondary_ids = self.secondary.sample(from_secondary + extra_secondary, rng)
+
+        ordered_ids = (primary_ids[:from_primary] + secondary_ids[:from_secondary]
+                       + primary_ids[from_primary:] + secondary_ids[from_secondary:])
+        return [self.exercises[i] for i in ordered_ids]
+
+
+def _pack_flags(prefs: dict) -> int:
+    flags = 0
+    if prefs.get("never_show", False):
+        flags |= NEVER_SHOW
+    if prefs.get("always_show", False):
+        flags |= ALWAYS_SHOW
+    if prefs.get("show_primarily", False):
+        flags |= SHOW_PRIMARILY
+    return flags
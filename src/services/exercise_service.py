@@ -1,135 +1,137 @@
+import asyncio
 import random
+import threading
+import time
 from datetime import datetime
+from ..config import USER_CACHE_MAX_USERS, USER_CACHE_TTL_SECONDS, FEEDBACK_CACHE_PATH, FEEDBACK_CACHE_MAX_ENTRIES
 from ..data_access import db_handler
-from ..core_data import VERBS, PRONOUNS
+from ..core_data import VERBS, PRONOUNS, get_conjugation_table
 from . import gemini_service # Import gemini_service
+from . import answer_key
+from .eligibility_index import EligibilityIndex
+from .feedback_cache import FeedbackCache, feedback_cache_key
+from .sentence_checker import check_sentence
+
+feedback_cache = FeedbackCache(FEEDBACK_CACHE_PATH, FEEDBACK_CACHE_MAX_ENTRIES)
+
+# Per-user eligibility indexes, rebuilt from the database once they are older than the user cache TTL
+_eligibility_indexes = {} # {user_id: (built_at, EligibilityIndex)}
+_eligibility_lock = threading.Lock()
+
+def get_eligibility_index(user_id: str = db_handler.DEFAULT_USER_ID):
+    """Return the user's eligibility index, building it from results and preferences if needed."""
+    now = time.monotonic()
+    with _eligibility_lock:
+        entry = _eligibility_indexes.get(user_id)
+    if entry is not None:
+        built_at, index = entry
+        # Rebuild if the catalogue object changed or the snapshot is older than the cache TTL
+        if index.verbs is VERBS and now - built_at < USER_CACHE_TTL_SECONDS:
+            return index
 
-def get_available_exercises(user_id: str = db_handler.DEFAULT_USER_ID):
-    """Get lists of available exercises (primary and secondary) based on preferences and results."""
     results = db_handler.load_results(user_id)
     preferences = db_handler.load_preferences(user_id)
-    primary_pool = []
-    secondary_pool = []
-
-    for verb in VERBS:
-        for tense in VERBS[verb]:
-            verb_prefs = preferences.get(verb, {}).get(tense, {})
-            never_show = verb_prefs.get("never_show", False)
-            always_show = verb_prefs.get("always_show", False)
-            show_primarily = verb_prefs.get("show_primarily", False)
-
-            if never_show:
-                continue
-
-            verb_tense_key = f"{verb}_{tense}"
-            all_correct = False
-            if verb_tense_key in results:
-                all_correct = all(results[verb_tense_key].get(pronoun, {}).get("correct", False)
-                                 for pronoun in PRONOUNS)
-
-            exercise_tuple = (verb, tense)
-
-            if show_primarily:
-                if not all_correct or always_show:
-                    primary_pool.append(exercise_tuple)
-                # If it's show_primarily but completed and not always_show, it could still be in secondary
-                elif all_correct and not always_show: 
-                    pass # Don't add to primary, will be handled by secondary logic if needed
-                else: # Not completed, add to primary (this case should be covered by 'not all_correct')
-                    primary_pool.append(exercise_tuple)
-
-            # Add to secondary pool if not show_primarily and meets criteria,
-            # OR if it was show_primarily but completed and not always_show (so it wasn't added to primary)
-            # This ensures items marked show_primarily but completed (and not always_show) are not lost
-            # and can be picked if the primary pool is exhausted.
-            if not show_primarily:
-                 if not all_correct or always_show:
-                    secondary_pool.append(exercise_tuple)
-            elif all_correct and not always_show: # Was show_primarily, completed, not always_show
-                secondary_pool.append(exercise_tuple)
+    index = EligibilityIndex.build(VERBS, PRONOUNS, results, preferences)
+    with _eligibility_lock:
+        _eligibility_indexes.pop(user_id, None)
+        _eligibility_indexes[user_id] = (now, index)
+        while len(_eligibility_indexes) > max(USER_CACHE_MAX_USERS, 1):
+            _eligibility_indexes.pop(next(iter(_eligibility_indexes)))
+    return index
 
+def invalidate_eligibility_index(user_id: str = None):
+    """Drop a user's eligibility index (or all of them) so the next selection rebuilds it."""
+    with _eligibility_lock:
+        if user_id is None:
+            _eligibility_indexes.clear()
+        else:
+            _eligibility_indexes.pop(user_id, None)
 
+def _cached_eligibility_index(user_id: str):
+    with _eligibility_lock:
+        entry = _eligibility_indexes.get(user_id)
+    return entry[1] if entry is not None else None
+
+def get_available_exercises(user_id: str = db_handler.DEFAULT_USER_ID):
+    """Get lists of available exercises (primary and secondary) based on preferences and results."""
+    primary_pool, secondary_pool = get_eligibility_index(user_id).pools()
     random.shuffle(primary_pool)
     random.shuffle(secondary_pool)
     return primary_pool, secondary_pool
 
-def select_exercises(count=5):
+def select_exercises(count=5, user_id: str = db_handler.DEFAULT_USER_ID):
     """Select a specified number of exercises, aiming for a mix from primary and secondary pools."""
-    primary_pool, secondary_pool = get_available_exercises()
-    
-    selected_exercises = []
-    
-    # Define target counts for each pool
-    primary_target_count = 3
-    if count < primary_target_count: # Adjust if total count is less than primary target
-        primary_target_count = count
-        secondary_target_count = 0
-    else:
-        secondary_target_count = count - primary_target_count
-
-    # Take from primary pool up to its target
-    actual_taken_from_primary = min(primary_target_count, len(primary_pool))
-    selected_exercises.extend(primary_pool[:actual_taken_from_primary])
-    
-    # Keep track of remaining items in pools
-    remaining_primary_pool = primary_pool[actual_taken_from_primary:]
-    
-    # Take from secondary pool up to its target
-    if secondary_target_count > 0:
-        actual_taken_from_secondary = min(secondary_target_count, len(secondary_pool))
-        selected_exercises.extend(secondary_pool[:actual_taken_from_secondary])
-        remaining_secondary_pool = secondary_pool[actual_taken_from_secondary:]
-    else:
-        remaining_secondary_pool = secondary_pool # Or just secondary_pool if no target
-
-    # If not enough exercises selected, try to fill from remaining pools
-    current_selected_count = len(selected_exercises)
-    if current_selected_count < count:
-        needed_more = count - current_selected_count
-        
-        # Try to fill from remaining primary first
-        fill_from_remaining_primary = min(needed_more, len(remaining_primary_pool))
-        if fill_from_remaining_primary > 0:
-            selected_exercises.extend(remaining_primary_pool[:fill_from_remaining_primary])
-            needed_more -= fill_from_remaining_primary
-            
-        # Then, try to fill from remaining secondary
-        if needed_more > 0:
-            fill_from_remaining_secondary = min(needed_more, len(remaining_secondary_pool))
-            if fill_from_remaining_secondary > 0:
-                selected_exercises.extend(remaining_secondary_pool[:fill_from_remaining_secondary])
-
-    # Ensure unique exercises if somehow duplicates were added (though current logic shouldn't cause this)
-    # This can be more robust by converting to set of tuples and back to list if order doesn't matter
-    # For now, assuming the pool separation and slicing prevents duplicates.
-    # random.shuffle(selected_exercises) # Optionally shuffle the final list
-            
-    return selected_exercises
+    # Samples ids straight from the index pools; nothing proportional to the catalogue size runs here
+    return get_eligibility_index(user_id).select(count, primary_target=3)
 
-def update_results(verb, tense, user_answers, user_id: str = db_handler.DEFAULT_USER_ID):
-    """Update the database with the latest exercise results."""
-    timestamp = datetime.now().isoformat()
+def apply_preference_update(preference_data: dict, user_id: str = db_handler.DEFAULT_USER_ID):
+    """Reflect a saved preference in the user's eligibility index, if one is built."""
+    index = _cached_eligibility_index(user_id)
+    if index is not None:
+        index.apply_preference(preference_data.get('verb'), preference_data.get('tense'), preference_data)
 
+def _result_rows(verb, tense, user_answers, timestamp, codes):
+    """One results-table row per pronoun for a verb-tense submission graded with answer_key codes."""
+    if codes is None:
+        raise KeyError(f"{verb} {tense}")
+    rows = []
     for i, pronoun in enumerate(PRONOUNS):
         user_answer = user_answers[i]
-        correct_answer = VERBS[verb][tense][i]
-        is_correct = user_answer == correct_answer
+        # Stored exactly as the user was graded, so history and eligibility agree with the feedback
+        is_correct = codes[i] == answer_key.CORRECT
 
-        result_data = {
+        rows.append({
             "verb": verb,
             "tense": tense,
             "pronoun": pronoun,
             "user_answer": user_answer,
             "is_correct": is_correct,
             "timestamp": timestamp
-        }
-        db_handler.save_result(result_data, user_id)
+        })
+    return rows
 
-def process_exercise_submission(verb, tense, user_answers, user_id: str = db_handler.DEFAULT_USER_ID):
+def _record_results(rows, user_id: str):
+    db_handler.save_results(rows, user_id)
+
+    index = _cached_eligibility_index(user_id)
+    if index is not None:
+        for row in rows:
+            index.apply_result(row["verb"], row["tense"], row["pronoun"], row["is_correct"])
+
+def update_results(verb, tense, user_answers, user_id: str = db_handler.DEFAULT_USER_ID):
+    """Update the database with the latest exercise results."""
+    # Build every pronoun's row first so the submission is written in one round trip
+    [codes] = grade_batch([(verb, tense, user_answers)])
+    _record_results(_result_rows(verb, tense, user_answers, datetime.now().isoformat(), codes), user_id)
+
+def update_results_batch(submissions, user_id: str = db_handler.DEFAULT_USER_ID):
+    """Write the results of several (verb, tense, user_answers) submissions in one database call."""
+    submissions = list(submissions)
+    timestamp = datetime.now().isoformat()
+    rows = []
+    for (verb, tense, user_answers), codes in zip(submissions, grade_batch(submissions)):
+        rows.extend(_result_rows(verb, tense, user_answers, timestamp, codes))
+    _record_results(rows, user_id)
+
+_answer_key = None
+
+def get_answer_key():
+    """Return the shared table of normalized answers, built on first use."""
+    global _answer_key
+    if _answer_key is None or _answer_key.table is not get_conjugation_table():
+        _answer_key = answer_key.AnswerKey(get_conjugation_table())
+    return _answer_key
+
+def grade_batch(submissions, accent_insensitive: bool = False):
     """
-    Processes a user's exercise submission, updates results, and returns feedback.
-    Returns a dictionary with results_list, all_correct, and errors_list.
+    Grade many (verb, tense, answers) submissions at once; answers are in PRONOUNS order.
+    Returns one bytes per submission holding a code per pronoun (answer_key.CORRECT, WRONG,
+    ACCENT_ONLY, UNANSWERED), or None for a verb/tense the catalogue doesn't have.
     """
+    return get_answer_key().grade_batch(submissions, accent_insensitive)
+
+def _exercise_feedback(verb, tense, user_answers, codes):
+    """Results list, all_correct flag and errors list for one graded submission."""
     correct_conjugations = VERBS[verb][tense]
 
     current_results_list = []
@@ -137,7 +139,7 @@ def process_exercise_submission(verb, tense, user_answers, user_id: str = db_han
     errors_list = []
 
     for i, (user, correct) in enumerate(zip(user_answers, correct_conjugations)):
-        is_correct = user.strip().lower() == correct.lower() # Case-insensitive comparison
+        is_correct = codes[i] == answer_key.CORRECT
         if not is_correct:
             current_all_correct = False
             errors_list.append({
@@ -155,29 +157,219 @@ def process_exercise_submission(verb, tense, user_answers, user_id: str = db_han
             'is_correct': is_correct
         })
 
-    # Update results in database
-    update_results(verb, tense, user_answers, user_id)
-
-    # Return the complete errors_list for the current exercise
     return {
         'results_list': current_results_list,
         'all_correct': current_all_correct,
         'errors_list': errors_list
     }
 
+def process_exercise_submission(verb, tense, user_answers, user_id: str = db_handler.DEFAULT_USER_ID):
+    """
+    Processes a user's exercise submission, updates results, and returns feedback.
+    Returns a dictionary with results_list, all_correct, and errors_list.
+    """
+    feedback = _exercise_feedback(verb, tense, user_answers, grade_batch([(verb, tense, user_answers)])[0])
+
+    # Update results in database
+    update_results(verb, tense, user_answers, user_id)
+
+    # Return the complete errors_list for the current exercise
+    return feedback
+
+def process_exercise_set(submissions, user_id: str = db_handler.DEFAULT_USER_ID):
+    """
+    Grade a whole set of (verb, tense, user_answers) submissions in one pass and save all their
+    results in one database write. Returns one process_exercise_submission-style dict per
+    submission, with 'verb' and 'tense' added.
+    """
+    submissions = list(submissions)
+    codes = grade_batch(submissions)
+    feedback = []
+    for (verb, tense, user_answers), exercise_codes in zip(submissions, codes):
+        exercise_feedback = _exercise_feedback(verb, tense, user_answers, exercise_codes)
+        exercise_feedback['verb'] = verb
+        exercise_feedback['tense'] = tense
+        feedback.append(exercise_feedback)
+    update_results_batch(submissions, user_id)
+    return feedback
+
+def precheck_sentence_feedback(user_sentence, verb, tense, pronoun, correct_form):
+    """
+    Deterministic feedback for sentences that obviously don't need the model (empty, not
+    Portuguese, missing the practised form, wrong subject), or None if Gemini should see it.
+    """
+    verb_tenses = VERBS.get(verb) or {}
+    known_forms = {form for forms in verb_tenses.values() for form in forms}
+    return check_sentence(user_sentence, verb, tense, pronoun, correct_form or "",
+                          tense_forms=verb_tenses.get(tense), known_forms=known_forms).feedback
+
+def _feedback_key(user_sentence, verb, tense, pronoun, correct_form):
+    # Keyed by the backend in use, so a fake's verdicts are never served as the real model's
+    return feedback_cache_key(user_sentence, verb, tense, pronoun, correct_form,
+                              gemini_service.model_backend.cache_namespace, gemini_service.PROMPT_VERSION)
+
 def get_gemini_sentence_feedback(user_sentence, verb, tense, pronoun, correct_form):
     """
-    Gets detailed feedback for a single sentence from Gemini.
+    Gets detailed feedback for a single sentence from Gemini, or from the feedback cache.
+    Blocks the calling thread; the Gemini call itself runs on the shared async client.
+    """
+    return gemini_service.gemini_client.run(
+        get_gemini_sentence_feedback_async(user_sentence, verb, tense, pronoun, correct_form)
+    )
+
+async def get_gemini_sentence_feedback_async(user_sentence, verb, tense, pronoun, correct_form):
+    """
+    Async version of get_gemini_sentence_feedback, for feedback requests that should run concurrently.
     """
+    precheck_feedback = precheck_sentence_feedback(user_sentence, verb, tense, pronoun, correct_form)
+    if precheck_feedback is not None:
+        return precheck_feedback
+
+    cache_key = _feedback_key(user_sentence, verb, tense, pronoun, correct_form)
+    cached_feedback = feedback_cache.get(cache_key)
+    if cached_feedback is not None:
+        return cached_feedback
+
     # Call the gemini_service to get feedback for a list containing one sentence
-    gemini_response_data = gemini_service.get_feedback_from_gemini([user_sentence])
+    gemini_response_data = await gemini_service.get_feedback_batched_async([user_sentence])
     
     # Extract the feedback for the single sentence
     feedback_list = gemini_response_data.get("feedback_list", [])
     
     if feedback_list:
         # The first (and only) item in the feedback_list contains the gemini_feedback
-        return feedback_list[0].get("gemini_feedback")
+        feedback = feedback_list[0].get("gemini_feedback")
+        if _is_valid_feedback(feedback):
+            feedback_cache.set(cache_key, feedback)
+        return feedback
     else:
         # Return an error or default structure if no feedback was returned
         return {"error": "No feedback received from Gemini service."}
+
+def _is_valid_feedback(feedback):
+    """True if feedback looks like one well-formed element of the Gemini feedback array."""
+    return isinstance(feedback, dict) and "error" not in feedback and isinstance(feedback.get("is_portuguese"), bool)
+
+def get_gemini_batch_feedback(sentence_items):
+    """
+    Gets feedback for several sentences with a single Gemini call.
+    sentence_items: list of dicts with user_sentence, verb, tense, pronoun and correct_form.
+    Returns a list of feedback objects in the same order. Entries the model returned
+    malformed are retried one sentence at a time, concurrently.
+    """
+    if not sentence_items:
+        return []
+    return gemini_service.gemini_client.run(get_gemini_batch_feedback_async(sentence_items))
+
+async def get_gemini_batch_feedback_async(sentence_items):
+    """
+    Async version of get_gemini_batch_feedback.
+    """
+    if not sentence_items:
+        return []
+
+    # Serve what we can from the pre-checker and the feedback cache; only send the rest to the model
+    results = [None] * len(sentence_items)
+    cache_keys = []
+    missing_indexes = []
+    for i, item in enumerate(sentence_items):
+        item_args = (item['user_sentence'], item.get('verb'), item.get('tense'), item.get('pronoun'), item.get('correct_form'))
+        cache_keys.append(_feedback_key(*item_args))
+        results[i] = precheck_sentence_feedback(*item_args) or feedback_cache.get(cache_keys[i])
+        if results[i] is None:
+            missing_indexes.append(i)
+    if not missing_indexes:
+        return results
+
+    gemini_response_data = await gemini_service.get_feedback_batched_async([sentence_items[i]['user_sentence'] for i in missing_indexes])
+    feedback_list = gemini_response_data.get("feedback_list", [])
+    debug_info = gemini_response_data.get("debug_info", {})
+    # Only retry when the model answered but some entries were unusable. If the call itself
+    # failed (no API key, network error) a per-sentence retry would fail the same way.
+    model_answered = gemini_service.is_configured() and debug_info.get("raw_response") is not None
+
+    retry_indexes = []
+    for position, i in enumerate(missing_indexes):
+        feedback = feedback_list[position].get("gemini_feedback") if position < len(feedback_list) else None
+        if _is_valid_feedback(feedback):
+            feedback_cache.set(cache_keys[i], feedback)
+            results[i] = feedback
+        elif not model_answered:
+            results[i] = feedback if isinstance(feedback, dict) else {"error": debug_info.get("error") or "No feedback received from Gemini service."}
+        else:
+            retry_indexes.append(i)
+
+    retried = await asyncio.gather(*(
+        get_gemini_sentence_feedback_async(
+            sentence_items[i]['user_sentence'], sentence_items[i].get('verb'), sentence_items[i].get('tense'),
+            sentence_items[i].get('pronoun'), sentence_items[i].get('correct_form')
+        )
+        for i in retry_indexes
+    ))
+    for i, feedback in zip(retry_indexes, retried):
+        results[i] = feedback
+    return results
+
+def stream_gemini_batch_feedback(sentence_items):
+    """
+    Like get_gemini_batch_feedback, but yields (index, feedback) pairs as soon as each
+    sentence's feedback is ready instead of returning them all at the end.
+    """
+    return gemini_service.gemini_client.iterate(stream_gemini_batch_feedback_async(sentence_items))
+
+async def stream_gemini_batch_feedback_async(sentence_items):
+    """
+    Async version of stream_gemini_batch_feedback. Pre-checked and cached feedback is yielded first, then model
+    feedback as each element of the streamed response completes. Malformed or missing
+    elements are retried one sentence at a time, concurrently, and yielded as they finish.
+    """
+    missing_indexes = []
+    cache_keys = {}
+    for i, item in enumerate(sentence_items):
+        item_args = (item['user_sentence'], item.get('verb'), item.get('tense'), item.get('pronoun'), item.get('correct_form'))
+        cache_key = _feedback_key(*item_args)
+        cached_feedback = precheck_sentence_feedback(*item_args) or feedback_cache.get(cache_key)
+        if cached_feedback is not None:
+            yield i, cached_feedback
+        else:
+            cache_keys[i] = cache_key
+            missing_indexes.append(i)
+    if not missing_indexes:
+        return
+
+    delivered = set()
+    retry_indexes = []
+    try:
+        async for position, feedback in gemini_service.stream_feedback_from_gemini_async(
+                [sentence_items[i]['user_sentence'] for i in missing_indexes]):
+            i = missing_indexes[position]
+            delivered.add(i)
+            if _is_valid_feedback(feedback):
+                feedback_cache.set(cache_keys[i], feedback)
+                yield i, feedback
+            elif not gemini_service.is_configured():
+                yield i, feedback
+            else:
+                retry_indexes.append(i)
+    except Exception as error:
+        # The call itself failed; a per-sentence retry would most likely fail the same way
+        print(f"Error streaming Gemini feedback: {error}")
+        for i in missing_indexes:
+            if i not in delivered or i in retry_indexes:
+                yield i, {"error": f"API call failed: {error}"}
+        return
+    retry_indexes.extend(i for i in missing_indexes if i not in delivered)
+
+    async def retry(i):
+        item = sentence_items[i]
+        return i, await get_gemini_sentence_feedback_async(
+            item['user_sentence'], item.get('verb'), item.get('tense'), item.get('pronoun'), item.get('correct_form')
+        )
+
+    tasks = [asyncio.ensure_future(retry(i)) for i in retry_indexes]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
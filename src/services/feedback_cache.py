@@ -0,0 +1,119 @@
+"""
+Content-addressed cache for Gemini sentence feedback.
+
+Entries are keyed by a hash of the normalized sentence, its exercise context, the model
+backend's cache namespace and the prompt version, so the same sentence is only ever evaluated once per prompt. An
+in-process LRU sits in front of a local SQLite file that survives restarts and is
+shared by every worker on the node.
+"""
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_sentence(sentence: str) -> str:
+    """NFC-normalize and collapse whitespace so trivially different copies share an entry."""
+    return " ".join(unicodedata.normalize("NFC", sentence or "").split())
+
+
+def feedback_cache_key(sentence, verb, tense, pronoun, correct_form, model_name, prompt_version) -> str:
+    parts = [normalize_sentence(sentence), verb or "", tense or "", pronoun or "", correct_form or "",
+             model_name or "", prompt_version or ""]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class FeedbackCache:
+    """LRU of feedback dicts in front of an optional SQLite store (path=None keeps it in memory)."""
+
+    def __init__(self, path: str = None, max_entries: int = 4096):
+        self.path = path or None
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self):
+        # Opened on first use so importing the service never touches the filesystem
+        if self._connection is None and self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS feedback_cache ("
+                " key TEXT PRIMARY KEY,"
+                " feedback TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _remember(self, key: str, feedback: dict):
+        self._memory[key] = feedback
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Return a copy of the cached feedback for key, or None."""
+        with self._lock:
+            feedback = self._memory.get(key)
+            if feedback is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(feedback)
+
+            try:
+                db = self._db()
+                row = db.execute("SELECT feedback FROM feedback_cache WHERE key = ?", (key,)).fetchone() if db else None
+            except sqlite3.Error as e:
+                print(f"Error reading feedback cache: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+
+            feedback = json.loads(row[0])
+            self._remember(key, feedback)
+            self.hits += 1
+            return copy.deepcopy(feedback)
+
+    def set(self, key: str, feedback: dict):
+        """Store feedback under key. Callers should only store successfully parsed feedback."""
+        with self._lock:
+            self._remember(key, copy.deepcopy(feedback))
+            try:
+                db = self._db()
+                if db:
+                    db.execute("INSERT OR REPLACE INTO feedback_cache (key, feedback, created_at) VALUES (?, ?, ?)",
+                               (key, json.dumps(feedback, ensure_ascii=False), time.time()))
+                    db.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing feedback cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._db()
+            if db:
+                db.execute("DELETE FROM feedback_cache")
+                db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,200 @@
+"""
+Asyncio client for Gemini calls.
+
+Calls run on one background event loop shared by every request thread, so many prompts
+can be in flight at once without each holding a worker thread busy in a blocking socket
+read. A semaphore bounds how many calls reach the API concurrently, every call has a
+deadline that covers queueing and retries, transient API errors are retried with
+jittered exponential backoff, and a caller that gives up cancels the underlying call.
+"""
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+
+from google.api_core import exceptions as google_exceptions
+
+# Errors worth retrying: the request may well succeed a moment later
+TRANSIENT_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+class GeminiTimeout(TimeoutError):
+    """The call did not complete before its deadline."""
+
+
+class AsyncGeminiClient:
+    """Runs async generate(prompt) -> str calls with bounded parallelism, deadlines and retries."""
+
+    def __init__(self, generate, max_concurrency: int = 8, timeout_seconds: float = 30.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 rng: random.Random = None, clock=time.monotonic, stream=None):
+        self._generate = generate
+        self._stream = stream # async stream(prompt) -> async iterator of text chunks
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._rng = rng or random.Random()
+        self._clock = clock
+        self._semaphores = {} # {event loop: semaphore}; asyncio primitives are bound to one loop
+        self._loop = None
+        self._loop_pid = None
+        self._loop_lock = threading.Lock()
+
+    def set_backend(self, generate, stream=None):
+        """Point the client at other generate/stream functions; calls already running are unaffected."""
+        self._generate = generate
+        self._stream = stream
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from concurrent callers instead of synchronizing them
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_delay(self, error: BaseException, attempt: int, deadline: float) -> float:
+        """Return how long to wait before retrying after error, or re-raise it if we shouldn't."""
+        delay = self._backoff(attempt)
+        if attempt >= self.max_retries or self._clock() + delay >= deadline:
+            if isinstance(error, asyncio.TimeoutError):
+                raise GeminiTimeout("Gemini call exceeded its deadline") from error
+            raise error
+        print(f"Transient Gemini error ({error!r}); retrying in {delay:.2f}s")
+        return delay
+
+    def _remaining(self, deadline: float, attempt: int = 0) -> float:
+        remaining = deadline - self._clock()
+        if remaining <= 0:
+            raise GeminiTimeout(f"Gemini call exceeded its deadline after {attempt} attempt(s)")
+        return remaining
+
+    async def generate(self, prompt: str, timeout_seconds: float = None) -> str:
+        """Return the model's text for prompt; raises GeminiTimeout or the last API error."""
+        deadline = self._clock() + (self.timeout_seconds if timeout_seconds is None else timeout_seconds)
+        attempt = 0
+        while True:
+            remaining = self._remaining(deadline, attempt)
+            try:
+                # Time spent waiting for a slot counts against the deadline too
+                return await asyncio.wait_for(self._generate_bounded(prompt), remaining)
+            except TRANSIENT_ERRORS as error:
+                await asyncio.sleep(self._retry_delay(error, attempt, deadline))
+                attempt += 1
+
+    async def stream(self, prompt: str, timeout_seconds: float = None):
+        """
+        Yield the model's text for prompt chunk by chunk, holding one concurrency slot throughout.
+        Transient errors are only retried before the first chunk arrives; after that they propagate.
+        """
+        deadline = self._clock() + (self.timeout_seconds if timeout_seconds is None else timeout_seconds)
+        semaphore = self._semaphore()
+        await asyncio.wait_for(semaphore.acquire(), self._remaining(deadline))
+        try:
+            attempt = 0
+            while True:
+                chunks = self._stream(prompt).__aiter__()
+                try:
+                    first_chunk = await asyncio.wait_for(chunks.__anext__(), self._remaining(deadline, attempt))
+                    break
+                except StopAsyncIteration:
+                    return
+                except TRANSIENT_ERRORS as error:
+                    await asyncio.sleep(self._retry_delay(error, attempt, deadline))
+                    attempt += 1
+            yield first_chunk
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), self._remaining(deadline, attempt))
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError as error:
+                    raise GeminiTimeout("Gemini stream exceeded its deadline") from error
+                yield chunk
+        finally:
+            semaphore.release()
+
+    async def _generate_bounded(self, prompt: str) -> str:
+        async with self._semaphore():
+            return await self._generate(prompt)
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background loop, starting it on first use (and again in a forked worker)."""
+        with self._loop_lock:
+            if self._loop is None or self._loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="gemini-client", daemon=True)
+                thread.start()
+                self._loop = loop
+                self._loop_pid = os.getpid()
+                self._semaphores = {}
+            return self._loop
+
+    def run(self, coroutine, timeout_seconds: float = None):
+        """
+        Run coroutine on the background loop and block until it finishes.
+        If it is still running after timeout_seconds it is cancelled and GeminiTimeout is raised.
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._event_loop())
+        try:
+            return future.result(timeout_seconds)
+        except TimeoutError as error:
+            if not future.done():
+                future.cancel()
+                raise GeminiTimeout("Gemini work did not finish in time and was cancelled") from error
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, async_iterable, timeout_seconds: float = None):
+        """
+        Consume async_iterable on the background loop and yield its items to the calling thread.
+        Closing the returned generator early (e.g. the HTTP client went away) cancels the producer.
+        """
+        items = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for item in async_iterable:
+                    items.put((True, item))
+            except Exception as error:
+                items.put((False, error))
+            else:
+                items.put((True, finished))
+            finally:
+                # Close the producer now rather than whenever the loop finalizes it, releasing its slot
+                if hasattr(async_iterable, "aclose"):
+                    await async_iterable.aclose()
+
+        deadline = None if timeout_seconds is None else self._clock() + timeout_seconds
+        future = asyncio.run_coroutine_threadsafe(pump(), self._event_loop())
+        try:
+            while True:
+                try:
+                    ok, item = items.get(timeout=None if deadline is None else max(0, deadline - self._clock()))
+                except queue.Empty:
+                    raise GeminiTimeout("Gemini work did not finish in time and was cancelled") from None
+                if not ok:
+                    raise item
+                if item is finished:
+                    return
+                yield item
+        finally:
+            future.cancel()
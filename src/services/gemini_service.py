@@ -1,37 +1,57 @@
-import json
+import asyncio
 import os
 import google.generativeai as genai
-from ..config import GOOGLE_API_KEY # Import API key from config
+from ..config import (GOOGLE_API_KEY, GEMINI_MAX_CONCURRENCY, GEMINI_TIMEOUT_SECONDS, GEMINI_MAX_RETRIES,
+                      GEMINI_BATCH_MAX_TOKENS, GEMINI_BATCH_MAX_WAIT_SECONDS, MODEL_BACKEND,
+                      FAKE_MODEL_LATENCY_MS, FAKE_MODEL_LATENCY_SIGMA, FAKE_MODEL_ERROR_RATE,
+                      FAKE_MODEL_MALFORMED_RATE, FAKE_MODEL_CHUNK_CHARS) # Import API key from config
+from .gemini_client import AsyncGeminiClient
+from .json_stream import JsonArrayParser, parse_json_array
+from .micro_batcher import MicroBatcher
+from .model_backends import make_backend
+from .prompt_template import PromptTemplate
 
 # Configure Gemini API (should be done in config, but ensure it's configured if this service is used directly)
 if GOOGLE_API_KEY:
     genai.configure(api_key=GOOGLE_API_KEY)
 
-def get_feedback_from_gemini(sentences_to_evaluate):
-    """
-    Sends sentences to Gemini API for feedback and returns structured feedback.
-    sentences_to_evaluate: A list of strings, where each string is a sentence.
-    """
-    if not GOOGLE_API_KEY:
-        print("Error: Gemini API key not configured. Skipping feedback.")
-        # Return a default feedback structure indicating an error or no feedback, along with debug info
-        return {
-            "feedback_list": [{"gemini_feedback": {"error": "API key not configured"}, "original_sentence": s} for s in sentences_to_evaluate],
-            "debug_info": {
-                "api_key_masked": GOOGLE_API_KEY[:4] + "..." if GOOGLE_API_KEY else "None",
-                "prompt_sent": "API key not configured, no prompt sent.",
-                "raw_response": "API key not configured, no response received.",
-                "error": "API key not configured."
-            }
-        }
+MODEL_NAME = "gemini-2.5-flash-preview-04-17"
+
+# The real API unless MODEL_BACKEND points at a local stand-in (see model_backends)
+model_backend = make_backend(
+    MODEL_BACKEND, MODEL_NAME,
+    latency_ms=FAKE_MODEL_LATENCY_MS,
+    latency_sigma=FAKE_MODEL_LATENCY_SIGMA,
+    error_rate=FAKE_MODEL_ERROR_RATE,
+    malformed_rate=FAKE_MODEL_MALFORMED_RATE,
+    chunk_chars=FAKE_MODEL_CHUNK_CHARS,
+)
+
+def use_model_backend(backend):
+    """Swap the model backend at runtime, e.g. for a load test run in-process."""
+    global model_backend
+    model_backend = backend
+    gemini_client.set_backend(backend.generate, stream=backend.stream)
+
+def is_configured():
+    """True if feedback requests can reach a model: an API key is set or the backend doesn't need one."""
+    return bool(GOOGLE_API_KEY) or not model_backend.needs_api_key
 
-    model = genai.GenerativeModel(
-        model_name="gemini-2.5-flash-preview-04-17",
-        generation_config={"response_mime_type": "application/json"}
-    )
+# Shared by every request thread; see gemini_client for the concurrency/deadline/retry policy
+gemini_client = AsyncGeminiClient(
+    model_backend.generate,
+    stream=model_backend.stream,
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    timeout_seconds=GEMINI_TIMEOUT_SECONDS,
+    max_retries=GEMINI_MAX_RETRIES,
+)
 
-    # Prepare the prompt for Gemini
-    prompt_parts = [
+# The instruction preamble is compiled once; each call only appends the sentence lines.
+# Bump the declared version when the prompt's meaning changes; the template's version also
+# includes a digest of its text, and it is part of the feedback cache key.
+FEEDBACK_PROMPT = PromptTemplate(
+    declared_version="1",
+    instructions=[
         "You are an expert Portuguese language tutor. Evaluate the following Portuguese sentences submitted by a student.",
         "Your response MUST be a single, valid JSON array. Each element in the array must be a JSON object corresponding to one input sentence, maintaining the original order.",
         "\nEach JSON object must strictly follow this structure:",
@@ -74,22 +94,129 @@ def get_feedback_from_gemini(sentences_to_evaluate):
         "- `feedback` should be `null` (the JSON null literal) if `is_portuguese` is `false`.",
         "- Ensure no trailing commas in objects or arrays.",
         "\nHere are the sentences to evaluate:"
-    ]
+    ],
+    # Each sentence, clearly indexed for the LLM
+    item_format="Sentence {index}: \"{item}\"",
+)
+PROMPT_VERSION = FEEDBACK_PROMPT.version
+
+async def _run_feedback_batch(sentences):
+    # Look the function up at call time so it can be patched in tests
+    result = await get_feedback_from_gemini_async(sentences)
+    feedback_list = result.get("feedback_list", [])
+    debug_info = result.get("debug_info", {})
+    return [(feedback_list[i] if i < len(feedback_list) else None, debug_info) for i in range(len(sentences))]
+
+# Packs sentences from concurrent requests into shared model calls under the token budget
+feedback_batcher = MicroBatcher(
+    _run_feedback_batch,
+    max_tokens=GEMINI_BATCH_MAX_TOKENS,
+    max_wait_seconds=GEMINI_BATCH_MAX_WAIT_SECONDS,
+    token_count=FEEDBACK_PROMPT.item_tokens,
+    base_tokens=FEEDBACK_PROMPT.base_tokens,
+)
+
+async def get_feedback_batched_async(sentences_to_evaluate):
+    """
+    Same result shape as get_feedback_from_gemini_async, but the sentences go through
+    feedback_batcher and may share model calls with other requests in flight. When they
+    span several calls, debug_info combines them and raw_response is None if any call failed.
+    """
+    results = await asyncio.gather(*(feedback_batcher.submit(sentence) for sentence in sentences_to_evaluate))
+
+    feedback_list = []
+    debug_infos = []
+    for sentence, (feedback_entry, debug_info) in zip(sentences_to_evaluate, results):
+        feedback_list.append(feedback_entry or {"gemini_feedback": {"error": "No feedback received from Gemini service."},
+                                                "original_sentence": sentence})
+        if not any(debug_info is seen for seen in debug_infos):
+            debug_infos.append(debug_info)
+
+    if len(debug_infos) == 1:
+        return {"feedback_list": feedback_list, "debug_info": debug_infos[0]}
+    raw_responses = [info.get("raw_response") for info in debug_infos]
+    errors = [info.get("error") for info in debug_infos if info.get("error")]
+    return {
+        "feedback_list": feedback_list,
+        "debug_info": {
+            "api_key_masked": GOOGLE_API_KEY[:4] + "..." if GOOGLE_API_KEY else "None",
+            "prompt_sent": "\n\n".join(str(info.get("prompt_sent")) for info in debug_infos),
+            "raw_response": None if any(raw is None for raw in raw_responses) else "\n\n".join(raw_responses),
+            "error": "; ".join(errors) or None
+        }
+    }
 
-    # Add each sentence to the prompt, clearly indexed for the LLM
-    for i, sentence_text in enumerate(sentences_to_evaluate):
-        prompt_parts.append(f"Sentence {i}: \"{sentence_text}\"")
+def get_feedback_from_gemini(sentences_to_evaluate):
+    """
+    Sends sentences to Gemini API for feedback and returns structured feedback.
+    sentences_to_evaluate: A list of strings, where each string is a sentence.
+    Blocking wrapper around get_feedback_from_gemini_async; the call is bounded by GEMINI_TIMEOUT_SECONDS.
+    """
+    return gemini_client.run(get_feedback_from_gemini_async(sentences_to_evaluate))
 
-    full_prompt = "\n".join(prompt_parts)
+async def stream_feedback_from_gemini_async(sentences_to_evaluate):
+    """
+    Streams feedback from Gemini, yielding (sentence index, feedback object) as soon as each
+    element of the response array is complete. Elements that aren't valid JSON are yielded as
+    error objects. Sentences the response never reached are simply not yielded, and errors from
+    the API call itself propagate to the caller.
+    """
+    if not is_configured():
+        print("Error: Gemini API key not configured. Skipping feedback.")
+        for i in range(len(sentences_to_evaluate)):
+            yield i, {"error": "API key not configured"}
+        return
+
+    full_prompt = FEEDBACK_PROMPT.render(sentences_to_evaluate)
+    print(f"Streaming prompt to Gemini: {full_prompt[:500]}...") # Log a snippet of the prompt
+
+    parser = JsonArrayParser()
+    chunks = gemini_client.stream(full_prompt)
+    try:
+        async for chunk in chunks:
+            for element in parser.feed(chunk):
+                if element.index >= len(sentences_to_evaluate):
+                    print(f"Ignoring extra element {element.index} in Gemini response")
+                    continue
+                if element.error is not None:
+                    print(f"Error parsing streamed Gemini element {element.index}: {element.error}")
+                    yield element.index, {"error": "Invalid response format from API"}
+                else:
+                    yield element.index, element.value
+            if parser.finished:
+                break
+        for element in parser.close():
+            if element.index < len(sentences_to_evaluate):
+                print(f"Gemini response was cut off in element {element.index}: {element.error}")
+                yield element.index, element.value if element.error is None else {"error": "Invalid response format from API"}
+    finally:
+        # Release the client's concurrency slot as soon as we stop reading
+        await chunks.aclose()
+
+async def get_feedback_from_gemini_async(sentences_to_evaluate):
+    """
+    Async version of get_feedback_from_gemini, run through the shared gemini_client.
+    """
+    if not is_configured():
+        print("Error: Gemini API key not configured. Skipping feedback.")
+        # Return a default feedback structure indicating an error or no feedback, along with debug info
+        return {
+            "feedback_list": [{"gemini_feedback": {"error": "API key not configured"}, "original_sentence": s} for s in sentences_to_evaluate],
+            "debug_info": {
+                "api_key_masked": GOOGLE_API_KEY[:4] + "..." if GOOGLE_API_KEY else "None",
+                "prompt_sent": "API key not configured, no prompt sent.",
+                "raw_response": "API key not configured, no response received.",
+                "error": "API key not configured."
+            }
+        }
+
+    full_prompt = FEEDBACK_PROMPT.render(sentences_to_evaluate)
 
     try:
         print(f"Sending prompt to Gemini: {full_prompt[:500]}...") # Log a snippet of the prompt
 
         try:
-            response = model.generate_content(full_prompt)
-            # Debug: Print raw response text
-            print(f"Gemini raw response: {response.text}")
-            response_text = response.text
+            response_text = await gemini_client.generate(full_prompt)
         except Exception as api_call_error:
             print(f"Error during Gemini API call or accessing response text: {api_call_error}")
             # Return an error structure indicating the API call failed
@@ -103,33 +230,16 @@ def get_feedback_from_gemini(sentences_to_evaluate):
                 }
             }
 
-        # The response_text should be a JSON string if response_mime_type worked.
-        feedback_list = json.loads(response_text)
-
-        # Ensure the feedback_list is indeed a list and has the correct length
-        if not isinstance(feedback_list, list) or len(feedback_list) != len(sentences_to_evaluate):
-            print(f"Error: Gemini response is not a list or length mismatch. Got: {feedback_list}")
-            # Fallback: return error feedback for each sentence
-            return {
-                "feedback_list": [{"gemini_feedback": {"error": "Invalid response format from API"}, "original_sentence": s} for s in sentences_to_evaluate],
-                 "debug_info": {
-                    "api_key_masked": GOOGLE_API_KEY[:4] + "..." if GOOGLE_API_KEY else "None",
-                    "prompt_sent": full_prompt,
-                    "raw_response": response_text,
-                    "error": "Invalid response format from API."
-                }
-            }
-
-        # Map feedback to original sentences based on index or order
-        # Assuming Gemini returns feedback in the same order as sentences were provided
-        # and includes original_sentence_index if we need more robust mapping.
-        # For now, we rely on order.
+        # Parse the array element by element, so one malformed object only costs that sentence
+        # its feedback; callers re-ask for the broken indexes instead of the whole batch.
+        feedback_values, broken_indexes = parse_json_array(response_text, len(sentences_to_evaluate))
+        if broken_indexes:
+            print(f"Error: could not parse Gemini feedback for sentence(s) {broken_indexes}")
 
         processed_feedback = []
-        for i, fb in enumerate(feedback_list):
-            # We expect 'fb' to be the structured feedback object.
-            # We'll add the original sentence text back for convenience if needed later,
-            # though the template will get it from the main sentence object.
+        for i, fb in enumerate(feedback_values):
+            if i in broken_indexes:
+                fb = {"error": "Invalid response format from API"}
             processed_feedback.append({
                 "gemini_feedback": fb, # This is the JSON object from Gemini
                 "original_sentence": sentences_to_evaluate[i] # Keep original for reference if needed
@@ -140,59 +250,11 @@ def get_feedback_from_gemini(sentences_to_evaluate):
                 "api_key_masked": GOOGLE_API_KEY[:4] + "..." if GOOGLE_API_KEY else "None",
                 "prompt_sent": full_prompt,
                 "raw_response": response_text,
-                "error": None
+                "broken_indexes": broken_indexes,
+                "error": f"Could not parse feedback for sentence(s) {broken_indexes}." if broken_indexes else None
             }
         }
 
-    except json.JSONDecodeError as json_error:
-        print(f"Error parsing Gemini JSON response: {json_error}. Attempting to extract JSON.")
-        # Attempt to extract JSON from the raw response text
-        extracted_json_text = None
-        try:
-            start_index = response_text.find('[')
-            end_index = response_text.rfind(']')
-            if start_index != -1 and end_index != -1 and end_index > start_index:
-                extracted_json_text = response_text[start_index : end_index + 1]
-                feedback_list = json.loads(extracted_json_text)
-                print("Successfully extracted and parsed JSON.")
-                 # Ensure the feedback_list is indeed a list and has the correct length
-                if not isinstance(feedback_list, list) or len(feedback_list) != len(sentences_to_evaluate):
-                    print(f"Error: Extracted Gemini response is not a list or length mismatch. Got: {feedback_list}")
-                    raise ValueError("Extracted JSON has invalid format or length.") # Raise to be caught by the outer except
-
-                processed_feedback = []
-                for i, fb in enumerate(feedback_list):
-                    processed_feedback.append({
-                        "gemini_feedback": fb,
-                        "original_sentence": sentences_to_evaluate[i]
-                    })
-                return {
-                    "feedback_list": processed_feedback,
-                    "debug_info": {
-                        "api_key_masked": GOOGLE_API_KEY[:4] + "..." if GOOGLE_API_KEY else "None",
-                        "prompt_sent": full_prompt,
-                        "raw_response": response_text if 'response_text' in locals() else None, # Include raw response if available
-                        "error": "JSON extracted and parsed successfully after initial error."
-                    }
-                }
-
-            else:
-                print("Could not extract valid JSON from response.")
-                raise ValueError("Could not extract valid JSON from response.") # Raise to be caught by the outer except
-
-        except Exception as extraction_error:
-            print(f"Error during JSON extraction or parsing of extracted text: {extraction_error}")
-            # Return a default error structure for each sentence, along with debug info
-            return {
-                "feedback_list": [{"gemini_feedback": {"error": f"JSON parsing and extraction error: {json_error}, Extraction error: {extraction_error}"}, "original_sentence": s} for s in sentences_to_evaluate],
-                "debug_info": {
-                    "api_key_masked": GOOGLE_API_KEY[:4] + "..." if GOOGLE_API_KEY else "None",
-                    "prompt_sent": full_prompt,
-                    "raw_response": response_text if 'response_text' in locals() else None, # Include raw response if available
-                    "error": f"JSON parsing error: {json_error}, Extraction error: {extraction_error}"
-                }
-            }
-
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         # Catch any other unexpected errors
@@ -0,0 +1,203 @@
+"""
+Incremental, tolerant parsing of a JSON array as it streams in.
+
+The model answers with one JSON array whose elements are the per-sentence feedback
+objects. JsonArrayScanner is fed text chunks as they arrive and hands back the raw text
+of each top-level element as soon as it is complete, so callers can parse and forward
+one sentence's feedback without waiting for the rest of the response.
+
+Elements are parsed one at a time, after repairing the mistakes models commonly make
+(comments, trailing commas, raw newlines in strings, Python literals). An element that
+still won't parse is reported by index, so only that sentence needs asking again.
+"""
+import json
+import re
+from collections import namedtuple
+
+
+class JsonArrayScanner:
+    """Splits a streamed top-level JSON array into the text of its elements."""
+
+    def __init__(self):
+        self._started = False # seen the opening '['
+        self._finished = False # seen the closing ']'
+        self._depth = 0 # nesting depth inside the top-level array
+        self._in_string = False
+        self._escaped = False
+        self._in_comment = False # inside a // or # line comment, which models sometimes copy from the prompt
+        self._slash = False # saw one '/' that may start a comment
+        self._element = [] # characters of the element being scanned
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def feed(self, chunk: str) -> list:
+        """Consume chunk and return the text of every element it completed, in order."""
+        elements = []
+        for char in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                # Skip anything before the array, e.g. a ```json fence
+                if char == "[":
+                    self._started = True
+                continue
+
+            if self._in_string:
+                self._element.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if self._in_comment:
+                if char == "\n":
+                    self._in_comment = False
+                continue
+            if self._slash:
+                self._slash = False
+                if char == "/":
+                    self._in_comment = True
+                    continue
+                self._element.append("/")
+            if char == "/":
+                self._slash = True
+                continue
+            if char == "#":
+                self._in_comment = True
+                continue
+
+            if self._depth == 0 and char in ",]":
+                # End of a scalar element (containers were emitted when they closed)
+                self._emit(elements)
+                if char == "]":
+                    self._finished = True
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+            if self._element or not char.isspace():
+                self._element.append(char)
+            if self._depth == 0 and char in "}]":
+                self._emit(elements)
+        return elements
+
+    def _emit(self, elements: list):
+        text = "".join(self._element).strip()
+        self._element = []
+        if text:
+            elements.append(text)
+
+    def pending(self) -> str:
+        """Text of the element being scanned when the input stopped, if any."""
+        return "".join(self._element).strip()
+
+
+ParsedElement = namedtuple("ParsedElement", ["index", "value", "error"]) # error is None if value parsed
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_BARE_WORD = re.compile(r"[A-Za-z_]+")
+
+
+def repair_json(text: str) -> str:
+    """Fix common LLM JSON mistakes outside string literals; the result may still be invalid."""
+    out = []
+    in_string = False
+    escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n" # raw newlines aren't allowed inside JSON strings
+            elif char == "\t":
+                char = "\\t"
+            out.append(char)
+            i += 1
+            continue
+        if char == '"':
+            in_string = True
+        elif text.startswith("//", i) or char == "#":
+            # Line comment, as in the prompt's example objects
+            end = text.find("\n", i)
+            i = len(text) if end == -1 else end
+            continue
+        elif char.isalpha():
+            word = _BARE_WORD.match(text, i).group()
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        out.append(char)
+        i += 1
+    return _TRAILING_COMMA.sub(r"\1", "".join(out))
+
+
+def parse_element(text: str):
+    """Parse one element's JSON text, repairing it if needed; raises ValueError if it can't be."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(repair_json(text))
+
+
+class JsonArrayParser:
+    """Feeds chunks through a JsonArrayScanner and parses each element as it completes."""
+
+    def __init__(self):
+        self._scanner = JsonArrayScanner()
+        self._index = 0
+
+    @property
+    def finished(self) -> bool:
+        return self._scanner.finished
+
+    def feed(self, chunk: str) -> list:
+        """Return a ParsedElement for every element chunk completed."""
+        return [self._parse(text) for text in self._scanner.feed(chunk)]
+
+    def close(self) -> list:
+        """Report the element that was cut off when the input ended, if any."""
+        text = self._scanner.pending()
+        if self._scanner.finished or not text:
+            return []
+        return [self._parse(text)]
+
+    def _parse(self, text: str) -> ParsedElement:
+        index = self._index
+        self._index += 1
+        try:
+            return ParsedElement(index, parse_element(text), None)
+        except ValueError as error:
+            return ParsedElement(index, None, f"{error} in {text[:200]!r}")
+
+
+def parse_json_array(text: str, expected_count: int):
+    """
+    Parse an array of expected_count elements from text, element by element.
+    Returns (values, broken_indexes): values[i] is None for every index in broken_indexes,
+    which includes elements that didn't parse and ones the text never reached.
+    """
+    parser = JsonArrayParser()
+    values = [None] * expected_count
+    parsed_indexes = set()
+    for element in parser.feed(text) + parser.close():
+        if element.error is None and element.index < expected_count:
+            values[element.index] = element.value
+            parsed_indexes.add(element.index)
+    broken_indexes = [i for i in range(expected_count) if i not in parsed_indexes]
+    return values, broken_indexes
@@ -0,0 +1,90 @@
+"""
+Micro-batching of work items submitted by concurrent callers.
+
+Each caller awaits submit(item). Items are collected until the batch would exceed its
+token budget or the max-wait window since the first pending item elapses, then the
+whole batch goes to run_batch in one call and each caller gets back its own result.
+"""
+import asyncio
+
+
+class MicroBatcher:
+    """Packs concurrently submitted items into batches under a token budget and a max wait."""
+
+    def __init__(self, run_batch, max_tokens: int, max_wait_seconds: float, max_items: int = None,
+                 token_count=len, base_tokens: int = 0):
+        self._run_batch = run_batch # async run_batch(items) -> list of results, one per item, same order
+        self.max_tokens = max_tokens
+        self.max_wait_seconds = max_wait_seconds
+        self.max_items = max_items
+        self._token_count = token_count
+        self.base_tokens = base_tokens # fixed cost of every batch, e.g. the prompt preamble
+        self._loop = None
+        self._reset(None)
+        self.batches_run = 0
+        self.items_run = 0
+
+    def _reset(self, loop):
+        # Futures and timers belong to one event loop; pending work from another loop is abandoned
+        self._loop = loop
+        self._pending = [] # [(item, future)]
+        self._pending_tokens = self.base_tokens
+        self._timer = None
+        self._tasks = set()
+
+    def _full(self, extra_tokens: int = 0) -> bool:
+        if self.max_items is not None and len(self._pending) >= self.max_items:
+            return True
+        return self._pending_tokens + extra_tokens > self.max_tokens
+
+    async def submit(self, item):
+        """Queue item for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._reset(loop)
+
+        tokens = self._token_count(item)
+        if self._pending and self._full(tokens):
+            self._flush()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._pending_tokens += tokens
+        if self._full():
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        # A caller that is cancelled only drops its own result; the batch still runs for the others
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self._pending
+        self._pending = []
+        self._pending_tokens = self.base_tokens
+        if batch:
+            task = self._loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        live = [(item, future) for item, future in batch if not future.done()]
+        if not live:
+            return
+        self.batches_run += 1
+        self.items_run += len(live)
+        try:
+            results = await self._run_batch([item for item, _ in live])
+        except Exception as error:
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for position, (_, future) in enumerate(live):
+            if future.done():
+                continue
+            if position < len(results):
+                future.set_result(results[position])
+            else:
+                future.set_exception(ValueError(f"run_batch returned {len(results)} results for {len(live)} items"))
@@ -0,0 +1,197 @@
+"""
+Pluggable model backends for gemini_service.
+
+A backend provides `async generate(prompt) -> str` and an async-generator
+`stream(prompt)` of text chunks, which AsyncGeminiClient wraps with its concurrency,
+deadline and retry policy, plus a `cache_namespace` that keeps its answers apart from
+other backends' in the feedback cache. MODEL_BACKEND selects one:
+
+    gemini          the real Gemini API (default)
+    fake            FakeModelBackend, an in-process stand-in with configurable latency
+                    distribution, error rate, malformed-JSON rate and streaming
+    http://host:port  HttpModelBackend, talking to `python -m src.fake_model_server`, so
+                    several app processes can share one fake with the same settings
+
+The fakes make the feedback path benchmarkable without an API key or network.
+"""
+import asyncio
+import codecs
+import json
+import math
+import random
+import re
+import urllib.error
+import urllib.request
+from collections import namedtuple
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+
+class GeminiBackend:
+    """The real Gemini API through google.generativeai."""
+
+    needs_api_key = True
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        # Feedback cached from this backend is only served back from the same backend
+        self.cache_namespace = f"gemini:{model_name}"
+        self._model = None
+
+    def model(self):
+        # Built once; GenerativeModel holds no per-request state
+        if self._model is None:
+            self._model = genai.GenerativeModel(
+                model_name=self.model_name,
+                generation_config={"response_mime_type": "application/json"}
+            )
+        return self._model
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.model().generate_content_async(prompt)
+        # Debug: Print raw response text
+        print(f"Gemini raw response: {response.text}")
+        return response.text
+
+    async def stream(self, prompt: str):
+        response = await self.model().generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            yield chunk.text
+
+
+FakeReply = namedtuple("FakeReply", ["latency_seconds", "error", "text"]) # error is None or an exception to raise
+
+_PROMPT_SENTENCE = re.compile(r'^Sentence (\d+): "(.*)"$', re.MULTILINE)
+
+
+class FakeModelBackend:
+    """
+    Answers feedback prompts locally with well-formed feedback for every "Sentence i:" line.
+    Latency is log-normal around latency_ms (sigma=0 makes it constant); error_rate of calls
+    fail with ServiceUnavailable and malformed_rate of array elements come back as broken JSON.
+    """
+
+    needs_api_key = False
+    cache_namespace = "fake"
+
+    def __init__(self, latency_ms: float = 800.0, latency_sigma: float = 0.5, error_rate: float = 0.0,
+                 malformed_rate: float = 0.0, chunk_chars: int = 64, rng: random.Random = None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.chunk_chars = chunk_chars
+        self._rng = rng or random.Random()
+        self.calls = 0
+
+    def _latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        return self._rng.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    def _element(self, index: int, sentence: str) -> str:
+        element = json.dumps({
+            "original_sentence_index": str(index),
+            "is_portuguese": True,
+            "feedback": {
+                "grammar_analysis": "The sentence is grammatically correct.",
+                "spelling_errors": [],
+                "naturalness_evaluation": "Sounds natural.",
+                "suggestions": [],
+            },
+            "overall_comment": f"Good sentence: {sentence}",
+        }, ensure_ascii=False)
+        if self._rng.random() < self.malformed_rate:
+            # The kind of damage models actually do: a bare word where a literal belongs
+            element = element.replace('"is_portuguese": true', '"is_portuguese": tru', 1)
+        return element
+
+    def plan(self, prompt: str) -> FakeReply:
+        """Decide this call's latency, failure and response text up front."""
+        self.calls += 1
+        latency = self._latency()
+        if self._rng.random() < self.error_rate:
+            return FakeReply(latency, google_exceptions.ServiceUnavailable("fake model: injected error"), None)
+        elements = [self._element(int(index), sentence) for index, sentence in _PROMPT_SENTENCE.findall(prompt)]
+        return FakeReply(latency, None, "[" + ",\n".join(elements) + "]")
+
+    def chunks(self, text: str) -> list:
+        size = max(1, self.chunk_chars)
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    async def generate(self, prompt: str) -> str:
+        reply = self.plan(prompt)
+        await asyncio.sleep(reply.latency_seconds)
+        if reply.error is not None:
+            raise reply.error
+        return reply.text
+
+    async def stream(self, prompt: str):
+        reply = self.plan(prompt)
+        chunks = self.chunks(reply.text or "")
+        # A third of the latency is time to first token, the rest is spread over the chunks
+        await asyncio.sleep(reply.latency_seconds / 3)
+        if reply.error is not None:
+            raise reply.error
+        for chunk in chunks:
+            await asyncio.sleep(reply.latency_seconds * 2 / 3 / len(chunks))
+            yield chunk
+
+
+class HttpModelBackend:
+    """Client for src.fake_model_server; requests run in worker threads so the event loop stays free."""
+
+    needs_api_key = False
+
+    def __init__(self, base_url: str, timeout_seconds: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.cache_namespace = f"fake-server:{self.base_url}"
+        self.timeout_seconds = timeout_seconds
+
+    def _open(self, path: str, prompt: str):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps({"prompt": prompt}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout_seconds)
+        except urllib.error.HTTPError as error:
+            if error.code in (429, 503):
+                raise google_exceptions.ServiceUnavailable(f"fake model server returned {error.code}") from error
+            raise
+
+    def _generate(self, prompt: str) -> str:
+        with self._open("/generate", prompt) as response:
+            return response.read().decode("utf-8")
+
+    async def generate(self, prompt: str) -> str:
+        return await asyncio.to_thread(self._generate, prompt)
+
+    async def stream(self, prompt: str):
+        response = await asyncio.to_thread(self._open, "/stream", prompt)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            while True:
+                data = await asyncio.to_thread(response.read1, 65536)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    yield text
+        finally:
+            response.close()
+
+
+def make_backend(spec: str, model_name: str, **fake_options):
+    """Build the backend named by spec ("gemini", "fake" or a fake server URL)."""
+    spec = (spec or "gemini").strip()
+    if spec == "gemini":
+        return GeminiBackend(model_name)
+    if spec == "fake":
+        return FakeModelBackend(**fake_options)
+    if spec.startswith(("http://", "https://")):
+        return HttpModelBackend(spec)
+    raise ValueError(f"Unknown MODEL_BACKEND {spec!r}; expected 'gemini', 'fake' or a fake server URL")
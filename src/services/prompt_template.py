@@ -0,0 +1,37 @@
+"""
+Compiled, versioned prompt templates.
+
+The instruction preamble is joined once when the template is created, and rendering a
+prompt only appends the per-item lines. The template's version combines a declared
+version with a digest of its text, so editing the prompt changes the version (and with
+it every cache key derived from it) even if nobody remembers to bump the number.
+"""
+import hashlib
+import math
+
+CHARS_PER_TOKEN = 4 # rough average for Gemini's tokenizer on mixed English/Portuguese text
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-bound-ish token estimate; good enough for packing batches under a budget."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class PromptTemplate:
+    """A fixed preamble followed by one formatted line per item."""
+
+    def __init__(self, declared_version: str, instructions: list, item_format: str):
+        self.declared_version = declared_version
+        self.preamble = "\n".join(instructions)
+        self.item_format = item_format # str.format pattern with {index} and {item}
+        digest = hashlib.sha256(f"{self.preamble}\x1e{self.item_format}".encode("utf-8")).hexdigest()
+        self.version = f"{declared_version}-{digest[:12]}"
+        self.base_tokens = estimate_tokens(self.preamble)
+
+    def render(self, items) -> str:
+        lines = [self.item_format.format(index=i, item=item) for i, item in enumerate(items)]
+        return "\n".join([self.preamble] + lines)
+
+    def item_tokens(self, item) -> int:
+        """Tokens one item adds to a rendered prompt (its line plus the joining newline)."""
+        return estimate_tokens(self.item_format.format(index=0, item=item)) + 1
@@ -0,0 +1,155 @@
+"""
+Fast, offline pre-check of practice sentences before they are sent to Gemini.
+
+Obvious cases (empty input, text that isn't Portuguese, a sentence that doesn't use the
+form being practised or uses it with the wrong subject) get deterministic feedback in the
+same shape as the model's, instantly and for free. Only plausible sentences need the model.
+"""
+import re
+import unicodedata
+from collections import namedtuple
+
+from ..core_data import PRONOUNS
+
+_WORD = re.compile(r"[^\W\d_]+")
+_PORTUGUESE_LETTERS = set("ãõçáéíóúâêôà")
+
+# Subject words that take each PRONOUNS slot's verb form
+PRONOUN_SLOTS = {
+    "eu": {"eu"},
+    "ele": {"ele", "ela", "você"},
+    "nós": {"nós"},
+    "eles": {"eles", "elas", "vocês"},
+}
+_SLOT_BY_SUBJECT = {subject: slot for slot in PRONOUNS for subject in PRONOUN_SLOTS.get(slot, {slot})}
+
+# Words that can sit between a subject and its verb ("eu não me lembro")
+_BETWEEN_SUBJECT_AND_VERB = {"não", "nunca", "já", "também", "ainda", "sempre", "só", "me", "te", "se", "nos",
+                             "lhe", "lhes", "o", "a", "os", "as"}
+
+# Words that join a subject to others before it ("minha mãe e eu")
+_COORDINATORS = {"e", "ou", "nem"}
+
+PORTUGUESE_WORDS = {
+    "o", "a", "os", "as", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das", "em", "no", "na", "nos",
+    "nas", "por", "pelo", "pela", "para", "com", "sem", "que", "e", "é", "não", "mas", "se", "como", "mais",
+    "muito", "muita", "eu", "ele", "ela", "nós", "eles", "elas", "você", "vocês", "meu", "minha", "seu", "sua",
+    "este", "esta", "isso", "isto", "aquele", "aquela", "ao", "aos", "à", "às", "já", "também", "quando",
+    "onde", "porque", "hoje", "ontem", "amanhã", "sempre", "nunca", "todo", "toda", "todos", "casa", "bem",
+    "me", "te", "lhe", "aqui", "ali", "agora", "depois", "antes", "ainda", "só", "cedo", "tarde",
+}
+ENGLISH_WORDS = {
+    "the", "is", "are", "and", "to", "of", "it", "you", "i", "he", "she", "we", "they", "my", "this", "that",
+    "was", "were", "have", "has", "with", "for", "not", "do", "does", "what", "hello", "hi", "yes", "be",
+    "will", "would", "can", "your", "his", "her", "our", "their", "an", "at", "on", "in", "from", "there",
+}
+
+CheckResult = namedtuple("CheckResult", ["verdict", "feedback"]) # feedback is None when the model is needed
+
+PLAUSIBLE = "plausible"
+EMPTY = "empty"
+NOT_PORTUGUESE = "not_portuguese"
+MISSING_FORM = "missing_form"
+WRONG_SUBJECT = "wrong_subject"
+
+
+def tokenize(sentence: str) -> list:
+    """Lower-cased words of sentence; punctuation, digits and hyphens (diz-me) split words."""
+    return _WORD.findall(unicodedata.normalize("NFC", sentence or "").lower())
+
+
+def strip_accents(word: str) -> str:
+    decomposed = unicodedata.normalize("NFD", word)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def contains_form(sentence: str, form: str) -> bool:
+    """True if form appears as a whole word of sentence (case-insensitive)."""
+    return unicodedata.normalize("NFC", form.lower()) in tokenize(sentence)
+
+
+def detect_portuguese(tokens: list, known_forms=()):
+    """True if tokens look Portuguese, False if they clearly don't, None if there's too little to tell."""
+    portuguese_hits = sum(1 for token in tokens
+                          if token in PORTUGUESE_WORDS or token in known_forms or _PORTUGUESE_LETTERS & set(token))
+    english_hits = sum(1 for token in tokens if token in ENGLISH_WORDS and token not in PORTUGUESE_WORDS)
+    if portuguese_hits > english_hits:
+        return True
+    if english_hits and english_hits >= portuguese_hits:
+        return False
+    return None
+
+
+def _subject_slot(tokens: list, form_position: int):
+    """
+    Slot of the explicit subject right before the verb at form_position, if there is one.
+    None for a coordinated subject ("minha mãe e eu", "ele ou ela"): its slot depends on the
+    whole phrase, which is the model's call.
+    """
+    position = form_position - 1
+    while position >= 0 and tokens[position] in _BETWEEN_SUBJECT_AND_VERB:
+        position -= 1
+    if position < 0:
+        return None
+    if position > 0 and tokens[position - 1] in _COORDINATORS:
+        return None
+    return _SLOT_BY_SUBJECT.get(tokens[position])
+
+
+def _feedback(is_portuguese: bool, comment: str, grammar: str = None, spelling_errors=(), suggestions=()):
+    return {
+        "is_portuguese": is_portuguese,
+        "feedback": {
+            "grammar_analysis": grammar or "",
+            "spelling_errors": list(spelling_errors),
+            "naturalness_evaluation": "",
+            "suggestions": list(suggestions),
+        } if is_portuguese else None,
+        "overall_comment": comment,
+        "precheck": True,
+    }
+
+
+def check_sentence(sentence: str, verb: str, tense: str, pronoun: str, correct_form: str,
+                   tense_forms=None, known_forms=()) -> CheckResult:
+    """
+    Pre-check one practice sentence. Returns CheckResult(verdict, feedback); feedback is a
+    model-shaped feedback object for obvious cases and None when the sentence should go to Gemini.
+    tense_forms: the verb's forms for tense in PRONOUNS order, so a form shared by several
+    pronouns (eu/ele falava) isn't flagged. known_forms: verb forms the language detector counts as Portuguese.
+    """
+    tokens = tokenize(sentence)
+    if not tokens:
+        return CheckResult(EMPTY, _feedback(False, "No sentence was written."))
+
+    form = unicodedata.normalize("NFC", (correct_form or "").lower())
+    language = detect_portuguese(tokens, known_forms)
+    if language is False and form not in tokens:
+        return CheckResult(NOT_PORTUGUESE, _feedback(
+            False, "This does not appear to be a Portuguese sentence. Write a Portuguese sentence that uses "
+                   f"\"{correct_form}\"."))
+
+    if form not in tokens:
+        bare_form = strip_accents(form)
+        misspelled = [token for token in tokens if token != form and strip_accents(token) == bare_form]
+        if misspelled:
+            return CheckResult(MISSING_FORM, _feedback(
+                True, f"Almost: \"{misspelled[0]}\" needs its accent.",
+                grammar=f"The {tense} form of \"{verb}\" for \"{pronoun}\" is spelled \"{correct_form}\".",
+                spelling_errors=[{"error": misspelled[0], "correction": correct_form}]))
+        return CheckResult(MISSING_FORM, _feedback(
+            True, f"The sentence doesn't use \"{correct_form}\".",
+            grammar=f"This exercise practises \"{correct_form}\", the {tense} form of \"{verb}\" for \"{pronoun}\", "
+                    "but it doesn't appear in the sentence.",
+            suggestions=[f"Write a sentence with \"{pronoun} {correct_form}\"."]))
+
+    subject_slot = _subject_slot(tokens, tokens.index(form))
+    shared_form = tense_forms is not None and subject_slot is not None and tense_forms[PRONOUNS.index(subject_slot)] == form
+    if subject_slot is not None and pronoun in PRONOUNS and subject_slot != pronoun and not shared_form:
+        return CheckResult(WRONG_SUBJECT, _feedback(
+            True, f"\"{correct_form}\" goes with \"{pronoun}\", not \"{subject_slot}\".",
+            grammar=f"\"{correct_form}\" is the form of \"{verb}\" for \"{pronoun}\", but its subject here takes "
+                    f"the \"{subject_slot}\" form.",
+            suggestions=[f"Use \"{correct_form}\" with \"{pronoun}\" as the subject."]))
+
+    return CheckResult(PLAUSIBLE, None)
@@ -0,0 +1,114 @@
+"""
+Compact encoding of the exercise flow's session state.
+
+The session used to hold [verb, tense] string pairs and error dicts that repeat verb,
+tense, pronoun and the correct form, all of which the conjugation table already knows.
+Here an exercise is one integer (verb_id * tense_count + tense_id) and an error is a
+packed record [cell, user_answer], where cell also folds in the pronoun index; the
+correct form is looked up again on decode. Ids are only meaningful for one catalogue
+shape, so the session also carries state_tag(): a format version plus the catalogue
+fingerprint, and state written under another tag is treated as expired.
+
+Routes keep packed values in the session and decode them at the edges (rendering,
+grading, saving), so templates and services still see the familiar dicts.
+"""
+from functools import lru_cache
+
+from ..core_data import PRONOUNS, CATALOGUE_FINGERPRINT, get_conjugation_table
+
+STATE_VERSION = 1
+STATE_VERSION_KEY = 'state_version'
+
+
+@lru_cache(maxsize=1)
+def state_tag() -> str:
+    """Version tag stored with packed state: format version and the catalogue it indexes into."""
+    return f"{STATE_VERSION}.{CATALOGUE_FINGERPRINT.hex()[:8]}"
+
+
+def is_current(session) -> bool:
+    """True if session's packed state was written with this format and catalogue."""
+    return session.get(STATE_VERSION_KEY) == state_tag()
+
+
+def encode_exercise(verb: str, tense: str) -> int:
+    table = get_conjugation_table()
+    verb_id, tense_id = table.verb_id(verb), table.tense_id(tense)
+    if verb_id is None or tense_id is None:
+        raise KeyError(f"{verb} {tense} is not in the conjugation table")
+    return verb_id * len(table.tenses) + tense_id
+
+
+def decode_exercise(exercise_id: int) -> tuple:
+    table = get_conjugation_table()
+    verb_id, tense_id = divmod(exercise_id, len(table.tenses))
+    return table.verbs[verb_id], table.tenses[tense_id]
+
+
+def encode_exercises(exercises) -> list:
+    """[(verb, tense), ...] -> [exercise_id, ...]"""
+    return [encode_exercise(verb, tense) for verb, tense in exercises]
+
+
+def decode_exercises(exercise_ids) -> list:
+    return [decode_exercise(exercise_id) for exercise_id in exercise_ids]
+
+
+def _cell(verb: str, tense: str, pronoun: str) -> int:
+    return encode_exercise(verb, tense) * len(PRONOUNS) + PRONOUNS.index(pronoun)
+
+
+def _uncell(cell: int) -> tuple:
+    """cell -> (verb, tense, pronoun, correct form)"""
+    exercise_id, pronoun_idx = divmod(cell, len(PRONOUNS))
+    table = get_conjugation_table()
+    verb_id, tense_id = divmod(exercise_id, len(table.tenses))
+    return table.verbs[verb_id], table.tenses[tense_id], PRONOUNS[pronoun_idx], table.form(verb_id, tense_id, pronoun_idx)
+
+
+def encode_error(error: dict) -> list:
+    """{'verb', 'tense', 'pronoun', 'correct', 'user_answer'} -> [cell, user_answer]"""
+    return [_cell(error['verb'], error['tense'], error['pronoun']), error.get('user_answer', '')]
+
+
+def decode_error(record) -> dict:
+    verb, tense, pronoun, correct = _uncell(record[0])
+    return {'verb': verb, 'tense': tense, 'pronoun': pronoun, 'correct': correct, 'user_answer': record[1]}
+
+
+def encode_errors(errors) -> list:
+    return [encode_error(error) for error in errors]
+
+
+def decode_errors(records) -> list:
+    return [decode_error(record) for record in records]
+
+
+SENTENCE_PRACTICE_LIMIT = 5
+
+
+def split_errors(errors) -> tuple:
+    """Split a set's errors (packed or not) into (sentence practice, word remediation): the first five write sentences."""
+    if len(errors) > SENTENCE_PRACTICE_LIMIT:
+        return errors[:SENTENCE_PRACTICE_LIMIT], errors[SENTENCE_PRACTICE_LIMIT:]
+    return errors, []
+
+
+def encode_remediation_result(result: dict) -> list:
+    """{'error', 'user_answer', 'is_correct'} -> [cell, original answer, remediation answer, is_correct]"""
+    return encode_error(result['error']) + [result['user_answer'], int(result['is_correct'])]
+
+
+def decode_remediation_result(record) -> dict:
+    return {'error': decode_error(record[:2]), 'user_answer': record[2], 'is_correct': bool(record[3])}
+
+
+def encode_sentence_result(result: dict) -> list:
+    """Sentence practice result dict -> [cell, sentence, is_correct]; its index is its list position."""
+    return [_cell(result['verb'], result['tense'], result['pronoun']), result['sentence'], int(result['is_correct'])]
+
+
+def decode_sentence_result(record, index: int) -> dict:
+    verb, tense, pronoun, correct = _uncell(record[0])
+    return {'verb': verb, 'tense': tense, 'pronoun': pronoun, 'correct_form': correct,
+            'sentence': record[1], 'is_correct': bool(record[2]), 'index': index}
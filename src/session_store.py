@@ -0,0 +1,190 @@
+"""
+Server-side Flask sessions.
+
+The exercise flow keeps exercises, errors and results in the session. With Flask's default
+cookie session that whole blob is serialized, signed and sent on every request and
+response, and it stops working once it outgrows the browser's ~4KB cookie limit. Here the
+cookie carries only a random session id and the data lives on the server:
+
+    MemorySessionStore   in-process LRU with a TTL; fine for a single worker
+    SqliteSessionStore   a local SQLite file shared by every worker on the node
+
+`session[...]` works exactly as before. Sessions are written back only when their
+serialized contents changed, which also catches in-place edits such as
+session['all_errors_in_session'].extend(...).
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its id and what it looked like when loaded."""
+
+    def __init__(self, initial=None, sid: str = None, new: bool = False, loaded_payload: str = None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.loaded_payload = loaded_payload # serialized form at load time, None for new sessions
+
+
+class MemorySessionStore:
+    """Bounded in-process store; least recently used sessions are evicted first."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 43200, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict() # sid -> (expires_at, payload)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, sid: str):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return entry[1]
+
+    def set(self, sid: str, payload: str):
+        with self._lock:
+            self._entries[sid] = (self._clock() + self.ttl_seconds, payload)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def touch(self, sid: str):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None:
+                self._entries[sid] = (self._clock() + self.ttl_seconds, entry[1])
+
+    def delete(self, sid: str):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class SqliteSessionStore:
+    """Sessions in a local SQLite file (WAL mode), so every worker process sees the same data."""
+
+    def __init__(self, path: str, ttl_seconds: float = 43200, clock=time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock # wall clock: expiry times are shared between processes
+        self._local = threading.local() # sqlite3 connections can't be shared across threads
+        self._writes = 0
+
+    def _db(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, sid: str):
+        row = self._db().execute(
+            "SELECT payload FROM sessions WHERE sid = ? AND expires_at > ?", (sid, self._clock())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid: str, payload: str):
+        db = self._db()
+        db.execute(
+            "INSERT INTO sessions (sid, payload, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(sid) DO UPDATE SET payload = excluded.payload, expires_at = excluded.expires_at",
+            (sid, payload, self._clock() + self.ttl_seconds),
+        )
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            # Expired rows are never read again; clear them out now and then
+            db.execute("DELETE FROM sessions WHERE expires_at <= ?", (self._clock(),))
+
+    def touch(self, sid: str):
+        self._db().execute("UPDATE sessions SET expires_at = ? WHERE sid = ?", (self._clock() + self.ttl_seconds, sid))
+
+    def delete(self, sid: str):
+        self._db().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface that keeps session data in a store and only an id in the cookie."""
+
+    serializer = TaggedJSONSerializer() # same encoding as Flask's cookie sessions, so tuples etc. round-trip
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            payload = self.store.get(sid)
+            if payload is not None:
+                try:
+                    return ServerSideSession(self.serializer.loads(payload), sid=sid, loaded_payload=payload)
+                except ValueError:
+                    pass # unreadable entry; start over
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.loaded_payload is not None:
+                self.store.delete(session.sid)
+            if session.modified and not session.new:
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        payload = self.serializer.dumps(dict(session))
+        if payload != session.loaded_payload:
+            self.store.set(session.sid, payload)
+        elif self.should_set_cookie(app, session):
+            self.store.touch(session.sid)
+        else:
+            return
+        response.vary.add("Cookie")
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def make_session_interface(backend: str, path: str = None, max_entries: int = 10000, ttl_seconds: float = 43200):
+    """Session interface for SESSION_BACKEND: "memory", "sqlite", or None for Flask's cookie session."""
+    if backend == "cookie":
+        return None
+    if backend == "memory":
+        return ServerSideSessionInterface(MemorySessionStore(max_entries, ttl_seconds))
+    if backend == "sqlite":
+        return ServerSideSessionInterface(SqliteSessionStore(path, ttl_seconds))
+    raise ValueError(f"Unknown SESSION_BACKEND {backend!r}; expected 'memory', 'sqlite' or 'cookie'")
@@ -0,0 +1,316 @@
+"""
+Compiled, memory-mapped verb catalogue.
+
+`python -m src.verb_catalogue` compiles core_data's catalogue into a binary file.
+MappedCatalogue opens it read-only with mmap, so every worker process shares the
+same physical pages and only the verbs a request touches get decoded.
+
+File layout (little-endian):
+    header      magic, version, verb/tense/pronoun counts, catalogue fingerprint
+    sections    (offset, length) for each section below
+    names       uint32 offsets + UTF-8 blob: verbs, tenses, tense display names, pronouns
+    verb_index  uint32 verb ids sorted by UTF-8 name, for binary-search lookups
+    forms       uint32 offsets + UTF-8 blob, one slot per (verb, tense, pronoun)
+    present     one byte per (verb, tense): 1 if the verb has that tense
+"""
+import argparse
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from .conjugation_table import VerbsView
+
+MAGIC = b"CJGCAT\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIII32s")
+_SECTION = struct.Struct("<QQ")
+_SECTION_NAMES = ("name_offsets", "names", "verb_index", "form_offsets", "forms", "present")
+
+
+def catalogue_fingerprint(infinitives, tense_names: dict, pronouns, rules: bytes = b"") -> bytes:
+    """
+    Digest of the catalogue's names and of the rules its forms come from (for the engine,
+    conjugation_engine.rules_digest()), used to detect a compiled file that is out of date.
+    """
+    digest = hashlib.sha256()
+    for part in (list(infinitives), list(tense_names), list(tense_names.values()), list(pronouns)):
+        digest.update("\x1f".join(part).encode("utf-8"))
+        digest.update(b"\x1e")
+    digest.update(rules)
+    return digest.digest()
+
+
+def _uint32_array(values) -> bytes:
+    packed = array("I", values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def compile_catalogue(path: str, verbs, tense_names: dict, pronouns, fingerprint: bytes = None):
+    """Write verbs ({verb: {tense: [forms]}}) to path as a binary catalogue, replacing it atomically."""
+    infinitives = list(verbs)
+    tenses = list(tense_names)
+    pronouns = list(pronouns)
+    if fingerprint is None:
+        fingerprint = catalogue_fingerprint(infinitives, tense_names, pronouns)
+
+    names = infinitives + tenses + [tense_names[tense] for tense in tenses] + pronouns
+    encoded_names = [name.encode("utf-8") for name in names]
+    name_offsets = [0]
+    for encoded in encoded_names:
+        name_offsets.append(name_offsets[-1] + len(encoded))
+    verb_index = sorted(range(len(infinitives)), key=lambda verb_id: encoded_names[verb_id])
+
+    form_parts = []
+    form_offsets = [0]
+    present = bytearray(len(infinitives) * len(tenses))
+    for verb_id, verb in enumerate(infinitives):
+        verb_tenses = verbs[verb]
+        for tense_id, tense in enumerate(tenses):
+            forms = verb_tenses.get(tense)
+            if forms is None:
+                forms = [""] * len(pronouns)
+            else:
+                if len(forms) != len(pronouns):
+                    raise ValueError(f"{verb} {tense}: expected {len(pronouns)} forms, got {len(forms)}")
+                present[verb_id * len(tenses) + tense_id] = 1
+            for form in forms:
+                encoded = form.encode("utf-8")
+                form_parts.append(encoded)
+                form_offsets.append(form_offsets[-1] + len(encoded))
+
+    sections = [
+        _uint32_array(name_offsets),
+        b"".join(encoded_names),
+        _uint32_array(verb_index),
+        _uint32_array(form_offsets),
+        b"".join(form_parts),
+        bytes(present),
+    ]
+
+    header = _HEADER.pack(MAGIC, VERSION, len(infinitives), len(tenses), len(pronouns), fingerprint)
+    position = _HEADER.size + _SECTION.size * len(sections)
+    table = []
+    for section in sections:
+        # Keep each section 4-byte aligned so the uint32 arrays can be cast in place
+        position += -position % 4
+        table.append((position, len(section)))
+        position += len(section)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".verb_catalogue-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            for offset, length in table:
+                f.write(_SECTION.pack(offset, length))
+            for (offset, _), section in zip(table, sections):
+                f.write(b"\x00" * (offset - f.tell()))
+                f.write(section)
+        os.chmod(tmp_path, 0o644)
+        # Replace rather than overwrite: workers that already mapped the old file keep a valid view
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class _Names:
+    """Lazily decoded, read-only sequence of names stored in the catalogue."""
+
+    def __init__(self, catalogue, start: int, count: int):
+        self._catalogue = catalogue
+        self._start = start
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._catalogue._name(self._start + index)
+
+    def __iter__(self):
+        return (self[i] for i in range(self._count))
+
+
+class MappedCatalogue:
+    """Read-only ConjugationTable-compatible view over a compiled catalogue file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load()
+        except Exception:
+            self._mm.close()
+            raise
+
+    @classmethod
+    def open(cls, path: str):
+        return cls(path)
+
+    def _load(self):
+        mm = self._mm
+        if len(mm) < _HEADER.size:
+            raise ValueError(f"{self.path} is too small to be a verb catalogue")
+        magic, version, verb_count, tense_count, pronoun_count, fingerprint = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} verb catalogue")
+        self.fingerprint = fingerprint
+
+        sections = {}
+        for i, name in enumerate(_SECTION_NAMES):
+            offset, length = _SECTION.unpack_from(mm, _HEADER.size + i * _SECTION.size)
+            if offset + length > len(mm):
+                raise ValueError(f"{self.path} is truncated")
+            sections[name] = (offset, length)
+
+        self._name_offsets = self._uint32_view(*sections["name_offsets"])
+        self._names_start = sections["names"][0]
+        self._verb_index = self._uint32_view(*sections["verb_index"])
+        self._form_offsets = self._uint32_view(*sections["form_offsets"])
+        self._forms_start, self._forms_length = sections["forms"]
+        self._present_start = sections["present"][0]
+
+        self.verbs = _Names(self, 0, verb_count)
+        # Tenses and pronouns are tiny; decode them once
+        self.tenses = [self._name(verb_count + i) for i in range(tense_count)]
+        self.tense_names = {tense: self._name(verb_count + tense_count + i) for i, tense in enumerate(self.tenses)}
+        self.pronouns = [self._name(verb_count + 2 * tense_count + i) for i in range(pronoun_count)]
+        self._tense_ids = {tense: i for i, tense in enumerate(self.tenses)}
+        self._verb_ids = {} # names looked up so far
+
+    def _uint32_view(self, offset: int, length: int):
+        view = memoryview(self._mm)[offset:offset + length]
+        if sys.byteorder == "little":
+            return view.cast("I")
+        values = array("I", view.tobytes())
+        values.byteswap()
+        return values
+
+    def _name(self, index: int) -> str:
+        start = self._names_start + self._name_offsets[index]
+        end = self._names_start + self._name_offsets[index + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def _name_bytes(self, index: int) -> bytes:
+        start = self._names_start + self._name_offsets[index]
+        end = self._names_start + self._name_offsets[index + 1]
+        return self._mm[start:end]
+
+    def close(self):
+        for view in (self._name_offsets, self._verb_index, self._form_offsets):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mm.close()
+
+    def __len__(self):
+        return len(self.verbs)
+
+    def verb_id(self, verb: str):
+        """Binary-search the sorted verb index; results are remembered per name."""
+        verb_id = self._verb_ids.get(verb)
+        if verb_id is not None:
+            return verb_id
+        target = verb.encode("utf-8")
+        low, high = 0, len(self._verb_index)
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_bytes(self._verb_index[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._verb_index) and self._name_bytes(self._verb_index[low]) == target:
+            verb_id = self._verb_index[low]
+            self._verb_ids[verb] = verb_id
+            return verb_id
+        return None
+
+    def tense_id(self, tense: str):
+        return self._tense_ids.get(tense)
+
+    def has(self, verb_id: int, tense_id: int) -> bool:
+        return bool(self._mm[self._present_start + verb_id * len(self.tenses) + tense_id])
+
+    def _slot(self, verb_id: int, tense_id: int, pronoun_idx: int) -> int:
+        return (verb_id * len(self.tenses) + tense_id) * len(self.pronouns) + pronoun_idx
+
+    def form(self, verb_id: int, tense_id: int, pronoun_idx: int) -> str:
+        slot = self._slot(verb_id, tense_id, pronoun_idx)
+        start = self._forms_start + self._form_offsets[slot]
+        end = self._forms_start + self._form_offsets[slot + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def forms(self, verb_id: int, tense_id: int) -> list:
+        first = self._slot(verb_id, tense_id, 0)
+        offsets = self._form_offsets
+        mm = self._mm
+        start = self._forms_start
+        return [mm[start + offsets[slot]:start + offsets[slot + 1]].decode("utf-8")
+                for slot in range(first, first + len(self.pronouns))]
+
+    def lookup(self, verb: str, tense: str) -> list:
+        verb_id = self.verb_id(verb)
+        tense_id = self.tense_id(tense)
+        if verb_id is None or tense_id is None or not self.has(verb_id, tense_id):
+            raise KeyError((verb, tense))
+        return self.forms(verb_id, tense_id)
+
+    def reverse_lookup(self, form: str) -> list:
+        """Return every (verb, tense, pronoun) whose surface form equals form."""
+        target = form.encode("utf-8")
+        if not target:
+            return []
+        matches = []
+        start = self._forms_start
+        end = start + self._forms_length
+        pronoun_count = len(self.pronouns)
+        tense_count = len(self.tenses)
+        position = self._mm.find(target, start, end)
+        while position != -1:
+            # Map the byte offset back to a slot and keep only whole-form matches
+            slot = bisect.bisect_right(self._form_offsets, position - start) - 1
+            if (self._form_offsets[slot] == position - start
+                    and self._form_offsets[slot + 1] == position - start + len(target)):
+                cell, pronoun_idx = divmod(slot, pronoun_count)
+                verb_id, tense_id = divmod(cell, tense_count)
+                matches.append((self.verbs[verb_id], self.tenses[tense_id], self.pronouns[pronoun_idx]))
+            position = self._mm.find(target, position + 1, end)
+        return matches
+
+    def as_mapping(self):
+        """Return a read-only {verb: {tense: [forms]}} view over the catalogue."""
+        return VerbsView(self)
+
+
+def main(argv=None):
+    from .conjugation_engine import GeneratedVerbsView
+    from .config import VERB_CATALOGUE_PATH
+    from .core_data import VERB_INFINITIVES, TENSE_NAMES, PRONOUNS, CATALOGUE_FINGERPRINT
+
+    parser = argparse.ArgumentParser(description="Compile the verb catalogue into a memory-mappable binary file.")
+    parser.add_argument("--output", default=VERB_CATALOGUE_PATH, help="Where to write the catalogue.")
+    args = parser.parse_args(argv)
+
+    # Always compile from the conjugation engine, never from a previously compiled file
+    verbs = GeneratedVerbsView(VERB_INFINITIVES, list(TENSE_NAMES))
+    compile_catalogue(args.output, verbs, TENSE_NAMES, PRONOUNS, CATALOGUE_FINGERPRINT)
+    print(f"Compiled {len(VERB_INFINITIVES)} verbs into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+from functools import lru_cache
+
+from flask import Blueprint, jsonify, request, session, url_for
+from ..core_data import TENSE_NAMES, PRONOUNS, VERB_INFINITIVES
+from ..data_access import db_handler
+from ..config import SENTENCE_PAGE_SIZE, SENTENCE_PAGE_MAX
+from ..services import exercise_service, session_state
+from .main_routes import sentence_filters
+
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+MAX_SET_SIZE = 50
+
+def _json(payload, cache_control, status=200):
+    """JSON response with an ETag over its body; answers 304 when the client's copy is current."""
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers['Cache-Control'] = cache_control
+    response.add_etag()
+    return response.make_conditional(request)
+
+@lru_cache(maxsize=1)
+def _catalogue_payload():
+    return {
+        "version": session_state.state_tag(),
+        "verbs": list(VERB_INFINITIVES),
+        "tenses": [{"tense": tense, "name": name} for tense, name in TENSE_NAMES.items()],
+        "pronouns": list(PRONOUNS),
+    }
+
+@bp.route('/catalogue')
+def catalogue():
+    """Verbs, tenses and pronouns. The same for every user, so a CDN or the browser can cache it."""
+    return _json(_catalogue_payload(), 'public, max-age=3600')
+
+@bp.route('/exercise_set')
+def get_exercise_set():
+    """
+    A fresh set of exercises. Fetching doesn't touch the session, so a client can prefetch the
+    next set while the user is still answering the current one.
+    """
+    count = request.args.get('count', 5, type=int)
+    if count is None or not 1 <= count <= MAX_SET_SIZE:
+        return jsonify({"error": f"count must be between 1 and {MAX_SET_SIZE}."}), 400
+    exercises = exercise_service.select_exercises(count, db_handler.DEFAULT_USER_ID)
+    return _json({
+        "catalogue_version": session_state.state_tag(),
+        "exercises": [{"verb": verb, "tense": tense, "tense_name": TENSE_NAMES[tense]} for verb, tense in exercises],
+    }, 'private, no-store')
+
+def _submissions(data):
+    """[(verb, tense, answers)] from a submit request body, or None if it is malformed."""
+    items = data.get('exercises')
+    if not isinstance(items, list) or not items or len(items) > MAX_SET_SIZE:
+        return None
+    answer_key = exercise_service.get_answer_key()
+    submissions = []
+    for item in items:
+        if not isinstance(item, dict):
+            return None
+        verb, tense, answers = item.get('verb'), item.get('tense'), item.get('answers')
+        if not isinstance(verb, str) or not isinstance(tense, str) or answer_key.exercise_id(verb, tense) is None:
+            return None
+        if not isinstance(answers, list) or len(answers) != len(PRONOUNS) or not all(isinstance(a, str) for a in answers):
+            return None
+        submissions.append((verb, tense, [answer.strip() for answer in answers]))
+    return submissions
+
+@bp.route('/exercise_set', methods=['POST'])
+def submit_exercise_set():
+    """
+    Grade a set: {"exercises": [{"verb", "tense", "answers": [one per pronoun]}]}. Saves the
+    results in one write and starts remediation for the set's errors, shared with the HTML flow.
+    """
+    submissions = _submissions(request.get_json(silent=True) or {})
+    if submissions is None:
+        return jsonify({"error": "Body must list exercises with a known verb, tense and one answer per pronoun."}), 400
+
+    processed = exercise_service.process_exercise_set(submissions, db_handler.DEFAULT_USER_ID)
+
+    all_errors = []
+    for exercise_results in processed:
+        all_errors.extend(session_state.encode_errors(exercise_results['errors_list']))
+    session[session_state.STATE_VERSION_KEY] = session_state.state_tag()
+    session['exercises'] = session_state.encode_exercises((verb, tense) for verb, tense, _ in submissions)
+    session['current_index'] = len(submissions)
+    session['sentence_errors'], session['remediation_errors'] = session_state.split_errors(all_errors)
+    session['remediation_results'] = []
+    session['sentence_practice_results'] = []
+
+    return jsonify({
+        "results": [{"verb": item['verb'], "tense": item['tense'], "results": item['results_list'],
+                     "all_correct": item['all_correct']} for item in processed],
+        "all_correct": all(item['all_correct'] for item in processed),
+        "remediation_url": url_for('api.remediation'),
+    })
+
+@bp.route('/remediation')
+def remediation():
+    """The current set's errors still to practise: sentence practice first, then word remediation."""
+    if not session_state.is_current(session):
+        return jsonify({"error": "Session expired or no exercises found."}), 404
+    response = _json({
+        "sentence_errors": session_state.decode_errors(session.get('sentence_errors', [])),
+        "remediation_errors": session_state.decode_errors(session.get('remediation_errors', [])),
+    }, 'private, no-cache')
+    response.vary.add('Cookie')
+    return response
+
+@bp.route('/sentences')
+def sentences():
+    """
+    A page of recorded sentences, newest first: ?cursor= from the previous page's next_cursor,
+    optional verb, tense and is_correct filters, and limit.
+    """
+    limit = request.args.get('limit', SENTENCE_PAGE_SIZE, type=int)
+    if limit is None or not 1 <= limit <= SENTENCE_PAGE_MAX:
+        return jsonify({"error": f"limit must be between 1 and {SENTENCE_PAGE_MAX}."}), 400
+    try:
+        page, next_cursor = db_handler.load_sentence_page(db_handler.DEFAULT_USER_ID, limit,
+                                                          cursor=request.args.get('cursor'),
+                                                          **sentence_filters(request.args))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor."}), 400
+    response = _json({"sentences": page, "next_cursor": next_cursor}, 'private, no-cache')
+    response.vary.add('Cookie')
+    return response
+
+@bp.route('/sentences/search')
+def search_sentences():
+    """Recorded sentences matching ?q=, best match first, paged with ?cursor= and limit."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "q is required."}), 400
+    limit = request.args.get('limit', SENTENCE_PAGE_SIZE, type=int)
+    if limit is None or not 1 <= limit <= SENTENCE_PAGE_MAX:
+        return jsonify({"error": f"limit must be between 1 and {SENTENCE_PAGE_MAX}."}), 400
+    try:
+        page, next_cursor = db_handler.search_sentences(query, db_handler.DEFAULT_USER_ID, limit,
+                                                        cursor=request.args.get('cursor'))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor."}), 400
+    response = _json({"sentences": page, "next_cursor": next_cursor}, 'private, no-cache')
+    response.vary.add('Cookie')
+    return response
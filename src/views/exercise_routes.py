@@ -1,7 +1,7 @@
-from flask import Blueprint, render_template, redirect, url_for, session, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, session, request, jsonify, Response
 import json
 import random
-from ..services import exercise_service
+from ..services import exercise_service, sentence_checker, session_state
 from ..core_data import TENSE_NAMES, PRONOUNS, VERBS
 from ..data_access import db_handler # Import db_handler
 
@@ -9,12 +9,13 @@ bp = Blueprint('exercise', __name__)
 
 @bp.route('/start_exercises')
 def start_exercises():
-    """Start a new set of exercises."""
+    """Start a new set of exercises. With ?mode=set, show the whole set on one page."""
     exercises = exercise_service.select_exercises(5)
     if not exercises:
         return redirect(url_for('main.index', message="No exercises available. Please adjust your preferences."))
 
-    session['exercises'] = exercises
+    session[session_state.STATE_VERSION_KEY] = session_state.state_tag()
+    session['exercises'] = session_state.encode_exercises(exercises)
     session['current_index'] = 0
     session['all_errors_in_session'] = []
     session['sentence_errors'] = []
@@ -22,46 +23,47 @@ def start_exercises():
     session['remediation_results'] = []
     session['sentence_practice_results'] = []
 
+    if request.args.get('mode') == 'set':
+        return _render_exercise_set(exercises)
     return redirect(url_for('exercise.exercise'))
 
+def _split_session_errors():
+    """
+    Move the set's errors into sentence practice (first five) and word remediation (the
+    rest), and return the URL and button text for leaving the results page.
+    """
+    all_errors = session.pop('all_errors_in_session', [])
+    # Removed random.shuffle(all_errors) for deterministic behavior, especially for testing.
+    # If random order is desired for UX, it should be applied consistently elsewhere or re-added with a seed for tests.
+
+    session['sentence_errors'], session['remediation_errors'] = session_state.split_errors(all_errors)
+
+    if session.get('sentence_errors', []) or session.get('remediation_errors', []):
+        return url_for('exercise.remediation_flow'), "Continuar Remediação"
+    return url_for('main.clear_session_and_index', status='success_initial'), "Finalizar Exercício"
+
 @bp.route('/exercise', methods=['GET', 'POST'])
 def exercise():
     """Handle the exercise page."""
-    if 'exercises' not in session or not session['exercises']:
+    if 'exercises' not in session or not session['exercises'] or not session_state.is_current(session):
         return redirect(url_for('main.index', message="Session expired or no exercises found."))
 
     if request.method == 'POST':
-        current_verb, current_tense = session['exercises'][session['current_index']]
+        current_verb, current_tense = session_state.decode_exercise(session['exercises'][session['current_index']])
         user_answers = [request.form.get(f'answer_{i}', '').strip() for i in range(len(PRONOUNS))]
 
         processing_results = exercise_service.process_exercise_submission(
             current_verb, current_tense, user_answers, db_handler.DEFAULT_USER_ID
         )
         current_exercise_errors = processing_results.get('errors_list', [])
-        session['all_errors_in_session'].extend(current_exercise_errors)
+        session['all_errors_in_session'].extend(session_state.encode_errors(current_exercise_errors))
         session['current_index'] += 1
 
         next_url_for_results_page = ''
         button_text_for_results_page = ''
 
         if session['current_index'] >= len(session['exercises']):
-            all_errors = session.pop('all_errors_in_session', [])
-            # Removed random.shuffle(all_errors) for deterministic behavior, especially for testing.
-            # If random order is desired for UX, it should be applied consistently elsewhere or re-added with a seed for tests.
-
-            if len(all_errors) > 5:
-                session['sentence_errors'] = all_errors[:5]
-                session['remediation_errors'] = all_errors[5:]
-            else:
-                session['sentence_errors'] = all_errors
-                session['remediation_errors'] = []
-
-            if session.get('sentence_errors', []) or session.get('remediation_errors', []):
-                next_url_for_results_page = url_for('exercise.remediation_flow')
-                button_text_for_results_page = "Continuar Remediação"
-            else:
-                next_url_for_results_page = url_for('main.clear_session_and_index', status='success_initial')
-                button_text_for_results_page = "Finalizar Exercício"
+            next_url_for_results_page, button_text_for_results_page = _split_session_errors()
         else:
             next_url_for_results_page = url_for('exercise.exercise')
             button_text_for_results_page = "Próximo Exercício"
@@ -84,7 +86,7 @@ def exercise():
             else:
                 return redirect(url_for('main.clear_session_and_index'))
 
-        verb, tense = session['exercises'][session['current_index']]
+        verb, tense = session_state.decode_exercise(session['exercises'][session['current_index']])
         correct_conjugations = VERBS[verb][tense]
         print(f"DEBUG: correct_conjugations: {correct_conjugations}")
         print(f"DEBUG: correct_conjugations tojson: {json.dumps(correct_conjugations)}")
@@ -97,6 +99,47 @@ def exercise():
                               total_exercises=len(session['exercises']),
                               correct_conjugations=correct_conjugations)
 
+def _render_exercise_set(exercises):
+    return render_template('exercise_set.html',
+                           exercises=[{'verb': verb, 'tense': tense, 'tense_name': TENSE_NAMES[tense]}
+                                      for verb, tense in exercises],
+                           pronouns=PRONOUNS)
+
+@bp.route('/exercise_set', methods=['GET', 'POST'])
+def exercise_set():
+    """
+    The whole set on one page: GET shows every exercise, and one POST grades them all, saves
+    every result in one database write and renders all the results, ready for remediation.
+    """
+    if 'exercises' not in session or not session['exercises'] or not session_state.is_current(session):
+        return redirect(url_for('main.index', message="Session expired or no exercises found."))
+    if session['current_index'] >= len(session['exercises']):
+        return redirect(url_for('exercise.exercise')) # already graded; carry on from where the flow is
+
+    exercises = session_state.decode_exercises(session['exercises'][session['current_index']:])
+    if request.method == 'GET':
+        return _render_exercise_set(exercises)
+
+    submissions = []
+    for n, (verb, tense) in enumerate(exercises):
+        user_answers = [request.form.get(f'answer_{n}_{i}', '').strip() for i in range(len(PRONOUNS))]
+        submissions.append((verb, tense, user_answers))
+    processed = exercise_service.process_exercise_set(submissions, db_handler.DEFAULT_USER_ID)
+
+    for exercise_results in processed:
+        session['all_errors_in_session'].extend(session_state.encode_errors(exercise_results['errors_list']))
+    session['current_index'] = len(session['exercises'])
+    next_url, button_text = _split_session_errors()
+
+    return render_template('exercise_set_results.html',
+                           exercises=[{'verb': item['verb'],
+                                       'tense_name': TENSE_NAMES[item['tense']],
+                                       'results': item['results_list'],
+                                       'all_correct': item['all_correct']} for item in processed],
+                           all_correct=all(item['all_correct'] for item in processed),
+                           next_url=next_url,
+                           button_text=button_text)
+
 @bp.route('/exercise_results')
 def show_exercise_results():
     """Display the results of the last exercise submission."""
@@ -111,6 +154,8 @@ def remediation_flow():
     """Handle the remediation practice and results flow."""
     if 'remediation_errors' not in session and 'sentence_errors' not in session and 'remediation_results' not in session and 'sentence_practice_results' not in session:
         return redirect(url_for('main.index', message="No errors to remediate or practice sentences."))
+    if not session_state.is_current(session):
+        return redirect(url_for('main.index', message="Session expired or no exercises found."))
 
     if request.method == 'POST':
         user_word_answers = {}
@@ -122,7 +167,7 @@ def remediation_flow():
         remediation_results = []
         remaining_remediation_errors = []
 
-        for i, error in enumerate(session.get('remediation_errors', [])):
+        for i, error in enumerate(session_state.decode_errors(session.get('remediation_errors', []))):
             user_answer = user_word_answers.get(i, '').strip().lower()
             correct_answer = error['correct'].lower()
             is_correct = user_answer == correct_answer
@@ -145,15 +190,11 @@ def remediation_flow():
         sentence_practice_results = []
         remaining_sentence_errors = []
 
-        for i, error in enumerate(session.get('sentence_errors', [])):
+        for i, error in enumerate(session_state.decode_errors(session.get('sentence_errors', []))):
             user_sentence = user_sentence_answers.get(i, '').strip()
             
-            is_sentence_correct = False
-            user_words = [word.strip().lower() for word in user_sentence.split()]
-            correct_form_lower = error['correct'].lower()
-
-            if correct_form_lower in user_words:
-                is_sentence_correct = True
+            # Whole-word match, ignoring case and punctuation ("Eu falo." uses "falo")
+            is_sentence_correct = sentence_checker.contains_form(user_sentence, error['correct'])
 
             sentence_practice_results.append({
                 'verb': error['verb'],
@@ -175,22 +216,24 @@ def remediation_flow():
             sentence_data_for_db = {k: v for k, v in sentence_data_with_index.items() if k != 'index'}
             db_handler.save_sentence(sentence_data_for_db, db_handler.DEFAULT_USER_ID)
 
-        session['remediation_errors'] = remaining_remediation_errors
-        session['remediation_results'] = remediation_results
-        session['sentence_errors'] = remaining_sentence_errors
-        session['sentence_practice_results'] = sentence_practice_results
+        session['remediation_errors'] = session_state.encode_errors(remaining_remediation_errors)
+        session['remediation_results'] = [session_state.encode_remediation_result(result) for result in remediation_results]
+        session['sentence_errors'] = session_state.encode_errors(remaining_sentence_errors)
+        session['sentence_practice_results'] = [session_state.encode_sentence_result(result) for result in sentence_practice_results]
         is_remediation_successful = not (remaining_remediation_errors or remaining_sentence_errors)
         session['is_remediation_successful'] = is_remediation_successful
 
         return redirect(url_for('exercise.remediation_flow'))
 
     else: # GET request - display remediation practice or results
-        current_remediation_results = session.pop('remediation_results', [])
-        current_sentence_practice_results = session.pop('sentence_practice_results', [])
+        current_remediation_results = [session_state.decode_remediation_result(record)
+                                       for record in session.pop('remediation_results', [])]
+        current_sentence_practice_results = [session_state.decode_sentence_result(record, i)
+                                             for i, record in enumerate(session.pop('sentence_practice_results', []))]
         is_remediation_successful = session.pop('is_remediation_successful', None)
 
-        remediation_errors = session.get('remediation_errors', [])
-        sentence_errors = session.get('sentence_errors', [])
+        remediation_errors = session_state.decode_errors(session.get('remediation_errors', []))
+        sentence_errors = session_state.decode_errors(session.get('sentence_errors', []))
 
         if current_remediation_results or current_sentence_practice_results:
             print(f"DEBUG: current_sentence_practice_results before rendering: {current_sentence_practice_results}")
@@ -225,3 +268,57 @@ def get_sentence_feedback():
         user_sentence, verb, tense, pronoun, correct_form
     )
     return jsonify(gemini_feedback)
+
+def _feedback_sentence_items(data):
+    """Return the request's sentence items and the indexes of the complete ones, or None if there are none."""
+    sentence_items = data.get('sentences')
+    if not isinstance(sentence_items, list) or not sentence_items:
+        return None, None
+    # Incomplete entries (e.g. an empty sentence) get an error in their slot instead of failing the batch
+    required_fields = ('user_sentence', 'verb', 'tense', 'pronoun', 'correct_form')
+    valid_indexes = [i for i, item in enumerate(sentence_items)
+                     if isinstance(item, dict) and all(item.get(field) for field in required_fields)]
+    return sentence_items, valid_indexes
+
+@bp.route('/get_sentences_feedback', methods=['POST'])
+def get_sentences_feedback():
+    """API endpoint to get Gemini feedback for all of a session's sentences in one model call."""
+    sentence_items, valid_indexes = _feedback_sentence_items(request.get_json(silent=True) or {})
+    if sentence_items is None:
+        return jsonify({"error": "Missing sentences for feedback request."}), 400
+
+    feedback = [{"error": "Missing data for feedback request."} for _ in sentence_items]
+    valid_feedback = exercise_service.get_gemini_batch_feedback([sentence_items[i] for i in valid_indexes])
+    for i, item_feedback in zip(valid_indexes, valid_feedback):
+        feedback[i] = item_feedback
+    return jsonify({"feedback": feedback})
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@bp.route('/stream_sentences_feedback', methods=['POST'])
+def stream_sentences_feedback():
+    """
+    Same request body as /get_sentences_feedback, but answers with server-sent events: one
+    `feedback` event ({"index", "feedback"}) per sentence as soon as it is ready, then `done`.
+    """
+    sentence_items, valid_indexes = _feedback_sentence_items(request.get_json(silent=True) or {})
+    if sentence_items is None:
+        return jsonify({"error": "Missing sentences for feedback request."}), 400
+
+    def events():
+        valid = set(valid_indexes)
+        for i in range(len(sentence_items)):
+            if i not in valid:
+                yield _sse_event("feedback", {"index": i, "feedback": {"error": "Missing data for feedback request."}})
+        try:
+            for position, feedback in exercise_service.stream_gemini_batch_feedback(
+                    [sentence_items[i] for i in valid_indexes]):
+                yield _sse_event("feedback", {"index": valid_indexes[position], "feedback": feedback})
+        except Exception as error:
+            print(f"Error streaming sentence feedback: {error}")
+            yield _sse_event("error", {"error": str(error)})
+        yield _sse_event("done", {})
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
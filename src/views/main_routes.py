@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, redirect, url_for, session, jsonify, request
 from ..data_access import db_handler
+from ..services import session_state
 from ..core_data import VERBS, TENSE_NAMES, PRONOUNS
+from ..config import SENTENCE_PAGE_SIZE
 
 bp = Blueprint('main', __name__)
 
@@ -14,6 +16,7 @@ def index():
 @bp.route('/clear_session_and_index')
 def clear_session_and_index():
     """Clear session variables and redirect to index with a status message."""
+    session.pop(session_state.STATE_VERSION_KEY, None)
     session.pop('exercises', None)
     session.pop('current_index', None)
     session.pop('all_errors_in_session', None) # Clear this too
@@ -77,9 +80,40 @@ def records():
                           tense_names=TENSE_NAMES,
                           pronouns=PRONOUNS)
 
+def sentence_filters(args):
+    """verb/tense/is_correct filters for sentence pages from query args; unknown values are ignored."""
+    verb = args.get('verb') or None
+    tense = args.get('tense') or None
+    is_correct = {'1': True, 'true': True, '0': False, 'false': False}.get(args.get('is_correct', '').lower())
+    return {
+        "verb": verb if verb in VERBS else None,
+        "tense": tense if tense in TENSE_NAMES else None,
+        "is_correct": is_correct,
+    }
+
 @bp.route('/sentences')
 def sentences():
-    """Show all recorded sentences."""
-    all_sentences = db_handler.load_sentences(db_handler.DEFAULT_USER_ID)
-    print(f"DEBUG: main_routes.py - Type of all_sentences: {type(all_sentences)}, Content: {all_sentences}")
-    return render_template('sentences.html', sentences=all_sentences, tense_names=TENSE_NAMES)
+    """
+    Show recorded sentences a page at a time: newest first, or best match first for a ?q=
+    search. The page fetches further pages from /api/sentences or /api/sentences/search.
+    """
+    search = request.args.get('q', '').strip()
+    filters = sentence_filters(request.args)
+    cursor = request.args.get('cursor')
+    try:
+        if search:
+            page, next_cursor = db_handler.search_sentences(search, db_handler.DEFAULT_USER_ID, SENTENCE_PAGE_SIZE,
+                                                            cursor=cursor)
+        else:
+            page, next_cursor = db_handler.load_sentence_page(db_handler.DEFAULT_USER_ID, SENTENCE_PAGE_SIZE,
+                                                              cursor=cursor, **filters)
+    except ValueError:
+        return redirect(url_for('main.sentences', **{key: value for key, value in request.args.items() if key != 'cursor'}))
+    if search:
+        query = {'q': search}
+        api_url = url_for('api.search_sentences', **query)
+    else:
+        query = {key: value for key, value in request.args.items() if key in filters and value}
+        api_url = url_for('api.sentences', **query)
+    return render_template('sentences.html', sentences=page, next_cursor=next_cursor, filters=filters, query=query,
+                           search=search, api_url=api_url, verbs=VERBS, tense_names=TENSE_NAMES)
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from ..data_access import db_handler
+from ..services import exercise_service
 
 bp = Blueprint('preference', __name__)
 
@@ -27,4 +28,5 @@ def update_preferences():
         "show_primarily": show_primarily
     }
     db_handler.save_preference(preference_data, db_handler.DEFAULT_USER_ID)
+    exercise_service.apply_preference_update(preference_data, db_handler.DEFAULT_USER_ID)
     return jsonify({"success": True})
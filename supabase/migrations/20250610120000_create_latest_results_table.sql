@@ -0,0 +1,61 @@
+-- Index the results history for "latest per verb/tense/pronoun" lookups
+CREATE INDEX IF NOT EXISTS results_user_verb_tense_pronoun_timestamp_idx
+    ON public.results (user_id, verb, tense, pronoun, timestamp DESC);
+
+-- Create the 'latest_results' table: one row per (user_id, verb, tense, pronoun)
+CREATE TABLE public.latest_results (
+    user_id text NOT NULL,
+    verb text NOT NULL,
+    tense text NOT NULL,
+    pronoun text NOT NULL,
+    result_id uuid REFERENCES public.results(id) ON DELETE SET NULL,
+    user_answer text,
+    is_correct boolean,
+    timestamp timestamp with time zone,
+    PRIMARY KEY (user_id, verb, tense, pronoun)
+);
+
+-- Backfill from the existing history, keeping the newest row per combination
+INSERT INTO public.latest_results (user_id, verb, tense, pronoun, result_id, user_answer, is_correct, timestamp)
+SELECT DISTINCT ON (user_id, verb, tense, pronoun)
+    user_id, verb, tense, pronoun, id, user_answer, is_correct, timestamp
+FROM public.results
+ORDER BY user_id, verb, tense, pronoun, timestamp DESC;
+
+-- Keep 'latest_results' current whenever a result is inserted
+CREATE OR REPLACE FUNCTION public.upsert_latest_result()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO public.latest_results (user_id, verb, tense, pronoun, result_id, user_answer, is_correct, timestamp)
+    VALUES (NEW.user_id, NEW.verb, NEW.tense, NEW.pronoun, NEW.id, NEW.user_answer, NEW.is_correct, NEW.timestamp)
+    ON CONFLICT (user_id, verb, tense, pronoun) DO UPDATE
+    SET result_id = EXCLUDED.result_id,
+        user_answer = EXCLUDED.user_answer,
+        is_correct = EXCLUDED.is_correct,
+        timestamp = EXCLUDED.timestamp
+    WHERE public.latest_results.timestamp IS NULL
+       OR EXCLUDED.timestamp >= public.latest_results.timestamp;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER results_upsert_latest_result
+AFTER INSERT ON public.results
+FOR EACH ROW EXECUTE FUNCTION public.upsert_latest_result();
+
+-- Enable RLS and create permissive policies for 'latest_results' table
+ALTER TABLE public.latest_results ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow all read access" ON public.latest_results
+FOR SELECT USING (true);
+
+CREATE POLICY "Allow all write access" ON public.latest_results
+FOR INSERT WITH CHECK (true);
+
+CREATE POLICY "Allow all update access" ON public.latest_results
+FOR UPDATE USING (true) WITH CHECK (true);
+
+CREATE POLICY "Allow all delete access" ON public.latest_results
+FOR DELETE USING (true);
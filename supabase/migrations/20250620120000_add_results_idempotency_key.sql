@@ -0,0 +1,8 @@
+-- Idempotency key for result rows written through the write-behind queue. A batch that is
+-- retried after a write that actually succeeded conflicts on this key and is skipped, so
+-- the latest_results trigger only fires once per row. Rows written before this column
+-- existed keep NULL, which the unique index allows any number of times.
+ALTER TABLE public.results ADD COLUMN IF NOT EXISTS idempotency_key uuid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS results_idempotency_key_idx
+    ON public.results (idempotency_key);
@@ -0,0 +1,12 @@
+-- Index the sentence history for keyset pagination: a page is the next N rows of one
+-- user's sentences after a (timestamp, id) cursor, newest first, read straight off the
+-- index however many sentences the user has. The verb/tense index serves filtered pages.
+CREATE INDEX IF NOT EXISTS sentences_user_timestamp_id_idx
+    ON public.sentences (user_id, timestamp DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS sentences_user_verb_tense_timestamp_id_idx
+    ON public.sentences (user_id, verb, tense, timestamp DESC, id DESC);
+
+-- Sentences written before timestamps defaulted would sort unpredictably without one
+UPDATE public.sentences SET timestamp = now() WHERE timestamp IS NULL;
+ALTER TABLE public.sentences ALTER COLUMN timestamp SET NOT NULL;
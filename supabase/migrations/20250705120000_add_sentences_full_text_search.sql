@@ -0,0 +1,42 @@
+-- Full-text search over recorded sentences. 'search' is kept up to date by Postgres
+-- itself: the sentence text weighs most, then the verb and the form being practised.
+-- The 'portuguese' config stems words, so "falei" also finds "falamos".
+ALTER TABLE public.sentences ADD COLUMN IF NOT EXISTS search tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese'::regconfig, coalesce(sentence, '')), 'A') ||
+        setweight(to_tsvector('portuguese'::regconfig, coalesce(verb, '') || ' ' || coalesce(correct_form, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS sentences_search_idx ON public.sentences USING gin (search);
+
+-- Ranked search for one user. PostgREST can filter on a tsvector but can't order by
+-- ts_rank, so callers use this through RPC. websearch_to_tsquery accepts whatever the
+-- user typed ("quoted phrases", -excluded words) without raising syntax errors.
+CREATE OR REPLACE FUNCTION public.search_sentences(
+    p_user_id text,
+    p_query text,
+    p_limit integer DEFAULT 20,
+    p_offset integer DEFAULT 0
+)
+RETURNS TABLE (
+    id uuid,
+    user_id text,
+    verb text,
+    tense text,
+    pronoun text,
+    correct_form text,
+    sentence text,
+    is_correct boolean,
+    "timestamp" timestamp with time zone,
+    rank real
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT s.id, s.user_id, s.verb, s.tense, s.pronoun, s.correct_form, s.sentence, s.is_correct, s.timestamp,
+           ts_rank(s.search, q) AS rank
+    FROM public.sentences s, websearch_to_tsquery('portuguese'::regconfig, p_query) q
+    WHERE s.user_id = p_user_id AND s.search @@ q
+    ORDER BY rank DESC, s.timestamp DESC, s.id DESC
+    LIMIT p_limit OFFSET p_offset;
+$$;
@@ -0,0 +1,67 @@
+from src.data_access.cache import UserDataCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestUserDataCache:
+    def test_get_miss_then_hit(self):
+        cache = UserDataCache(max_entries=4, ttl_seconds=60)
+        assert cache.get("u1", "results") is None
+        cache.set("u1", "results", {"falar_presente": {}})
+        assert cache.get("u1", "results") == {"falar_presente": {}}
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_returned_value_is_a_copy(self):
+        cache = UserDataCache()
+        cache.set("u1", "preferences", {"falar": {"presente": {"never_show": False}}})
+        value = cache.get("u1", "preferences")
+        value["falar"]["presente"]["never_show"] = True
+        assert cache.get("u1", "preferences")["falar"]["presente"]["never_show"] is False
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = UserDataCache(ttl_seconds=10, clock=clock)
+        cache.set("u1", "results", {})
+        clock.now = 9.9
+        assert cache.get("u1", "results") == {}
+        clock.now = 10.0
+        assert cache.get("u1", "results") is None
+        assert cache.stats()["size"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = UserDataCache(max_entries=2)
+        cache.set("u1", "results", 1)
+        cache.set("u2", "results", 2)
+        cache.get("u1", "results")
+        cache.set("u3", "results", 3)
+        assert cache.get("u2", "results") is None
+        assert cache.get("u1", "results") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_update_only_touches_cached_entries(self):
+        cache = UserDataCache()
+        cache.update("u1", "results", lambda value: value.setdefault("new", {}))
+        assert cache.get("u1", "results") is None
+        cache.set("u1", "results", {})
+        cache.update("u1", "results", lambda value: value.setdefault("new", {}))
+        assert cache.get("u1", "results") == {"new": {}}
+
+    def test_invalidate_by_user_and_kind(self):
+        cache = UserDataCache()
+        cache.set("u1", "results", 1)
+        cache.set("u1", "preferences", 2)
+        cache.set("u2", "results", 3)
+        cache.invalidate("u1", "results")
+        assert cache.get("u1", "results") is None
+        assert cache.get("u1", "preferences") == 2
+        cache.invalidate("u1")
+        assert cache.get("u1", "preferences") is None
+        assert cache.get("u2", "results") == 3
@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock, patch
 import pytest
 from src.data_access import db_handler
+from src.data_access.cache import user_cache
 from src.core_data import VERBS # For initializing preferences in tests
 
 # Mock the Supabase client for testing
@@ -25,13 +26,16 @@ def setup_db_handler_mocks(mock_supabase_client, mock_supabase_table):
     mock_supabase_client.table.return_value = mock_supabase_table
     # Ensure that db_handler uses the mocked supabase client
     db_handler.supabase = mock_supabase_client
+    user_cache.invalidate()
     yield
+    user_cache.invalidate()
 
 class TestDbHandler:
-    def test_load_results_empty(self, mock_supabase_table):
+    def test_load_results_empty(self, mock_supabase_client, mock_supabase_table):
         mock_supabase_table.select.return_value.eq.return_value.execute.return_value.data = []
         results = db_handler.load_results()
         assert results == {}
+        mock_supabase_client.table.assert_called_with('latest_results')
         mock_supabase_table.select.assert_called_with('*')
         mock_supabase_table.select.return_value.eq.assert_called_with('user_id', db_handler.DEFAULT_USER_ID)
         mock_supabase_table.select.return_value.eq.return_value.execute.assert_called_once()
@@ -58,6 +62,20 @@ class TestDbHandler:
         mock_supabase_table.insert.assert_called_once_with([result_data])
         mock_supabase_table.insert.return_value.execute.assert_called_once()
 
+    def test_save_results_single_insert(self, mock_supabase_table):
+        rows = [
+            {"verb": "falar", "tense": "presente", "pronoun": pronoun, "user_answer": answer, "is_correct": True}
+            for pronoun, answer in zip(["eu", "ele", "nós", "eles"], VERBS["falar"]["presente"])
+        ]
+        db_handler.save_results(rows, user_id="test_user_123")
+        mock_supabase_table.insert.assert_called_once_with(rows)
+        mock_supabase_table.insert.return_value.execute.assert_called_once()
+        assert all(row["user_id"] == "test_user_123" for row in rows)
+
+    def test_save_results_empty_skips_insert(self, mock_supabase_table):
+        db_handler.save_results([])
+        mock_supabase_table.insert.assert_not_called()
+
     def test_load_sentences_empty(self, mock_supabase_table):
         mock_supabase_table.select.return_value.eq.return_value.execute.return_value.data = []
         sentences = db_handler.load_sentences()
@@ -77,6 +95,46 @@ class TestDbHandler:
         mock_supabase_table.select.return_value.eq.assert_called_with('user_id', db_handler.DEFAULT_USER_ID)
         mock_supabase_table.select.return_value.eq.return_value.execute.assert_called_once()
 
+    def test_load_sentence_page_queries_by_keyset(self, mock_supabase_table):
+        query = mock_supabase_table.select.return_value.eq.return_value
+        query.eq.return_value = query
+        query.or_.return_value = query
+        query.order.return_value = query
+        ids = [f"00000000-0000-4000-8000-00000000000{i}" for i in range(3)]
+        query.limit.return_value.execute.return_value.data = [
+            {"id": ids[i], "timestamp": f"2023-01-0{3 - i}T00:00:00+00:00"} for i in range(3)]
+
+        page, cursor = db_handler.load_sentence_page(limit=2, verb="ir")
+        assert [row["id"] for row in page] == ids[:2]
+        query.limit.assert_called_with(3)
+        query.eq.assert_called_with('verb', 'ir')
+        query.order.assert_any_call('timestamp', desc=True)
+        query.order.assert_any_call('id', desc=True)
+
+        db_handler.load_sentence_page(limit=2, cursor=cursor)
+        query.or_.assert_called_with('timestamp.lt."2023-01-02T00:00:00+00:00",'
+                                     f'and(timestamp.eq."2023-01-02T00:00:00+00:00",id.lt."{ids[1]}")')
+
+    def test_load_sentence_page_rejects_forged_cursors(self, mock_supabase_table):
+        from src.data_access.storage import _pack
+        forged = [
+            ["2023-01-02T00:00:00Z", "x),id.gt.(0"],
+            ['2023-01-02T00:00:00Z",or(user_id.neq.x', "00000000-0000-4000-8000-000000000001"],
+            ["yesterday", "00000000-0000-4000-8000-000000000001"],
+        ]
+        for value in forged:
+            with pytest.raises(ValueError):
+                db_handler.load_sentence_page(limit=2, cursor=_pack(value))
+        mock_supabase_table.select.assert_not_called()
+
+    def test_search_sentences_calls_ranked_rpc(self, mock_supabase_client):
+        mock_supabase_client.rpc.return_value.execute.return_value.data = [{"id": "s1", "rank": 0.5}]
+        page, cursor = db_handler.search_sentences("falo", limit=5)
+        assert page == [{"id": "s1", "rank": 0.5}]
+        assert cursor is None
+        mock_supabase_client.rpc.assert_called_once_with('search_sentences', {
+            'p_user_id': db_handler.DEFAULT_USER_ID, 'p_query': "falo", 'p_limit': 6, 'p_offset': 0})
+
     def test_save_sentence(self, mock_supabase_table):
         sentence_data = {"user_id": db_handler.DEFAULT_USER_ID, "verb": "ir", "tense": "present", "pronoun": "eu", "correct_form": "vou", "sentence": "Eu vou.", "is_correct": True}
         db_handler.save_sentence(sentence_data)
@@ -195,3 +253,74 @@ class TestDbHandler:
         db_handler.save_preference(preference_data)
         mock_supabase_table.upsert.assert_called_once_with(preference_data, on_conflict='user_id,verb,tense')
         mock_supabase_table.upsert.return_value.execute.assert_called_once()
+
+    def test_load_results_served_from_cache_on_repeat(self, mock_supabase_table):
+        mock_data = [
+            {"user_id": db_handler.DEFAULT_USER_ID, "verb": "falar", "tense": "presente", "pronoun": "eu", "user_answer": "falo", "is_correct": True, "timestamp": "2023-01-01T12:00:00Z"}
+        ]
+        mock_supabase_table.select.return_value.eq.return_value.execute.return_value.data = mock_data
+        first = db_handler.load_results()
+        second = db_handler.load_results()
+        assert first == second
+        mock_supabase_table.select.return_value.eq.return_value.execute.assert_called_once()
+
+    def test_save_results_writes_through_to_cache(self, mock_supabase_table):
+        mock_supabase_table.select.return_value.eq.return_value.execute.return_value.data = []
+        db_handler.load_results()
+        rows = [{"verb": "falar", "tense": "presente", "pronoun": "eu", "user_answer": "falo", "is_correct": True, "timestamp": "2023-01-02T12:00:00Z"}]
+        mock_supabase_table.insert.return_value.execute.return_value.data = rows
+        db_handler.save_results(rows)
+        results = db_handler.load_results()
+        assert results == {"falar_presente": {"eu": {"user_answer": "falo", "correct": True, "timestamp": "2023-01-02T12:00:00Z"}}}
+        mock_supabase_table.select.return_value.eq.return_value.execute.assert_called_once()
+
+    def test_save_preference_writes_through_to_cache(self, mock_supabase_table):
+        mock_supabase_table.select.return_value.eq.return_value.execute.return_value.data = []
+        db_handler.load_preferences()
+        preference_data = {"verb": "falar", "tense": "presente", "never_show": True, "always_show": False, "show_primarily": False}
+        mock_supabase_table.upsert.return_value.execute.return_value.data = [preference_data]
+        db_handler.save_preference(preference_data)
+        preferences = db_handler.load_preferences()
+        assert preferences["falar"]["presente"]["never_show"] is True
+        mock_supabase_table.select.return_value.eq.return_value.execute.assert_called_once()
+
+    def test_failed_save_invalidates_cache(self, mock_supabase_table):
+        mock_supabase_table.select.return_value.eq.return_value.execute.return_value.data = []
+        db_handler.load_results()
+        mock_supabase_table.insert.return_value.execute.return_value.data = []
+        db_handler.save_results([{"verb": "falar", "tense": "presente", "pronoun": "eu", "user_answer": "falo", "is_correct": True}])
+        db_handler.load_results()
+        assert mock_supabase_table.select.return_value.eq.return_value.execute.call_count == 2
+
+    def test_save_results_through_the_write_queue(self, mock_supabase_table, tmp_path, monkeypatch):
+        from src.data_access.write_queue import WriteBehindQueue
+        queue = WriteBehindQueue(str(tmp_path), db_handler._insert_queued_results, flush_interval_seconds=0.01, fsync=False)
+        monkeypatch.setattr(db_handler, 'result_queue', queue)
+        mock_supabase_table.select.return_value.eq.return_value.execute.return_value.data = []
+        db_handler.load_results()
+
+        rows = [{"verb": "falar", "tense": "presente", "pronoun": "eu", "user_answer": "falo", "is_correct": True, "timestamp": "2023-01-02T12:00:00Z"}]
+        db_handler.save_results(rows)
+        # Cached results reflect the rows before they are written
+        assert db_handler.load_results()["falar_presente"]["eu"]["correct"] is True
+        assert db_handler.drain_result_queue(5) == 0
+
+        mock_supabase_table.insert.assert_not_called()
+        written = mock_supabase_table.upsert.call_args.args[0]
+        assert written[0]["user_id"] == db_handler.DEFAULT_USER_ID
+        assert written[0]["idempotency_key"]
+        assert mock_supabase_table.upsert.call_args.kwargs == {"on_conflict": "idempotency_key", "ignore_duplicates": True}
+
+    def test_configured_result_queue_is_opt_in(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('src.config.RESULT_JOURNAL_DIR', str(tmp_path))
+        assert db_handler.start_configured_result_queue() is None
+        assert db_handler.result_queue is None
+
+        monkeypatch.setattr('src.config.RESULT_WRITE_BEHIND', True)
+        queue = db_handler.start_configured_result_queue()
+        try:
+            assert queue is db_handler.result_queue
+            assert queue.journal_dir == str(tmp_path)
+        finally:
+            assert db_handler.stop_result_queue(5) == 0
+        assert db_handler.result_queue is None
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.data_access.http_pool import PoolMetricsTransport, create_http_client, create_pool, create_supabase_client
+
+
+class SlowJsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive
+    delay = 0.0
+    connections = set()
+    paths = []
+
+    def do_GET(self):
+        SlowJsonHandler.connections.add(self.client_address)
+        SlowJsonHandler.paths.append(self.path)
+        time.sleep(self.delay)
+        body = json.dumps([{"id": 1}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    SlowJsonHandler.delay = 0.0
+    SlowJsonHandler.connections = set()
+    SlowJsonHandler.paths = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SlowJsonHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_requests_reuse_kept_alive_connection(server):
+    pool = create_pool(max_connections=4, max_keepalive_connections=4, http2=False)
+    with create_http_client(pool) as client:
+        for _ in range(5):
+            assert client.get(server + "/rows").status_code == 200
+
+    assert len(SlowJsonHandler.connections) == 1
+    stats = pool.stats()
+    assert stats["requests"] == 5
+    assert stats["saturated_requests"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["errors"] == 0
+
+
+def test_saturation_counted_when_all_connections_are_busy(server):
+    SlowJsonHandler.delay = 0.2
+    pool = create_pool(max_connections=2, max_keepalive_connections=2, http2=False)
+    client = create_http_client(pool)
+    threads = [threading.Thread(target=client.get, args=(server + "/rows",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.close()
+
+    stats = pool.stats()
+    assert stats["requests"] == 6
+    # Only two requests can hold a connection; the rest found the pool full and queued
+    assert stats["saturated_requests"] >= 1
+    assert stats["peak_in_flight"] > 2
+    assert len(SlowJsonHandler.connections) <= 2
+    assert stats["in_flight"] == 0
+
+
+def test_failed_requests_are_counted(server):
+    pool = create_pool(max_connections=2, http2=False)
+    with create_http_client(pool, connect_timeout=0.5) as client:
+        with pytest.raises(Exception):
+            client.get("http://127.0.0.1:1/rows")
+    stats = pool.stats()
+    assert stats["errors"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_http2_only_when_requested_and_available(monkeypatch):
+    monkeypatch.setattr("src.data_access.http_pool.http2_available", lambda: False)
+    assert create_pool(http2=True).http2 is False
+    monkeypatch.setattr("src.data_access.http_pool.http2_available", lambda: True)
+    assert create_pool(http2=False).http2 is False
+    assert create_pool(http2=True).http2 is True
+
+
+def test_reset_stats_keeps_in_flight_as_peak():
+    pool = PoolMetricsTransport(max_connections=1, max_keepalive_connections=1, keepalive_expiry=5)
+    pool.requests, pool.saturated_requests, pool.peak_in_flight = 10, 3, 4
+    pool.reset_stats()
+    assert pool.stats()["requests"] == 0
+    assert pool.stats()["saturated_requests"] == 0
+    assert pool.stats()["peak_in_flight"] == 0
+
+
+def test_supabase_client_queries_go_through_shared_pool(server):
+    pool = create_pool(max_connections=4, http2=False)
+    http_client = create_http_client(pool)
+    supabase = create_supabase_client(server, "test-key", http_client)
+
+    data = supabase.table("results").select("*").eq("user_id", "u1").execute().data
+    supabase.table("preferences").select("*").eq("user_id", "u1").execute()
+
+    assert data == [{"id": 1}]
+    assert pool.stats()["requests"] == 2
+    assert SlowJsonHandler.paths[0].startswith("/rest/v1/results?")
+    http_client.close()
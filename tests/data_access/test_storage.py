@@ -0,0 +1,182 @@
+import threading
+
+import pytest
+
+from src.data_access import db_handler
+from src.data_access.cache import user_cache
+import sqlite3
+
+from src.data_access.storage import SqliteStorage, make_storage, decode_cursor, fts5_query
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SqliteStorage(str(tmp_path / "app.sqlite3"))
+
+
+@pytest.fixture
+def sqlite_db_handler(storage):
+    previous = db_handler.storage
+    db_handler.use_storage(storage)
+    yield storage
+    db_handler.use_storage(previous)
+
+
+def result(pronoun, answer, is_correct, timestamp, **extra):
+    return dict(verb="falar", tense="presente", pronoun=pronoun, user_answer=answer, is_correct=is_correct,
+                timestamp=timestamp, user_id="u1", **extra)
+
+
+class TestSqliteStorage:
+    def test_latest_results_trigger_keeps_the_newest_row(self, storage):
+        storage.insert_results([result("eu", "falo", True, "2024-01-02T00:00:00"),
+                                result("ele", "fale", False, "2024-01-02T00:00:00")])
+        storage.insert_results([result("eu", "fala", False, "2024-01-01T00:00:00")]) # older, arrives late
+        storage.insert_results([result("ele", "fala", True, "2024-01-03T00:00:00")])
+        latest = {row["pronoun"]: row for row in storage.latest_results("u1")}
+        assert latest["eu"]["user_answer"] == "falo"
+        assert latest["ele"]["user_answer"] == "fala"
+        assert latest["ele"]["is_correct"] is True
+        assert storage.latest_results("someone_else") == []
+
+    def test_insert_results_once_skips_known_keys(self, storage):
+        rows = [result("eu", "falo", True, "2024-01-02T00:00:00", idempotency_key="k1")]
+        storage.insert_results_once(rows)
+        storage.insert_results_once(rows)
+        count = storage._db().execute("SELECT COUNT(*) AS n FROM results").fetchone()["n"]
+        assert count == 1
+
+    def test_sentences_round_trip_with_default_timestamp(self, storage):
+        storage.insert_sentence({"user_id": "u1", "verb": "falar", "tense": "presente", "pronoun": "eu",
+                                 "correct_form": "falo", "sentence": "Eu falo.", "is_correct": True})
+        [sentence] = storage.sentences("u1")
+        assert sentence["sentence"] == "Eu falo."
+        assert sentence["is_correct"] is True
+        assert sentence["timestamp"]
+
+    def test_sentence_page_walks_newest_first_with_ties(self, storage):
+        for i in range(5):
+            # Two sentences share each timestamp, so the id breaks the tie
+            for verb in ("falar", "comer"):
+                storage.insert_sentence({"user_id": "u1", "verb": verb, "tense": "presente", "pronoun": "eu",
+                                         "correct_form": "x", "sentence": f"{verb} {i}", "is_correct": i % 2 == 0,
+                                         "timestamp": f"2024-01-0{i + 1}T00:00:00"})
+        seen = []
+        after = None
+        while True:
+            page = storage.sentence_page("u1", 3, after=after)
+            seen.extend(page)
+            if len(page) < 3:
+                break
+            after = (page[-1]["timestamp"], page[-1]["id"])
+        assert len(seen) == 10
+        assert len({row["id"] for row in seen}) == 10
+        assert [row["timestamp"] for row in seen] == sorted((row["timestamp"] for row in seen), reverse=True)
+
+        filtered = storage.sentence_page("u1", 10, verb="comer", is_correct=False)
+        assert [row["sentence"] for row in filtered] == ["comer 3", "comer 1"]
+        assert storage.sentence_page("u2", 10) == []
+
+    def test_sentence_page_uses_the_keyset_index(self, storage):
+        storage.sentences("u1") # creates the schema
+        plan = storage._db().execute("EXPLAIN QUERY PLAN SELECT id FROM sentences WHERE user_id = ? "
+                                     "AND (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT 20",
+                                     ("u1", "2024", "x")).fetchall()
+        details = " ".join(row["detail"] for row in plan)
+        assert "sentences_user_timestamp_id_idx" in details
+        assert "TEMP B-TREE" not in details
+
+    def test_search_ranks_matches_for_one_user(self, storage):
+        def sentence(user_id, verb, correct_form, text):
+            storage.insert_sentence({"user_id": user_id, "verb": verb, "tense": "presente", "pronoun": "eu",
+                                     "correct_form": correct_form, "sentence": text, "is_correct": True})
+        sentence("u1", "falar", "falo", "Eu falo com você todos os dias.")
+        sentence("u1", "comer", "como", "Eu como pão.")
+        sentence("u1", "falar", "falo", "Falo, falo e falo sem parar.")
+        sentence("u2", "falar", "falo", "Eu falo alto.")
+
+        matches = storage.search_sentences("u1", "falo", 10)
+        assert [row["sentence"] for row in matches] == ["Falo, falo e falo sem parar.", "Eu falo com você todos os dias."]
+        assert matches[0]["rank"] > matches[1]["rank"]
+        assert [row["sentence"] for row in storage.search_sentences("u1", "VOCE", 10)] == ["Eu falo com você todos os dias."]
+        assert [row["sentence"] for row in storage.search_sentences("u1", "falo", 1, offset=1)] == ["Eu falo com você todos os dias."]
+        assert storage.search_sentences("u1", 'pão" (*', 10)[0]["sentence"] == "Eu como pão."
+        assert storage.search_sentences("u1", "?!", 10) == []
+
+    def test_search_indexes_sentences_stored_before_the_index(self, tmp_path):
+        path = str(tmp_path / "old.sqlite3")
+        with sqlite3.connect(path) as db:
+            db.execute("CREATE TABLE sentences (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, verb TEXT NOT NULL, "
+                       "tense TEXT NOT NULL, pronoun TEXT NOT NULL, correct_form TEXT NOT NULL, sentence TEXT NOT NULL, "
+                       "is_correct INTEGER, timestamp TEXT NOT NULL)")
+            db.execute("INSERT INTO sentences VALUES ('s1', 'u1', 'ir', 'presente', 'eu', 'vou', 'Eu vou à praia.', 1, "
+                       "'2024-01-01T00:00:00')")
+        assert [row["id"] for row in SqliteStorage(path).search_sentences("u1", "praia", 10)] == ["s1"]
+
+    def test_fts5_query_quotes_every_word(self):
+        assert fts5_query('eu "falo" -ou NEAR(x') == '"eu" "falo" "ou" "NEAR" "x"'
+        assert fts5_query("  ") == ""
+
+    def test_upsert_preference_updates_in_place(self, storage):
+        preference = {"user_id": "u1", "verb": "falar", "tense": "presente",
+                      "never_show": True, "always_show": False, "show_primarily": False}
+        storage.upsert_preference(preference)
+        [saved] = storage.upsert_preference(dict(preference, never_show=False, show_primarily=True))
+        assert (saved["never_show"], saved["show_primarily"]) == (False, True)
+        assert len(storage.preferences("u1")) == 1
+
+    def test_connections_are_per_thread(self, storage):
+        storage.insert_results([result("eu", "falo", True, "2024-01-02T00:00:00")])
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(storage.latest_results("u1")))
+        thread.start()
+        thread.join()
+        assert len(seen[0]) == 1
+
+    def test_make_storage(self, tmp_path):
+        assert make_storage("supabase", supabase_client=None) is None
+        assert isinstance(make_storage("sqlite", sqlite_path=str(tmp_path / "x.sqlite3")), SqliteStorage)
+        with pytest.raises(ValueError):
+            make_storage("mysql")
+
+
+class TestDbHandlerOnSqlite:
+    def test_results_preferences_and_sentences_persist(self, sqlite_db_handler):
+        db_handler.save_results([{"verb": "falar", "tense": "presente", "pronoun": "eu", "user_answer": "falo",
+                                  "is_correct": True, "timestamp": "2024-01-02T00:00:00"}], "u1")
+        db_handler.save_preference({"verb": "falar", "tense": "presente", "never_show": True,
+                                    "always_show": False, "show_primarily": False}, "u1")
+        db_handler.save_sentence({"verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo",
+                                  "sentence": "Eu falo.", "is_correct": True}, "u1")
+        user_cache.invalidate()
+
+        assert db_handler.load_results("u1")["falar_presente"]["eu"] == {
+            "user_answer": "falo", "timestamp": "2024-01-02T00:00:00", "correct": True}
+        assert db_handler.load_preferences("u1")["falar"]["presente"]["never_show"] is True
+        assert [s["sentence"] for s in db_handler.load_sentences("u1")] == ["Eu falo."]
+
+    def test_sentence_pages_through_db_handler(self, sqlite_db_handler):
+        for i in range(3):
+            db_handler.save_sentence({"verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo",
+                                      "sentence": f"Eu falo {i}.", "is_correct": True,
+                                      "timestamp": f"2024-01-0{i + 1}T00:00:00"}, "u1")
+        page, cursor = db_handler.load_sentence_page("u1", 2)
+        assert [s["sentence"] for s in page] == ["Eu falo 2.", "Eu falo 1."]
+        assert decode_cursor(cursor) == (page[-1]["timestamp"], page[-1]["id"])
+        page, cursor = db_handler.load_sentence_page("u1", 2, cursor=cursor)
+        assert [s["sentence"] for s in page] == ["Eu falo 0."]
+        assert cursor is None
+        with pytest.raises(ValueError):
+            db_handler.load_sentence_page("u1", 2, cursor="not-a-cursor")
+
+    def test_search_pages_through_db_handler(self, sqlite_db_handler):
+        for i in range(3):
+            db_handler.save_sentence({"verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo",
+                                      "sentence": "Eu falo" + " muito" * i + ".", "is_correct": True}, "u1")
+        page, cursor = db_handler.search_sentences("falo", "u1", limit=2)
+        assert len(page) == 2
+        rest, cursor = db_handler.search_sentences("falo", "u1", limit=2, cursor=cursor)
+        assert len(rest) == 1 and cursor is None
+        assert {row["id"] for row in page + rest} == {row["id"] for row in db_handler.load_sentences("u1")}
+        with pytest.raises(ValueError):
+            db_handler.search_sentences("falo", "u1", cursor="e30") # {}
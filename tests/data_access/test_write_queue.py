@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src.data_access.write_queue import WriteBehindQueue, WriteQueueFull, read_journal
+
+
+class RecordingWriter:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("database unavailable")
+        self.batches.append([dict(row) for row in rows])
+
+
+def make_queue(tmp_path, writer, **options):
+    options.setdefault("flush_interval_seconds", 0.01)
+    options.setdefault("backoff_base", 0.001)
+    return WriteBehindQueue(str(tmp_path), writer, fsync=False, **options)
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class TestWriteBehindQueue:
+    def test_rows_are_journaled_then_written_and_acked(self, tmp_path):
+        writer = RecordingWriter()
+        queue = make_queue(tmp_path, writer)
+        keys = queue.enqueue([{"verb": "falar"}, {"verb": "comer"}])
+        assert len(set(keys)) == 2
+        assert queue.drain(5) == 0
+        written = [row for batch in writer.batches for row in batch]
+        assert [row["idempotency_key"] for row in written] == keys
+        assert read_journal(queue.journal_path) == {}
+        assert queue.stats()["flushed"] == 2
+
+    def test_failed_writes_are_retried(self, tmp_path):
+        writer = RecordingWriter(failures=2)
+        queue = make_queue(tmp_path, writer)
+        queue.enqueue([{"verb": "falar"}])
+        assert queue.drain(5) == 0
+        assert writer.calls == 3
+        assert queue.stats()["failed_attempts"] == 2
+        assert len(writer.batches) == 1
+
+    def test_rows_are_written_in_batches(self, tmp_path):
+        writer = RecordingWriter()
+        queue = make_queue(tmp_path, writer, batch_size=3, flush_interval_seconds=10)
+        queue.enqueue([{"n": n} for n in range(7)])
+        assert queue.drain(5) == 0
+        assert [len(batch) for batch in writer.batches] == [3, 3, 1]
+
+    def test_journal_of_a_dead_process_is_replayed(self, tmp_path):
+        orphan = tmp_path / f"results-{dead_pid()}.journal"
+        orphan.write_text(
+            json.dumps({"k": "a", "r": {"verb": "falar", "idempotency_key": "a"}}) + "\n"
+            + json.dumps({"k": "b", "r": {"verb": "comer", "idempotency_key": "b"}}) + "\n"
+            + json.dumps({"ack": ["a"]}) + "\n"
+            + '{"k": "c", "r": {"verb"' # torn write from the crash
+        )
+        writer = RecordingWriter()
+        queue = make_queue(tmp_path, writer)
+        queue.start()
+        assert queue.drain(5) == 0
+        assert writer.batches == [[{"verb": "comer", "idempotency_key": "b"}]]
+        assert not orphan.exists()
+
+    def test_backpressure_when_too_many_rows_are_pending(self, tmp_path):
+        release = threading.Event()
+        writer = RecordingWriter()
+        queue = make_queue(tmp_path, lambda rows: (release.wait(5), writer(rows)), max_pending=2,
+                           backpressure_timeout_seconds=0.05)
+        queue.enqueue([{"n": 1}, {"n": 2}])
+        with pytest.raises(WriteQueueFull):
+            queue.enqueue([{"n": 3}])
+        release.set()
+        assert queue.drain(5) == 0
+
+    def test_journal_is_compacted(self, tmp_path):
+        queue = make_queue(tmp_path, RecordingWriter(), compact_bytes=1)
+        for n in range(5):
+            queue.enqueue([{"n": n}])
+        assert queue.drain(5) == 0
+        assert os.path.getsize(queue.journal_path) == 0
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import patch
+from src import create_app
+from src.data_access import db_handler
+from src.core_data import VERBS, PRONOUNS
+
+@pytest.fixture
+def client():
+    flask_app = create_app()
+    flask_app.config['TESTING'] = True
+    flask_app.config['SECRET_KEY'] = 'test_secret_key'
+    # Building the app must not start the result write queue
+    assert db_handler.result_queue is None
+    with flask_app.test_client() as client:
+        with flask_app.app_context():
+            yield client
+    db_handler.stop_result_queue()
+
+@pytest.fixture(autouse=True)
+def mock_data_access():
+    with patch('src.services.exercise_service.select_exercises', autospec=True) as mock_select_exercises, \
+         patch('src.services.exercise_service.update_results_batch', autospec=True) as mock_update_results_batch:
+        mock_select_exercises.return_value = [("falar", "presente"), ("comer", "presente")]
+        yield mock_select_exercises, mock_update_results_batch
+
+class TestApiRoutes:
+    def test_catalogue_is_cacheable_and_conditional(self, client):
+        response = client.get('/api/catalogue')
+        assert response.status_code == 200
+        assert response.json['pronouns'] == PRONOUNS
+        assert 'public' in response.headers['Cache-Control']
+        etag = response.headers['ETag']
+
+        response = client.get('/api/catalogue', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.get_data() == b''
+
+    def test_fetching_a_set_does_not_touch_the_session(self, client, mock_data_access):
+        response = client.get('/api/exercise_set?count=2')
+        assert response.status_code == 200
+        assert [(item['verb'], item['tense']) for item in response.json['exercises']] == [("falar", "presente"), ("comer", "presente")]
+        assert response.headers['Cache-Control'] == 'private, no-store'
+        assert client.get_cookie('session') is None
+        assert client.get('/api/exercise_set?count=0').status_code == 400
+
+    def test_submit_grades_the_set_and_starts_remediation(self, client, mock_data_access):
+        _, mock_update_results_batch = mock_data_access
+        falar = list(VERBS['falar']['presente'])
+        comer = list(VERBS['comer']['presente'])
+        response = client.post('/api/exercise_set', json={'exercises': [
+            {'verb': 'falar', 'tense': 'presente', 'answers': falar},
+            {'verb': 'comer', 'tense': 'presente', 'answers': comer[:3] + ['errado']},
+        ]})
+        assert response.status_code == 200
+        assert [item['all_correct'] for item in response.json['results']] == [True, False]
+        mock_update_results_batch.assert_called_once()
+
+        response = client.get(response.json['remediation_url'])
+        assert response.status_code == 200
+        assert response.json['sentence_errors'] == [{'verb': 'comer', 'tense': 'presente', 'pronoun': 'eles',
+                                                     'correct': comer[3], 'user_answer': 'errado'}]
+        assert client.get('/api/remediation', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+        # The HTML remediation flow picks up the same errors
+        body = client.get('/remediation_flow').get_data(as_text=True)
+        assert f'value="{comer[3]}"' in body
+
+    def test_submit_rejects_malformed_sets(self, client):
+        assert client.post('/api/exercise_set', json={}).status_code == 400
+        assert client.post('/api/exercise_set', json={'exercises': [
+            {'verb': 'xyzzy', 'tense': 'presente', 'answers': ['a', 'b', 'c', 'd']}]}).status_code == 400
+        assert client.post('/api/exercise_set', json={'exercises': [
+            {'verb': 'falar', 'tense': 'presente', 'answers': ['a']}]}).status_code == 400
+
+    def test_remediation_without_a_set(self, client):
+        assert client.get('/api/remediation').status_code == 404
+
+    def test_sentences_are_paged_with_a_cursor(self, client):
+        rows = [{"id": "s1", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo",
+                 "sentence": "Eu falo.", "is_correct": True, "timestamp": "2024-01-01T10:00:00Z"}]
+        with patch('src.data_access.db_handler.load_sentence_page', autospec=True) as mock_page:
+            mock_page.return_value = (rows, "next")
+            response = client.get('/api/sentences?cursor=abc&verb=falar&is_correct=0&limit=5')
+            assert response.status_code == 200
+            assert response.json == {"sentences": rows, "next_cursor": "next"}
+            mock_page.assert_called_once_with("single_user", 5, cursor="abc", verb="falar", tense=None, is_correct=False)
+
+            body = client.get('/sentences?tense=presente').get_data(as_text=True)
+            assert "Eu falo." in body
+            assert 'data-cursor="next"' in body
+
+            mock_page.side_effect = ValueError("bad cursor")
+            assert client.get('/api/sentences?cursor=junk').status_code == 400
+        assert client.get('/api/sentences?limit=0').status_code == 400
+
+    def test_sentence_search(self, client):
+        rows = [{"id": "s1", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo",
+                 "sentence": "Eu falo.", "is_correct": True, "timestamp": "2024-01-01T10:00:00Z", "rank": 0.6}]
+        with patch('src.data_access.db_handler.search_sentences', autospec=True) as mock_search:
+            mock_search.return_value = (rows, "more")
+            response = client.get('/api/sentences/search?q=falo&limit=10')
+            assert response.status_code == 200
+            assert response.json == {"sentences": rows, "next_cursor": "more"}
+            mock_search.assert_called_once_with("falo", "single_user", 10, cursor=None)
+
+            body = client.get('/sentences?q=falo').get_data(as_text=True)
+            assert "Eu falo." in body
+            assert '/api/sentences/search?q=falo' in body
+        assert client.get('/api/sentences/search?q=%20').status_code == 400
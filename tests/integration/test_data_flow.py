@@ -3,7 +3,7 @@ from unittest.mock import patch, MagicMock
 from src import create_app # Import create_app from src/__init__.py
 from src.core_data import VERBS, PRONOUNS, TENSE_NAMES
 from src.data_access import db_handler # Import db_handler for DEFAULT_USER_ID
-# import json # Not needed for this assertion strategy
+import json
 
 @pytest.fixture
 def client():
@@ -11,9 +11,12 @@ def client():
     flask_app.config['TESTING'] = True
     flask_app.config['SESSION_TYPE'] = 'filesystem' # Use filesystem for session in tests
     flask_app.config['SECRET_KEY'] = 'test_secret_key' # Needed for session
+    # Building the app must not start the result write queue
+    assert db_handler.result_queue is None
     with flask_app.test_client() as client:
         with flask_app.app_context():
             yield client
+    db_handler.stop_result_queue()
 
 @pytest.fixture(autouse=True)
 def mock_db_handler_save_functions():
@@ -198,3 +201,71 @@ class TestDataFlow:
         assert actual_user_id == db_handler.DEFAULT_USER_ID
         assert response.status_code == 200
         assert response.json == {"success": True}
+
+    def test_batch_sentence_feedback_endpoint(self, client):
+        feedback = {"is_portuguese": True, "feedback": {}, "overall_comment": "Bom"}
+        with patch('src.services.exercise_service.get_gemini_batch_feedback', autospec=True) as mock_batch:
+            mock_batch.return_value = [feedback]
+            response = client.post('/get_sentences_feedback', json={'sentences': [
+                {'user_sentence': 'Eu falo português.', 'verb': 'falar', 'tense': 'presente', 'pronoun': 'eu', 'correct_form': 'falo'},
+                {'user_sentence': '', 'verb': 'falar', 'tense': 'presente', 'pronoun': 'ele', 'correct_form': 'fala'},
+            ]})
+
+        assert response.status_code == 200
+        assert response.json['feedback'][0] == feedback
+        assert 'error' in response.json['feedback'][1]
+        mock_batch.assert_called_once()
+        assert [item['user_sentence'] for item in mock_batch.call_args.args[0]] == ['Eu falo português.']
+
+        assert client.post('/get_sentences_feedback', json={}).status_code == 400
+
+    def test_streamed_sentence_feedback_endpoint(self, client):
+        feedback = {"is_portuguese": True, "feedback": {}, "overall_comment": "Bom"}
+        with patch('src.services.exercise_service.stream_gemini_batch_feedback', autospec=True) as mock_stream:
+            mock_stream.return_value = iter([(0, feedback)])
+            response = client.post('/stream_sentences_feedback', json={'sentences': [
+                {'user_sentence': '', 'verb': 'falar', 'tense': 'presente', 'pronoun': 'ele', 'correct_form': 'fala'},
+                {'user_sentence': 'Eu falo português.', 'verb': 'falar', 'tense': 'presente', 'pronoun': 'eu', 'correct_form': 'falo'},
+            ]})
+            body = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = [event.split('\n') for event in body.strip().split('\n\n')]
+        assert [lines[0] for lines in events] == ['event: feedback', 'event: feedback', 'event: done']
+        assert json.loads(events[0][1][len('data: '):]) == {"index": 0, "feedback": {"error": "Missing data for feedback request."}}
+        assert json.loads(events[1][1][len('data: '):]) == {"index": 1, "feedback": feedback}
+
+        assert client.post('/stream_sentences_feedback', json={}).status_code == 400
+
+    def test_session_cookie_holds_only_an_id(self, client):
+        client.get('/start_exercises')
+        client.post('/exercise', data={'answer_0': 'x', 'answer_1': 'x', 'answer_2': 'x', 'answer_3': 'x'},
+                    follow_redirects=True)
+        cookie = client.get_cookie('session')
+        assert cookie is not None
+        assert len(cookie.value) < 64
+        assert '.' not in cookie.value # not a signed, serialized session
+
+    def test_whole_set_is_graded_in_one_post(self, client, mock_exercise_service_select_exercises):
+        mock_exercise_service_select_exercises.return_value = [("falar", "presente"), ("comer", "presente")]
+        response = client.get('/start_exercises?mode=set')
+        assert response.status_code == 200
+        body = response.get_data(as_text=True)
+        assert 'name="answer_0_0"' in body and 'name="answer_1_3"' in body
+
+        falar, comer = VERBS['falar']['presente'], VERBS['comer']['presente']
+        form = {f'answer_0_{i}': form for i, form in enumerate(falar)}
+        form.update({f'answer_1_{i}': form for i, form in enumerate(comer)})
+        form['answer_1_2'] = 'errado'
+        with patch('src.services.exercise_service.update_results_batch', autospec=True) as mock_update_batch:
+            response = client.post('/exercise_set', data=form)
+        assert response.status_code == 200
+        mock_update_batch.assert_called_once()
+        submissions = mock_update_batch.call_args[0][0]
+        assert [(verb, tense) for verb, tense, _ in submissions] == [("falar", "presente"), ("comer", "presente")]
+
+        # The one error goes on to sentence practice, as in the one-exercise-at-a-time flow
+        response = client.get('/remediation_flow')
+        body = response.get_data(as_text=True)
+        assert f'name="error_sentence_0_correct" value="{comer[2]}"' in body
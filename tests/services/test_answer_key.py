@@ -0,0 +1,43 @@
+from src.conjugation_table import ConjugationTable
+from src.services.answer_key import AnswerKey, CORRECT, WRONG, ACCENT_ONLY, UNANSWERED, normalize_answer
+
+PRONOUNS = ["eu", "ele", "nós", "eles"]
+
+
+def make_key():
+    nested = {
+        "falar": {"presente": ["falo", "fala", "falamos", "falam"],
+                  "preterito_perfeito": ["falei", "falou", "falámos", "falaram"]},
+        "ser": {"presente": ["sou", "é", "somos", "são"]},
+    }
+    return AnswerKey(ConjugationTable.from_nested(nested, PRONOUNS, tenses=["presente", "preterito_perfeito"]))
+
+
+class TestAnswerKey:
+    def test_normalize_answer_trims_casefolds_and_composes(self):
+        assert normalize_answer("  FALÁMOS ") == "falámos"
+        assert normalize_answer("falámos") == "falámos" # decomposed accent
+
+    def test_grades_many_submissions_at_once(self):
+        graded = make_key().grade_batch([
+            ("falar", "presente", ["Falo", "fala ", "falemos", ""]),
+            ("ser", "presente", ["sou", "é", "somos", "são"]),
+        ])
+        assert graded == [bytes([CORRECT, CORRECT, WRONG, WRONG]), bytes([CORRECT] * 4)]
+
+    def test_accent_differences_are_reported_and_optionally_accepted(self):
+        key = make_key()
+        submission = [("falar", "preterito_perfeito", ["falei", "falou", "falamos", "falaram"])]
+        assert key.grade_batch(submission)[0][2] == ACCENT_ONLY
+        assert key.grade_batch(submission, accent_insensitive=True)[0][2] == CORRECT
+        assert key.grade_batch([("ser", "presente", ["sou", "e", "somos", "sao"])], accent_insensitive=True)[0] == bytes([CORRECT] * 4)
+
+    def test_unanswered_cells_and_unknown_exercises(self):
+        graded = make_key().grade_batch([
+            ("falar", "presente", [None, "fala"]), # e.g. historical rows for two of the pronouns
+            ("ser", "preterito_perfeito", ["fui"] * 4), # tense missing for this verb
+            ("xyzzy", "presente", ["x"] * 4),
+        ])
+        assert graded[0] == bytes([UNANSWERED, CORRECT, UNANSWERED, UNANSWERED])
+        assert graded[1] is None
+        assert graded[2] is None
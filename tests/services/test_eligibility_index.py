@@ -0,0 +1,70 @@
+import random
+from src.services.eligibility_index import EligibilityIndex, IdPool
+
+PRONOUNS = ["eu", "ele", "nós", "eles"]
+VERBS = {
+    "falar": {"presente": ["falo", "fala", "falamos", "falam"], "preterito_perfeito": ["falei", "falou", "falamos", "falaram"]},
+    "comer": {"presente": ["como", "come", "comemos", "comem"]},
+}
+
+def all_correct_results(verb, tense):
+    return {f"{verb}_{tense}": {pronoun: {"correct": True} for pronoun in PRONOUNS}}
+
+def test_default_preferences_put_everything_in_secondary_pool():
+    index = EligibilityIndex.build(VERBS, PRONOUNS, {}, {})
+    primary, secondary = index.pools()
+    assert primary == []
+    assert set(secondary) == {("falar", "presente"), ("falar", "preterito_perfeito"), ("comer", "presente")}
+
+def test_build_matches_preference_rules():
+    preferences = {
+        "falar": {"presente": {"never_show": True}, "preterito_perfeito": {"show_primarily": True}},
+        "comer": {"presente": {"show_primarily": True}},
+    }
+    results = all_correct_results("comer", "presente")
+    index = EligibilityIndex.build(VERBS, PRONOUNS, results, preferences)
+    primary, secondary = index.pools()
+    # Completed show_primarily exercises drop to the secondary pool; never_show ones disappear
+    assert primary == [("falar", "preterito_perfeito")]
+    assert secondary == [("comer", "presente")]
+
+def test_completed_exercise_leaves_pools_unless_always_show():
+    index = EligibilityIndex.build(VERBS, PRONOUNS, all_correct_results("falar", "presente"), {})
+    assert ("falar", "presente") not in index.pools()[1]
+    index.apply_preference("falar", "presente", {"always_show": True})
+    assert ("falar", "presente") in index.pools()[1]
+
+def test_apply_result_moves_exercise_incrementally():
+    index = EligibilityIndex.build(VERBS, PRONOUNS, {}, {})
+    for pronoun in PRONOUNS:
+        index.apply_result("comer", "presente", pronoun, True)
+    assert ("comer", "presente") not in index.pools()[1]
+    index.apply_result("comer", "presente", "ele", False)
+    assert ("comer", "presente") in index.pools()[1]
+
+def test_select_prefers_primary_then_fills_from_secondary():
+    verbs = {f"verb{i}": {"presente": []} for i in range(20)}
+    preferences = {f"verb{i}": {"presente": {"show_primarily": True}} for i in range(2)}
+    index = EligibilityIndex.build(verbs, PRONOUNS, {}, preferences)
+    selected = index.select(5, primary_target=3, rng=random.Random(0))
+    assert len(selected) == len(set(selected)) == 5
+    assert set(selected[:2]) == {("verb0", "presente"), ("verb1", "presente")}
+
+def test_select_tops_up_from_primary_when_secondary_is_short():
+    verbs = {f"verb{i}": {"presente": []} for i in range(6)}
+    preferences = {f"verb{i}": {"presente": {"show_primarily": True}} for i in range(5)}
+    index = EligibilityIndex.build(verbs, PRONOUNS, {}, preferences)
+    selected = index.select(5, primary_target=3, rng=random.Random(0))
+    assert len(set(selected)) == 5
+    assert ("verb5", "presente") in selected
+
+def test_id_pool_add_remove_sample():
+    pool = IdPool(10)
+    for item_id in (1, 4, 7):
+        pool.add(item_id)
+    pool.add(4)
+    pool.remove(1)
+    pool.remove(9)
+    assert sorted(pool.ids) == [4, 7]
+    assert 1 not in pool and 7 in pool
+    assert sorted(pool.sample(5)) == [4, 7]
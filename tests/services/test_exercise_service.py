@@ -1,6 +1,21 @@
+import unicodedata
 import pytest
-from src.services.exercise_service import select_exercises
+from src.services.exercise_service import select_exercises, update_results, invalidate_eligibility_index
 from src.core_data import VERBS
+from src.services.feedback_cache import FeedbackCache
+
+@pytest.fixture(autouse=True)
+def memory_feedback_cache(mocker):
+    # Never read or write the on-disk feedback cache from tests
+    cache = FeedbackCache(path=None)
+    mocker.patch('src.services.exercise_service.feedback_cache', cache)
+    return cache
+
+@pytest.fixture(autouse=True)
+def reset_eligibility_indexes():
+    invalidate_eligibility_index()
+    yield
+    invalidate_eligibility_index()
 
 @pytest.fixture
 def mock_preferences_full():
@@ -98,3 +113,160 @@ def test_select_exercises_no_exercises_available(mocker, mock_preferences_empty)
     exercises = select_exercises(num_exercises)
 
     assert exercises == []
+
+def test_update_results_writes_all_pronouns_in_one_call(mocker):
+    """
+    update_results should build one row per pronoun and hand them to save_results in a single call.
+    """
+    mock_save_results = mocker.patch('src.data_access.db_handler.save_results')
+    mock_save_result = mocker.patch('src.data_access.db_handler.save_result')
+
+    answers = list(VERBS["falar"]["presente"])
+    answers[1] = "errado"
+    update_results("falar", "presente", answers, "test_user_123")
+
+    mock_save_result.assert_not_called()
+    mock_save_results.assert_called_once()
+    rows, user_id = mock_save_results.call_args.args
+    assert user_id == "test_user_123"
+    assert [row["pronoun"] for row in rows] == ["eu", "ele", "nós", "eles"]
+    assert [row["is_correct"] for row in rows] == [True, False, True, True]
+    assert len({row["timestamp"] for row in rows}) == 1
+
+def test_update_results_stores_the_grade_the_user_saw(mocker):
+    """A differently cased or composed answer that grades as correct is stored as correct."""
+    mock_save_results = mocker.patch('src.data_access.db_handler.save_results')
+
+    answers = list(VERBS["pôr"]["presente"])
+    answers[0] = answers[0].upper()
+    answers[1] = unicodedata.normalize("NFD", answers[1]) + " "
+    update_results("pôr", "presente", answers, "test_user_123")
+
+    rows, _ = mock_save_results.call_args.args
+    assert [row["is_correct"] for row in rows] == [True, True, True, True]
+
+def _gemini_response(feedback_objects, raw_response="[...]", error=None):
+    return {
+        "feedback_list": [{"gemini_feedback": fb, "original_sentence": ""} for fb in feedback_objects],
+        "debug_info": {"raw_response": raw_response, "error": error}
+    }
+
+def test_batch_feedback_uses_one_model_call(mocker):
+    from src.services.exercise_service import get_gemini_batch_feedback
+    mocker.patch('src.services.gemini_service.GOOGLE_API_KEY', 'test-key')
+    good = {"is_portuguese": True, "feedback": {}, "overall_comment": "Bom"}
+    mock_gemini = mocker.patch('src.services.gemini_service.get_feedback_from_gemini_async', return_value=_gemini_response([good, good]))
+    items = [
+        {"user_sentence": "Eu falo.", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo"},
+        {"user_sentence": "Ele come.", "verb": "comer", "tense": "presente", "pronoun": "ele", "correct_form": "come"},
+    ]
+
+    assert get_gemini_batch_feedback(items) == [good, good]
+    mock_gemini.assert_called_once_with(["Eu falo.", "Ele come."])
+
+def test_batch_feedback_retries_only_malformed_entries(mocker):
+    from src.services.exercise_service import get_gemini_batch_feedback
+    mocker.patch('src.services.gemini_service.GOOGLE_API_KEY', 'test-key')
+    good = {"is_portuguese": True, "feedback": {}, "overall_comment": "Bom"}
+    retried = {"is_portuguese": False, "feedback": None, "overall_comment": "Não é português"}
+    mock_gemini = mocker.patch('src.services.gemini_service.get_feedback_from_gemini_async', side_effect=[
+        _gemini_response([good, "not an object"]),
+        _gemini_response([retried]),
+    ])
+    items = [
+        {"user_sentence": "Eu falo.", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo"},
+        {"user_sentence": "Come bem hello.", "verb": "comer", "tense": "presente", "pronoun": "ele", "correct_form": "come"},
+    ]
+
+    assert get_gemini_batch_feedback(items) == [good, retried]
+    assert mock_gemini.call_count == 2
+    assert mock_gemini.call_args_list[1].args[0] == ["Come bem hello."]
+
+def test_batch_feedback_does_not_retry_when_call_failed(mocker):
+    from src.services.exercise_service import get_gemini_batch_feedback
+    mocker.patch('src.services.gemini_service.GOOGLE_API_KEY', 'test-key')
+    failure = {"error": "API call failed: timeout"}
+    mock_gemini = mocker.patch('src.services.gemini_service.get_feedback_from_gemini_async',
+                               return_value=_gemini_response([failure, failure], raw_response=None, error="timeout"))
+    items = [{"user_sentence": f"Eu falo {i} vezes.", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo"} for i in range(2)]
+
+    assert get_gemini_batch_feedback(items) == [failure, failure]
+    mock_gemini.assert_called_once()
+
+def test_batch_feedback_is_served_from_cache_on_repeat(mocker):
+    from src.services.exercise_service import get_gemini_batch_feedback
+    mocker.patch('src.services.gemini_service.GOOGLE_API_KEY', 'test-key')
+    good = {"is_portuguese": True, "feedback": {}, "overall_comment": "Bom"}
+    mock_gemini = mocker.patch('src.services.gemini_service.get_feedback_from_gemini_async', return_value=_gemini_response([good]))
+    item = {"user_sentence": "Eu  falo.", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo"}
+
+    assert get_gemini_batch_feedback([item]) == [good]
+    # Whitespace differences normalize to the same cache entry
+    assert get_gemini_batch_feedback([dict(item, user_sentence="Eu falo. ")]) == [good]
+    mock_gemini.assert_called_once()
+
+def test_failed_feedback_is_not_cached(mocker, memory_feedback_cache):
+    from src.services.exercise_service import get_gemini_sentence_feedback
+    mocker.patch('src.services.gemini_service.GOOGLE_API_KEY', 'test-key')
+    mock_gemini = mocker.patch('src.services.gemini_service.get_feedback_from_gemini_async',
+                               return_value=_gemini_response([{"error": "Invalid response format from API"}]))
+
+    get_gemini_sentence_feedback("Eu falo.", "falar", "presente", "eu", "falo")
+    get_gemini_sentence_feedback("Eu falo.", "falar", "presente", "eu", "falo")
+    assert mock_gemini.call_count == 2
+    assert memory_feedback_cache.stats()["memory_entries"] == 0
+
+def test_stream_batch_feedback_yields_hits_then_stream_then_retries(mocker, memory_feedback_cache):
+    from src.services.exercise_service import stream_gemini_batch_feedback, _feedback_key
+    mocker.patch('src.services.gemini_service.GOOGLE_API_KEY', 'test-key')
+    good = {"is_portuguese": True, "feedback": {}, "overall_comment": "Bom"}
+    retried = {"is_portuguese": False, "feedback": None, "overall_comment": "Not Portuguese"}
+    items = [
+        {"user_sentence": "Eu falo.", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo"},
+        {"user_sentence": "Ele come.", "verb": "comer", "tense": "presente", "pronoun": "ele", "correct_form": "come"},
+        {"user_sentence": "Falamos hello.", "verb": "falar", "tense": "presente", "pronoun": "nós", "correct_form": "falamos"},
+    ]
+    memory_feedback_cache.set(_feedback_key(**{**items[0]}), good)
+
+    streamed_batches = []
+    async def fake_stream(sentences):
+        streamed_batches.append(sentences)
+        yield 0, good
+        yield 1, {"error": "Invalid response format from API"}
+    mocker.patch('src.services.gemini_service.stream_feedback_from_gemini_async', fake_stream)
+    mock_single = mocker.patch('src.services.gemini_service.get_feedback_from_gemini_async',
+                               return_value=_gemini_response([retried]))
+
+    assert list(stream_gemini_batch_feedback(items)) == [(0, good), (1, good), (2, retried)]
+    assert streamed_batches == [["Ele come.", "Falamos hello."]]
+    mock_single.assert_called_once_with(["Falamos hello."])
+
+def test_prechecked_sentences_skip_gemini(mocker):
+    from src.services.exercise_service import get_gemini_batch_feedback
+    mocker.patch('src.services.gemini_service.GOOGLE_API_KEY', 'test-key')
+    mock_gemini = mocker.patch('src.services.gemini_service.get_feedback_from_gemini_async')
+    items = [
+        {"user_sentence": "I like coffee.", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo"},
+        {"user_sentence": "Eu gosto de café.", "verb": "falar", "tense": "presente", "pronoun": "eu", "correct_form": "falo"},
+    ]
+
+    feedback = get_gemini_batch_feedback(items)
+    assert [item["is_portuguese"] for item in feedback] == [False, True]
+    mock_gemini.assert_not_called()
+
+def test_grade_batch_uses_the_catalogue():
+    from src.services.exercise_service import grade_batch
+    from src.services.answer_key import CORRECT, WRONG
+    forms = VERBS["falar"]["presente"]
+    graded = grade_batch([("falar", "presente", [forms[0].upper(), forms[1], "x", ""])])
+    assert graded == [bytes([CORRECT, CORRECT, WRONG, WRONG])]
+
+def test_feedback_cache_is_keyed_by_model_backend(mocker):
+    from src.services import gemini_service
+    from src.services.exercise_service import _feedback_key
+    from src.services.model_backends import FakeModelBackend, GeminiBackend
+    args = ("Eu falo.", "falar", "presente", "eu", "falo")
+    mocker.patch.object(gemini_service, 'model_backend', GeminiBackend(gemini_service.MODEL_NAME))
+    real_key = _feedback_key(*args)
+    mocker.patch.object(gemini_service, 'model_backend', FakeModelBackend(latency_ms=0))
+    assert _feedback_key(*args) != real_key
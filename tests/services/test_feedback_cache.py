@@ -0,0 +1,40 @@
+from src.services.feedback_cache import FeedbackCache, feedback_cache_key, normalize_sentence
+
+FEEDBACK = {"is_portuguese": True, "feedback": {"suggestions": []}, "overall_comment": "Muito bem!"}
+
+def make_key(sentence="Eu falo português.", model_name="model-a", prompt_version="1"):
+    return feedback_cache_key(sentence, "falar", "presente", "eu", "falo", model_name, prompt_version)
+
+def test_normalize_sentence_collapses_whitespace_and_composes_accents():
+    assert normalize_sentence("  Eu   falo\tportuguês ") == "Eu falo português"
+
+def test_key_depends_on_model_and_prompt_version():
+    assert make_key() == make_key("Eu  falo português. ")
+    assert make_key() != make_key(model_name="model-b")
+    assert make_key() != make_key(prompt_version="2")
+
+def test_memory_only_cache_round_trip():
+    cache = FeedbackCache(path=None)
+    assert cache.get(make_key()) is None
+    cache.set(make_key(), FEEDBACK)
+    assert cache.get(make_key()) == FEEDBACK
+    assert cache.stats() == {"hits": 1, "misses": 1, "memory_entries": 1}
+
+def test_entries_persist_in_sqlite(tmp_path):
+    path = str(tmp_path / "feedback.sqlite3")
+    cache = FeedbackCache(path=path)
+    cache.set(make_key(), FEEDBACK)
+    cache.close()
+
+    reopened = FeedbackCache(path=path)
+    assert reopened.get(make_key()) == FEEDBACK
+    reopened.close()
+
+def test_memory_layer_is_bounded(tmp_path):
+    cache = FeedbackCache(path=str(tmp_path / "feedback.sqlite3"), max_entries=1)
+    cache.set("a", FEEDBACK)
+    cache.set("b", FEEDBACK)
+    assert cache.stats()["memory_entries"] == 1
+    # Evicted from memory but still on disk
+    assert cache.get("a") == FEEDBACK
+    cache.close()
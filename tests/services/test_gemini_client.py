@@ -0,0 +1,106 @@
+import asyncio
+import random
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from src.services.gemini_client import AsyncGeminiClient, GeminiTimeout
+
+
+def make_client(generate, **kwargs):
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("rng", random.Random(0))
+    return AsyncGeminiClient(generate, **kwargs)
+
+def test_concurrency_is_bounded_by_semaphore():
+    in_flight = 0
+    peak = 0
+
+    async def generate(prompt):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return prompt.upper()
+
+    client = make_client(generate, max_concurrency=2)
+
+    async def main():
+        return await asyncio.gather(*(client.generate(f"p{i}") for i in range(6)))
+
+    assert asyncio.run(main()) == [f"P{i}" for i in range(6)]
+    assert peak == 2
+
+def test_transient_errors_are_retried():
+    calls = []
+
+    async def generate(prompt):
+        calls.append(prompt)
+        if len(calls) < 3:
+            raise google_exceptions.ServiceUnavailable("busy")
+        return "[]"
+
+    client = make_client(generate, max_retries=2)
+    assert asyncio.run(client.generate("prompt")) == "[]"
+    assert len(calls) == 3
+
+def test_non_transient_errors_are_not_retried():
+    calls = []
+
+    async def generate(prompt):
+        calls.append(prompt)
+        raise google_exceptions.InvalidArgument("bad prompt")
+
+    client = make_client(generate, max_retries=2)
+    with pytest.raises(google_exceptions.InvalidArgument):
+        asyncio.run(client.generate("prompt"))
+    assert len(calls) == 1
+
+def test_deadline_raises_gemini_timeout():
+    async def generate(prompt):
+        await asyncio.sleep(10)
+
+    client = make_client(generate, timeout_seconds=0.05)
+    with pytest.raises(GeminiTimeout):
+        asyncio.run(client.generate("prompt"))
+
+def test_run_cancels_work_that_outlives_its_timeout():
+    cancelled = asyncio.Event()
+    started = []
+
+    async def slow():
+        started.append(True)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    client = make_client(None)
+    with pytest.raises(GeminiTimeout):
+        client.run(slow(), timeout_seconds=0.05)
+
+    async def wait_for_cancel():
+        for _ in range(100):
+            if cancelled.is_set():
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    assert started
+    assert client.run(wait_for_cancel())
+
+def test_stream_retries_before_first_chunk_and_iterate_bridges_to_threads():
+    attempts = []
+
+    async def stream(prompt):
+        attempts.append(prompt)
+        if len(attempts) == 1:
+            raise google_exceptions.TooManyRequests("slow down")
+        for chunk in ("[1,", " 2]"):
+            yield chunk
+
+    client = make_client(None, stream=stream)
+    assert list(client.iterate(client.stream("prompt"))) == ["[1,", " 2]"]
+    assert len(attempts) == 2
@@ -0,0 +1,44 @@
+import asyncio
+
+from src.services import gemini_service
+
+
+def test_malformed_element_only_breaks_its_own_sentence(mocker):
+    mocker.patch('src.services.gemini_service.GOOGLE_API_KEY', 'test-key')
+    response_text = '[{"is_portuguese": true, "feedback": {}}, {"is_portuguese": tru, "feedback": {}}]'
+    mocker.patch.object(gemini_service.gemini_client, 'generate', return_value=response_text)
+
+    result = asyncio.run(gemini_service.get_feedback_from_gemini_async(["Eu falo.", "Ele come."]))
+
+    feedback = [item["gemini_feedback"] for item in result["feedback_list"]]
+    assert feedback[0] == {"is_portuguese": True, "feedback": {}}
+    assert "error" in feedback[1]
+    assert result["debug_info"]["broken_indexes"] == [1]
+    assert result["debug_info"]["raw_response"] == response_text
+
+def test_prompt_template_is_versioned_by_its_text():
+    from src.services.prompt_template import PromptTemplate
+    template = PromptTemplate("1", ["Evaluate these sentences:"], "Sentence {index}: \"{item}\"")
+    edited = PromptTemplate("1", ["Evaluate these sentences carefully:"], "Sentence {index}: \"{item}\"")
+
+    assert template.render(["Eu falo.", "Ele come."]) == 'Evaluate these sentences:\nSentence 0: "Eu falo."\nSentence 1: "Ele come."'
+    assert template.version.startswith("1-")
+    assert template.version != edited.version
+
+def test_batched_feedback_packs_concurrent_requests_into_one_call(mocker):
+    calls = []
+
+    async def fake_feedback(sentences):
+        calls.append(list(sentences))
+        return {"feedback_list": [{"gemini_feedback": {"n": s}, "original_sentence": s} for s in sentences],
+                "debug_info": {"raw_response": "[...]", "error": None}}
+    mocker.patch('src.services.gemini_service.get_feedback_from_gemini_async', fake_feedback)
+
+    async def main():
+        return await asyncio.gather(gemini_service.get_feedback_batched_async(["a", "b"]),
+                                    gemini_service.get_feedback_batched_async(["c"]))
+
+    first, second = asyncio.run(main())
+    assert calls == [["a", "b", "c"]]
+    assert [item["gemini_feedback"] for item in first["feedback_list"]] == [{"n": "a"}, {"n": "b"}]
+    assert [item["gemini_feedback"] for item in second["feedback_list"]] == [{"n": "c"}]
@@ -0,0 +1,54 @@
+import json
+
+from src.services.json_stream import JsonArrayParser, JsonArrayScanner, ParsedElement, parse_json_array
+
+RESPONSE = '```json\n[{"overall_comment": "Use \\"falo\\" [sic]", "feedback": {"suggestions": ["a", "b"]}}, 3, "x,y", null]\n```'
+
+def test_whole_response_is_split_into_elements():
+    scanner = JsonArrayScanner()
+    elements = scanner.feed(RESPONSE)
+    assert [json.loads(element) for element in elements] == json.loads(RESPONSE[len('```json\n'):-len('\n```')])
+    assert scanner.finished
+
+def test_elements_are_emitted_as_soon_as_they_complete():
+    scanner = JsonArrayScanner()
+    seen = []
+    for position, char in enumerate(RESPONSE):
+        for element in scanner.feed(char):
+            seen.append((position, element))
+    first_close = RESPONSE.index('}},') + 1
+    assert seen[0] == (first_close, '{"overall_comment": "Use \\"falo\\" [sic]", "feedback": {"suggestions": ["a", "b"]}}')
+    assert [element for _, element in seen[1:]] == ['3', '"x,y"', 'null']
+
+def test_incomplete_array_leaves_partial_element_pending():
+    scanner = JsonArrayScanner()
+    assert scanner.feed('[{"a": 1}, {"b": ') == ['{"a": 1}']
+    assert not scanner.finished
+
+def test_one_broken_element_does_not_discard_the_others():
+    text = '[{"is_portuguese": true}, {"is_portuguese": maybe}, {"is_portuguese": false}]'
+    values, broken_indexes = parse_json_array(text, 3)
+    assert values == [{"is_portuguese": True}, None, {"is_portuguese": False}]
+    assert broken_indexes == [1]
+
+def test_common_model_mistakes_are_repaired():
+    text = '''[
+      {"original_sentence_index": "0", // String: 0-based index
+       "is_portuguese": True,
+       "feedback": null, # the JSON null literal
+       "overall_comment": "Linha um
+    linha dois",},
+    ]'''
+    values, broken_indexes = parse_json_array(text, 1)
+    assert broken_indexes == []
+    assert values[0] == {"original_sentence_index": "0", "is_portuguese": True, "feedback": None,
+                         "overall_comment": "Linha um\n    linha dois"}
+
+def test_parser_reports_truncated_and_missing_elements():
+    parser = JsonArrayParser()
+    parsed = parser.feed('[{"a": 1}, {"b": ')
+    assert parsed == [ParsedElement(0, {"a": 1}, None)]
+    cut_off = parser.close()
+    assert [element.index for element in cut_off] == [1] and cut_off[0].error is not None
+
+    assert parse_json_array('[{"a": 1}, {"b": ', 3) == ([{"a": 1}, None, None], [1, 2])
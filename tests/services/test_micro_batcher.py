@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from src.services.micro_batcher import MicroBatcher
+
+
+def make_batcher(batches, **kwargs):
+    async def run_batch(items):
+        batches.append(list(items))
+        return [item.upper() for item in items]
+    kwargs.setdefault("max_tokens", 100)
+    kwargs.setdefault("max_wait_seconds", 0.01)
+    return MicroBatcher(run_batch, **kwargs)
+
+def test_concurrent_submissions_share_a_batch_and_get_their_own_results():
+    batches = []
+    batcher = make_batcher(batches)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(word) for word in ["um", "dois", "três"]))
+
+    assert asyncio.run(main()) == ["UM", "DOIS", "TRÊS"]
+    assert batches == [["um", "dois", "três"]]
+
+def test_token_budget_splits_batches():
+    batches = []
+    # Every batch costs 4 tokens up front, each item its length: only two 3-letter items fit in 10
+    batcher = make_batcher(batches, max_tokens=10, base_tokens=4)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(word) for word in ["aaa", "bbb", "ccc"]))
+
+    assert asyncio.run(main()) == ["AAA", "BBB", "CCC"]
+    assert batches == [["aaa", "bbb"], ["ccc"]]
+
+def test_batch_errors_reach_every_caller():
+    async def run_batch(items):
+        raise RuntimeError("model unavailable")
+    batcher = MicroBatcher(run_batch, max_tokens=100, max_wait_seconds=0.01)
+
+    async def main():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ["model unavailable", "model unavailable"]
+
+def test_callers_in_separate_windows_get_separate_batches():
+    batches = []
+    batcher = make_batcher(batches, max_wait_seconds=0.001)
+
+    async def main():
+        first = await batcher.submit("a")
+        second = await batcher.submit("b")
+        return first, second
+
+    assert asyncio.run(main()) == ("A", "B")
+    assert batches == [["a"], ["b"]]
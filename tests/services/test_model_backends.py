@@ -0,0 +1,52 @@
+import asyncio
+import random
+import threading
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from src.fake_model_server import make_server
+from src.services.gemini_service import FEEDBACK_PROMPT
+from src.services.json_stream import parse_json_array
+from src.services.model_backends import FakeModelBackend, HttpModelBackend, make_backend
+
+PROMPT = FEEDBACK_PROMPT.render(["Eu falo português.", 'Ele disse "olá".'])
+
+
+def fake(**kwargs):
+    kwargs.setdefault("latency_ms", 0)
+    return FakeModelBackend(rng=random.Random(0), **kwargs)
+
+def test_fake_answers_every_sentence_in_the_prompt():
+    values, broken_indexes = parse_json_array(asyncio.run(fake().generate(PROMPT)), 2)
+    assert broken_indexes == []
+    assert [value["is_portuguese"] for value in values] == [True, True]
+    assert 'Ele disse "olá".' in values[1]["overall_comment"]
+
+def test_fake_injects_errors_and_malformed_elements():
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        asyncio.run(fake(error_rate=1.0).generate(PROMPT))
+    _, broken_indexes = parse_json_array(asyncio.run(fake(malformed_rate=1.0).generate(PROMPT)), 2)
+    assert broken_indexes == [0, 1]
+
+def test_fake_streams_the_same_text_in_chunks():
+    async def collect():
+        return [chunk async for chunk in fake(chunk_chars=10).stream(PROMPT)]
+    chunks = asyncio.run(collect())
+    assert len(chunks) > 1 and all(len(chunk) <= 10 for chunk in chunks)
+    assert "".join(chunks) == asyncio.run(fake().generate(PROMPT))
+
+def test_http_backend_round_trips_through_fake_server():
+    server = make_server("127.0.0.1", 0, fake(chunk_chars=16))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        backend = make_backend(f"http://127.0.0.1:{server.server_port}", "unused")
+        assert isinstance(backend, HttpModelBackend)
+
+        async def collect():
+            return "".join([chunk async for chunk in backend.stream(PROMPT)])
+        assert asyncio.run(collect()) == asyncio.run(backend.generate(PROMPT))
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,41 @@
+from src.services.sentence_checker import (EMPTY, MISSING_FORM, NOT_PORTUGUESE, PLAUSIBLE, WRONG_SUBJECT,
+                                           check_sentence, contains_form, detect_portuguese, tokenize)
+
+
+def verdict(sentence, pronoun="eu", correct_form="falo", tense_forms=None):
+    return check_sentence(sentence, "falar", "presente", pronoun, correct_form, tense_forms=tense_forms).verdict
+
+def test_tokenize_drops_punctuation_and_splits_clitics():
+    assert tokenize("Diz-me, Eu FALO português!") == ["diz", "me", "eu", "falo", "português"]
+    assert contains_form("Eu falo.", "falo")
+    assert not contains_form("Eu falou.", "falo")
+
+def test_language_detector():
+    assert detect_portuguese(tokenize("Eu não sei o que fazer."))
+    assert detect_portuguese(tokenize("I don't know what to do with this.")) is False
+    assert detect_portuguese(tokenize("xyz")) is None
+
+def test_obvious_cases_get_deterministic_feedback():
+    assert verdict("   ") == EMPTY
+    assert verdict("I speak English every day.") == NOT_PORTUGUESE
+    assert verdict("Eu gosto de café.") == MISSING_FORM
+    assert verdict("Ele falo português.") == WRONG_SUBJECT
+
+    result = check_sentence("Ele pos o livro na mesa.", "pôr", "preterito_perfeito", "ele", "pôs")
+    assert result.verdict == MISSING_FORM
+    assert result.feedback["feedback"]["spelling_errors"] == [{"error": "pos", "correction": "pôs"}]
+
+def test_plausible_sentences_go_to_the_model():
+    assert check_sentence("Eu não falo inglês.", "falar", "presente", "eu", "falo").feedback is None
+    assert verdict("Hoje eu me falo.") == PLAUSIBLE
+    # The imperfect shares one form between eu and ele, so "ele falava" is fine for eu
+    assert verdict("Ele falava muito.", correct_form="falava",
+                   tense_forms=["falava", "falava", "falávamos", "falavam"]) == PLAUSIBLE
+
+def test_coordinated_subjects_go_to_the_model():
+    assert verdict("Minha mãe e eu comemos pizza.", pronoun="nós", correct_form="comemos") == PLAUSIBLE
+    assert verdict("Ele e ela falam muito.", pronoun="eles", correct_form="falam") == PLAUSIBLE
+    assert verdict("Você e eu falamos.", pronoun="nós", correct_form="falamos") == PLAUSIBLE
+    assert verdict("Ele ou ela fala.", pronoun="ele", correct_form="fala") == PLAUSIBLE
+    # A lone subject is still checked
+    assert verdict("Ontem eu falamos.", pronoun="nós", correct_form="falamos") == WRONG_SUBJECT
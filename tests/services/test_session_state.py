@@ -0,0 +1,52 @@
+import pytest
+from flask.json.tag import TaggedJSONSerializer
+
+from src.core_data import VERBS, PRONOUNS
+from src.services import session_state
+
+
+def make_error(verb, tense, pronoun_idx, user_answer="x"):
+    return {'verb': verb, 'tense': tense, 'pronoun': PRONOUNS[pronoun_idx],
+            'correct': VERBS[verb][tense][pronoun_idx], 'user_answer': user_answer}
+
+
+class TestSessionState:
+    def test_exercises_round_trip_as_integers(self):
+        exercises = [("falar", "presente"), ("comer", "preterito_perfeito")]
+        encoded = session_state.encode_exercises(exercises)
+        assert all(isinstance(exercise_id, int) for exercise_id in encoded)
+        assert session_state.decode_exercises(encoded) == exercises
+
+    def test_unknown_exercise_is_rejected(self):
+        with pytest.raises(KeyError):
+            session_state.encode_exercise("xyzzy", "presente")
+
+    def test_errors_round_trip(self):
+        errors = [make_error("falar", "presente", 1, "fale"), make_error("comer", "presente", 3, "")]
+        encoded = session_state.encode_errors(errors)
+        assert encoded[0][1] == "fale"
+        assert session_state.decode_errors(encoded) == errors
+
+    def test_remediation_and_sentence_results_round_trip(self):
+        error = make_error("falar", "presente", 2)
+        remediation = {'error': error, 'user_answer': 'falamos', 'is_correct': True}
+        assert session_state.decode_remediation_result(session_state.encode_remediation_result(remediation)) == remediation
+
+        sentence = {'verb': 'falar', 'tense': 'presente', 'pronoun': 'nós', 'correct_form': error['correct'],
+                    'sentence': 'Nós falamos.', 'is_correct': True, 'index': 3}
+        assert session_state.decode_sentence_result(session_state.encode_sentence_result(sentence), 3) == sentence
+
+    def test_packed_state_is_an_order_of_magnitude_smaller(self):
+        serializer = TaggedJSONSerializer()
+        exercises = [(verb, tense) for verb in list(VERBS)[:10] for tense in list(VERBS[verb])[:5]]
+        errors = [make_error(verb, tense, i) for verb, tense in exercises for i in range(len(PRONOUNS))]
+        plain = serializer.dumps({'exercises': exercises, 'all_errors_in_session': errors})
+        packed = serializer.dumps({'state_version': session_state.state_tag(),
+                                   'exercises': session_state.encode_exercises(exercises),
+                                   'all_errors_in_session': session_state.encode_errors(errors)})
+        assert len(packed) * 8 < len(plain)
+
+    def test_state_from_another_version_is_not_current(self):
+        assert session_state.is_current({'state_version': session_state.state_tag()})
+        assert not session_state.is_current({'state_version': '0.00000000'})
+        assert not session_state.is_current({})
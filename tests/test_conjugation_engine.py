@@ -0,0 +1,55 @@
+import json
+import os
+import pytest
+from src.conjugation_engine import conjugate, conjugate_all, verb_group, GeneratedVerbsView
+from src.core_data import VERBS, VERB_INFINITIVES, TENSE_NAMES
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'core_data_verbs.json')
+
+@pytest.fixture(scope='module')
+def hand_written_verbs():
+    # Snapshot of the hand-typed core_data.VERBS the engine replaced
+    with open(FIXTURE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+def test_engine_reproduces_hand_written_catalogue(hand_written_verbs):
+    assert list(hand_written_verbs) == VERB_INFINITIVES
+    for verb, tenses in hand_written_verbs.items():
+        assert list(tenses) == list(TENSE_NAMES)
+        for tense, forms in tenses.items():
+            assert conjugate(verb, tense) == forms, f"{verb} {tense}"
+
+def test_core_data_view_matches_engine(hand_written_verbs):
+    assert {verb: dict(VERBS[verb]) for verb in VERBS} == hand_written_verbs
+
+@pytest.mark.parametrize("verb, tense, expected", [
+    ("ficar", "preterito_perfeito", ["fiquei", "ficou", "ficamos", "ficaram"]),
+    ("pagar", "subjuntivo_presente", ["pague", "pague", "paguemos", "paguem"]),
+    ("começar", "subjuntivo_presente", ["comece", "comece", "comecemos", "comecem"]),
+    ("conhecer", "presente", ["conheço", "conhece", "conhecemos", "conhecem"]),
+    ("agir", "subjuntivo_presente", ["aja", "aja", "ajamos", "ajam"]),
+    ("cair", "preterito_perfeito", ["caí", "caiu", "caímos", "caíram"]),
+    ("traduzir", "presente", ["traduzo", "traduz", "traduzimos", "traduzem"]),
+    ("aprender", "subjuntivo_preterito", ["aprendesse", "aprendesse", "aprendêssemos", "aprendessem"]),
+])
+def test_regular_rules_cover_verbs_outside_the_catalogue(verb, tense, expected):
+    assert conjugate(verb, tense) == expected
+
+def test_conjugate_returns_a_fresh_list():
+    forms = conjugate("falar", "presente")
+    forms[0] = "changed"
+    assert conjugate("falar", "presente")[0] == "falo"
+
+def test_unknown_tense_and_non_infinitive_are_rejected():
+    with pytest.raises(KeyError):
+        conjugate("falar", "futuro_do_presente")
+    with pytest.raises(ValueError):
+        verb_group("casa")
+
+def test_generated_view_only_exposes_listed_verbs():
+    view = GeneratedVerbsView(["falar"], ["presente"])
+    assert "falar" in view and "comer" not in view
+    assert dict(view["falar"]) == {"presente": ["falo", "fala", "falamos", "falam"]}
+    assert conjugate_all("falar", ["presente"]) == {"presente": ["falo", "fala", "falamos", "falam"]}
+    with pytest.raises(KeyError):
+        view["comer"]
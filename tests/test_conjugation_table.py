@@ -0,0 +1,47 @@
+import json
+import pytest
+from src.conjugation_table import ConjugationTable
+from src.core_data import CONJUGATIONS, VERBS, PRONOUNS, TENSE_NAMES
+
+NESTED = {
+    "falar": {"presente": ["falo", "fala", "falamos", "falam"], "preterito_perfeito": ["falei", "falou", "falamos", "falaram"]},
+    "ir": {"presente": ["vou", "vai", "vamos", "vão"]},
+}
+
+@pytest.fixture
+def table():
+    return ConjugationTable.from_nested(NESTED, PRONOUNS)
+
+def test_forward_lookup_by_ids(table):
+    verb_id = table.verb_id("falar")
+    tense_id = table.tense_id("preterito_perfeito")
+    assert table.form(verb_id, tense_id, 3) == "falaram"
+    assert table.forms(verb_id, tense_id) == NESTED["falar"]["preterito_perfeito"]
+
+def test_missing_tense_is_a_key_error(table):
+    assert not table.has(table.verb_id("ir"), table.tense_id("preterito_perfeito"))
+    with pytest.raises(KeyError):
+        table.lookup("ir", "preterito_perfeito")
+    with pytest.raises(KeyError):
+        table.as_mapping()["ir"]["preterito_perfeito"]
+
+def test_reverse_lookup_returns_every_match(table):
+    assert table.reverse_lookup("vão") == [("ir", "presente", "eles")]
+    assert sorted(table.reverse_lookup("falamos")) == [("falar", "presente", "nós"), ("falar", "preterito_perfeito", "nós")]
+    assert table.reverse_lookup("comer") == []
+
+def test_mapping_view_matches_nested_source(table):
+    view = table.as_mapping()
+    assert {verb: {tense: view[verb][tense] for tense in view[verb]} for verb in view} == NESTED
+    assert "ir" in view and "comer" not in view
+    assert "presente" in view["ir"] and "preterito_perfeito" not in view["ir"]
+
+def test_wrong_number_of_forms_is_rejected():
+    with pytest.raises(ValueError):
+        ConjugationTable.from_nested({"falar": {"presente": ["falo"]}}, PRONOUNS)
+
+def test_core_data_verbs_view_is_backed_by_the_table():
+    assert list(VERBS["falar"]) == list(TENSE_NAMES)
+    assert VERBS["falar"]["presente"] == ["falo", "fala", "falamos", "falam"]
+    assert json.dumps(VERBS["ser"]["presente"]) == json.dumps(["sou", "é", "somos", "são"])
+    assert ("ser", "presente", "eu") in CONJUGATIONS.reverse_lookup("sou")
@@ -0,0 +1,145 @@
+import pytest
+from flask import Flask, session
+
+from src.session_store import (MemorySessionStore, SqliteSessionStore, ServerSideSessionInterface,
+                               make_session_interface)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_app(store):
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "test"
+    app.session_interface = ServerSideSessionInterface(store)
+
+    @app.route("/set/<key>/<value>")
+    def set_value(key, value):
+        session[key] = value
+        return ""
+
+    @app.route("/append/<value>")
+    def append(value):
+        # In-place mutation, which never marks the session modified
+        session.setdefault("items", [])
+        session["items"].append(value)
+        return ""
+
+    @app.route("/get")
+    def get_value():
+        return {"session": dict(session)}
+
+    @app.route("/clear")
+    def clear():
+        session.clear()
+        return ""
+
+    return app
+
+
+class TestMemorySessionStore:
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        store = MemorySessionStore(ttl_seconds=10, clock=clock)
+        store.set("a", "{}")
+        clock.now += 9.9
+        assert store.get("a") == "{}"
+        clock.now += 0.1
+        assert store.get("a") is None
+
+    def test_least_recently_used_session_is_evicted(self):
+        store = MemorySessionStore(max_entries=2)
+        store.set("a", "1")
+        store.set("b", "2")
+        store.get("a")
+        store.set("c", "3")
+        assert store.get("b") is None
+        assert store.get("a") == "1"
+        assert store.evictions == 1
+
+
+class TestSqliteSessionStore:
+    def test_round_trip_and_expiry(self, tmp_path):
+        clock = FakeClock()
+        store = SqliteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl_seconds=10, clock=clock)
+        store.set("a", '{"x": 1}')
+        assert store.get("a") == '{"x": 1}'
+        clock.now += 10
+        assert store.get("a") is None
+
+    def test_visible_to_another_store_on_the_same_file(self, tmp_path):
+        path = str(tmp_path / "sessions.sqlite3")
+        SqliteSessionStore(path).set("a", "1")
+        assert SqliteSessionStore(path).get("a") == "1"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore()
+    return SqliteSessionStore(str(tmp_path / "sessions.sqlite3"))
+
+
+class TestServerSideSessionInterface:
+    def test_cookie_holds_only_the_session_id(self, store):
+        client = make_app(store).test_client()
+        client.get("/set/name/" + "x" * 5000)
+        cookie = client.get_cookie("session")
+        assert len(cookie.value) < 64
+        assert "x" * 5000 in store.get(cookie.value)
+        assert client.get("/get").json["session"]["name"] == "x" * 5000
+
+    def test_in_place_mutations_are_saved(self, store):
+        client = make_app(store).test_client()
+        client.get("/append/a")
+        client.get("/append/b")
+        assert client.get("/get").json["session"]["items"] == ["a", "b"]
+
+    def test_tuples_round_trip(self, store):
+        app = make_app(store)
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["exercise"] = ("falar", "presente")
+        with client.session_transaction() as sess:
+            assert sess["exercise"] == ("falar", "presente")
+
+    def test_sessions_are_separate_per_client(self, store):
+        app = make_app(store)
+        first, second = app.test_client(), app.test_client()
+        first.get("/set/name/first")
+        assert second.get("/get").json["session"] == {}
+
+    def test_unchanged_session_is_not_rewritten(self, store):
+        client = make_app(store).test_client()
+        client.get("/set/name/a")
+        writes = []
+        original_set = store.set
+        store.set = lambda sid, payload: (writes.append(sid), original_set(sid, payload))
+        client.get("/get")
+        assert writes == []
+
+    def test_clearing_the_session_deletes_it(self, store):
+        client = make_app(store).test_client()
+        client.get("/set/name/a")
+        sid = client.get_cookie("session").value
+        client.get("/clear")
+        assert store.get(sid) is None
+        assert client.get_cookie("session") is None
+
+    def test_unknown_session_id_starts_a_new_session(self, store):
+        client = make_app(store).test_client()
+        client.set_cookie("session", "forged")
+        client.get("/set/name/a")
+        assert client.get_cookie("session").value != "forged"
+
+
+def test_make_session_interface():
+    assert make_session_interface("cookie") is None
+    assert isinstance(make_session_interface("memory").store, MemorySessionStore)
+    with pytest.raises(ValueError):
+        make_session_interface("redis")
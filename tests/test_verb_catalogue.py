@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from src import conjugation_engine
+from src.conjugation_engine import GeneratedVerbsView
+from src.core_data import VERB_INFINITIVES, TENSE_NAMES, PRONOUNS, CATALOGUE_FINGERPRINT
+from src.verb_catalogue import MappedCatalogue, compile_catalogue, catalogue_fingerprint
+
+@pytest.fixture
+def catalogue_path(tmp_path):
+    path = str(tmp_path / 'verb_catalogue.bin')
+    verbs = GeneratedVerbsView(VERB_INFINITIVES, list(TENSE_NAMES))
+    compile_catalogue(path, verbs, TENSE_NAMES, PRONOUNS)
+    return path
+
+@pytest.fixture
+def catalogue(catalogue_path):
+    catalogue = MappedCatalogue.open(catalogue_path)
+    yield catalogue
+    catalogue.close()
+
+def test_round_trip_matches_engine(catalogue):
+    engine = GeneratedVerbsView(VERB_INFINITIVES, list(TENSE_NAMES))
+    view = catalogue.as_mapping()
+    assert list(view) == VERB_INFINITIVES
+    for verb in VERB_INFINITIVES:
+        for tense in TENSE_NAMES:
+            assert view[verb][tense] == engine[verb][tense]
+
+def test_names_and_fingerprint_are_stored(catalogue):
+    assert catalogue.tenses == list(TENSE_NAMES)
+    assert catalogue.tense_names == TENSE_NAMES
+    assert catalogue.pronouns == PRONOUNS
+    assert catalogue.fingerprint == catalogue_fingerprint(VERB_INFINITIVES, TENSE_NAMES, PRONOUNS)
+
+def test_fingerprint_covers_the_engine_rules(monkeypatch):
+    before = conjugation_engine.rules_digest()
+    assert CATALOGUE_FINGERPRINT == catalogue_fingerprint(VERB_INFINITIVES, TENSE_NAMES, PRONOUNS, before)
+    # An irregular form fixed for a verb that was already in the catalogue
+    monkeypatch.setitem(conjugation_engine.IRREGULAR_FORMS, "ir",
+                        {**conjugation_engine.IRREGULAR_FORMS["ir"], "presente": ["vo", "vai", "vamos", "vão"]})
+    after = conjugation_engine.rules_digest()
+    assert after != before
+    assert (catalogue_fingerprint(VERB_INFINITIVES, TENSE_NAMES, PRONOUNS, after)
+            != catalogue_fingerprint(VERB_INFINITIVES, TENSE_NAMES, PRONOUNS, before))
+
+def test_import_with_compiled_catalogue_generates_no_forms(tmp_path):
+    path = str(tmp_path / 'verb_catalogue.bin')
+    verbs = GeneratedVerbsView(VERB_INFINITIVES, list(TENSE_NAMES))
+    compile_catalogue(path, verbs, TENSE_NAMES, PRONOUNS, CATALOGUE_FINGERPRINT)
+    # A fresh interpreter, as a worker process would import it
+    code = ("from src import conjugation_engine, core_data; "
+            "print(core_data._CATALOGUE is not None, conjugation_engine.cache_info().currsize)")
+    output = subprocess.run([sys.executable, "-c", code], env={**os.environ, "VERB_CATALOGUE_PATH": path},
+                            capture_output=True, text=True, check=True).stdout.split()
+    assert output[-2:] == ["True", "0"]
+
+def test_verb_lookup_by_name(catalogue):
+    assert catalogue.verb_id("pôr") == VERB_INFINITIVES.index("pôr")
+    assert catalogue.verb_id("nadar") is None
+    assert "nadar" not in catalogue.as_mapping()
+    with pytest.raises(KeyError):
+        catalogue.lookup("nadar", "presente")
+
+def test_reverse_lookup_only_matches_whole_forms(catalogue):
+    assert ("ir", "presente", "eles") in catalogue.reverse_lookup("vão")
+    assert ("falar", "presente", "nós") in catalogue.reverse_lookup("falamos")
+    # "ala" occurs inside many forms but is not a form itself
+    assert catalogue.reverse_lookup("ala") == []
+
+def test_corrupt_file_is_rejected(tmp_path):
+    path = tmp_path / 'broken.bin'
+    path.write_bytes(b'not a catalogue at all, just some bytes here')
+    with pytest.raises(ValueError):
+        MappedCatalogue.open(str(path))